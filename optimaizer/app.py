@@ -1,14 +1,32 @@
 # NOTE: Code was adjusted from https://google.github.io/mesop/demo/ (Fancy Chat)
 # To run the app: `mesop optimaizer/app.py`
+# NOTE: With the default transport, the browser sends the events of a session one at a time. Run
+#  with `MESOP_WEBSOCKETS_ENABLED=true` so that "New chat" and "Regenerate" can cancel a turn in
+#  progress (closing the tab cancels it in any case).
+import os
+import tempfile
+import threading
 import time
-from dataclasses import asdict, dataclass
-from typing import Callable, Literal
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Literal
 
 import mesop as me
+import pandas as pd
 
 from dotenv import load_dotenv
+from openai import OpenAI
 
+from optimaizer.chat_store import ChatStore
+from optimaizer.llm.agent import OpenAIAgent
+from optimaizer.llm.scheduler import RequestScheduler, ScheduledTransport
+from optimaizer.llm.transport import OpenAITransport
 from optimaizer.main import start_pricing_agent
+from optimaizer.pricing_optimizer.types import PricingOptimizerOutput
+from optimaizer.turn_runner import TurnRunner
+from optimaizer.utils.cancellation import Cancelled
 from optimaizer.utils import logging_config  # noqa: F401
 
 import logging
@@ -17,7 +35,30 @@ import random as random
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-agent = start_pricing_agent()
+# NOTE: By default the database (and its -wal and -shm files) goes to the temporary directory,
+#  not to the directory the app is started from
+chat_store = ChatStore(
+    os.getenv("OPTIMAIZER_CHAT_DB")
+    or Path(tempfile.gettempdir()) / "optimaizer_chat_history.sqlite3"
+)
+# Agent turns run in the background, event handlers only poll them
+turn_runner = TurnRunner()
+# Agent of each session (turns of different sessions run concurrently), least recently used last
+_session_agents: OrderedDict[str, OpenAIAgent] = OrderedDict()
+_session_agents_lock = threading.Lock()
+# LLM requests of all the sessions go through the same scheduler, to stay within the rate limits
+llm_scheduler = RequestScheduler(
+    max_concurrent_requests=int(
+        os.getenv("OPTIMAIZER_LLM_MAX_CONCURRENT_REQUESTS", "8")
+    ),
+    max_concurrent_tokens=int(
+        os.getenv("OPTIMAIZER_LLM_MAX_CONCURRENT_TOKENS", "200000")
+    ),
+)
+# NOTE: Retries are done by the scheduler, not by the OpenAI client
+_llm_transport = OpenAITransport(
+    OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+)
 
 # ==========================================================================================================
 
@@ -33,29 +74,89 @@ _EXAMPLE_USER_QUERIES = (
 )
 _CHAT_MAX_WIDTH = "800px"
 _MOBILE_BREAKPOINT = 640
+# Number of messages of the current chat kept in the UI state (even, to keep user/bot pairs)
+_VISIBLE_MESSAGES = 40
+_MAX_SESSION_AGENTS = 256
+# Delay between two checks of the turn in progress
+_POLL_INTERVAL_SECONDS = 0.1
+# Stored in place of the bot message of a turn which did not complete, so that transcripts keep
+# alternating user and bot messages
+_CANCELLED_RESPONSE = "(Response cancelled)"
+_FAILED_RESPONSE = "Sorry, something went wrong while answering. Please try again."
 
 
 @dataclass(kw_only=True)
 class ChatMessage:
     """Chat message metadata."""
 
+    # Id of the message in the chat store, 0 until the message is stored
+    id: int = 0
     role: Role = "user"
     content: str = ""
     edited: bool = False
     rating: int = 0
+    # Optimizer outputs of the turn (`PricingOptimizerOutput.model_dump()`), rendered as tables
+    results: list[dict[str, Any]] = field(default_factory=list)
 
 
 @me.stateclass
 class State:
     input: str
+    # NOTE: Transcripts live in the chat store, the state only holds the visible messages of the
+    #  current chat and the ids of the chats of the session (serialized on every event)
     output: list[ChatMessage]
     in_progress: bool
     sidebar_expanded: bool = False
-    history: list[list[dict]]
+    chat_id: int = 0
+    chat_ids: list[int]
+    session_id: str = ""
+
+
+def _session_agent(session_id: str) -> OpenAIAgent:
+    with _session_agents_lock:
+        agent = _session_agents.get(session_id)
+        if agent is None:
+            # NOTE: Optimization results are rendered by the app, the agent only comments them
+            agent = _session_agents[session_id] = start_pricing_agent(
+                transport=ScheduledTransport(_llm_transport, llm_scheduler, session_id),
+                render_results=True,
+            )
+        _session_agents.move_to_end(session_id)
+        while len(_session_agents) > _MAX_SESSION_AGENTS:
+            _session_agents.popitem(last=False)
+    return agent
 
 
-def respond_to_chat(input: str, history: list[ChatMessage]):
+def _run_turn(agent: OpenAIAgent, input: str) -> tuple[str, list[dict[str, Any]]]:
     response = agent(input)
+    return response, [
+        result.model_dump()
+        for result in agent.tool_results
+        if isinstance(result, PricingOptimizerOutput)
+    ]
+
+
+def respond_to_chat(input: str, history: list[ChatMessage], message: ChatMessage):
+    """
+    Runs the agent turn in the background and yields the response once it is ready (empty chunks
+    while the turn is in progress, so that the handler keeps rendering).
+
+    Raises `Cancelled` when the turn was cancelled by another event of the session. When the
+    handler is closed (e.g. the tab is closed), the turn is cancelled.
+    """
+    session_id = _session_id()
+    turn = turn_runner.start(session_id, _run_turn, _session_agent(session_id), input)
+    try:
+        while not turn.done:
+            time.sleep(_POLL_INTERVAL_SECONDS)
+            yield ""
+    finally:
+        # No-op once the turn is done
+        turn.cancel()
+        turn_runner.finish(session_id, turn)
+    if turn.future.cancelled() or isinstance(turn.future.exception(), Cancelled):
+        raise Cancelled()
+    response, message.results = turn.future.result()
 
     # ⬇ This emulates a stream of responses from the agent
     #   (we did not implement streaming in the agent in order to keep function calling simple)
@@ -67,6 +168,7 @@ def respond_to_chat(input: str, history: list[ChatMessage]):
 
 def on_load(e: me.LoadEvent):
     me.set_theme_mode("system")
+    _session_id()
 
 
 @me.page(
@@ -153,9 +255,11 @@ def sidebar():
 
 def history_pane():
     state = me.state(State)
-    for index, chat in enumerate(state.history):
+    chat_ids = [chat_id for chat_id in state.chat_ids if chat_id != state.chat_id]
+    titles = chat_store.titles(chat_ids)
+    for chat_id in chat_ids:
         with me.box(
-            key=f"chat-{index}",
+            key=f"chat-{chat_id}",
             on_click=on_click_history,
             style=me.Style(
                 background=me.theme_var("surface-container"),
@@ -171,7 +275,7 @@ def history_pane():
                 text_overflow="ellipsis",
             ),
         ):
-            me.text(_truncate_text(chat[0]["content"]))
+            me.text(_truncate_text(titles[chat_id]))
 
 
 def header():
@@ -296,6 +400,8 @@ def bot_message(*, message_index: int, message: ChatMessage):
 
         # Bot message response
         with me.box(style=me.Style(display="flex", flex_direction="column")):
+            for result in message.results:
+                optimization_result(result=result)
             me.markdown(
                 message.content,
                 style=me.Style(color=me.theme_var("on-surface")),
@@ -325,6 +431,46 @@ def bot_message(*, message_index: int, message: ChatMessage):
                 )
 
 
+def optimization_result(*, result: dict[str, Any]):
+    product_results = pd.DataFrame(result["product_results"])
+    if product_results.empty:
+        return
+    max_revenue = max(product_results["revenue"].max(), 1e-9)
+    with me.box(style=me.Style(margin=me.Margin(top=16))):
+        me.table(
+            product_results.rename(
+                columns={
+                    "product_id": "Product",
+                    "price": "Price",
+                    "revenue": "Revenue",
+                    "sales": "Sales",
+                }
+            ).round({"Price": 2, "Revenue": 2})
+        )
+        me.text(
+            f"Total revenue: {product_results['revenue'].sum():,.2f}"
+            + (
+                f" (feasible, gap {result['optimality_gap']:.2%})"
+                if result["status"] == "feasible"
+                else ""
+            ),
+            style=me.Style(font_weight="bold", margin=me.Margin.symmetric(vertical=8)),
+        )
+        # Revenue by product as horizontal bars
+        for row in product_results.itertuples():
+            with me.box(style=me.Style(display="flex", align_items="center", gap=10)):
+                me.text(row.product_id, style=me.Style(width=120))
+                me.box(
+                    style=me.Style(
+                        background=me.theme_var("primary"),
+                        border_radius=4,
+                        height=14,
+                        width=f"{max(1.0, 60 * row.revenue / max_revenue):.1f}%",
+                    )
+                )
+                me.text(f"{row.revenue:,.2f}")
+
+
 def chat_input():
     state = me.state(State)
     with me.box(
@@ -470,6 +616,7 @@ def on_click_thumb_up(e: me.ClickEvent):
     _, msg_index = e.key.split("-")
     msg_index = int(msg_index)
     state.output[msg_index].rating = 1
+    chat_store.set_rating(state.output[msg_index].id, 1)
 
 
 def on_click_thumb_down(e: me.ClickEvent):
@@ -478,25 +625,36 @@ def on_click_thumb_down(e: me.ClickEvent):
     _, msg_index = e.key.split("-")
     msg_index = int(msg_index)
     state.output[msg_index].rating = -1
+    chat_store.set_rating(state.output[msg_index].id, -1)
 
 
 def on_click_new_chat(e: me.ClickEvent):
-    """Resets messages."""
+    """Resets messages (the current chat is already saved in the chat store)."""
     state = me.state(State)
-    if state.output:
-        state.history.insert(0, [asdict(messages) for messages in state.output])
+    turn_runner.cancel(_session_id())
+    state.in_progress = False
+    state.chat_id = 0
     state.output = []
     me.focus_component(key="chat_input")
 
 
 def on_click_history(e: me.ClickEvent):
-    """Loads existing chat from history and saves current chat"""
+    """Loads the last messages of an existing chat from the chat store"""
     state = me.state(State)
-    _, chat_index = e.key.split("-")
-    chat_messages = [ChatMessage(**chat) for chat in state.history.pop(int(chat_index))]
-    if state.output:
-        state.history.insert(0, [asdict(messages) for messages in state.output])
-    state.output = chat_messages
+    _, chat_id = e.key.split("-")
+    state.chat_id = int(chat_id)
+    state.chat_ids.remove(state.chat_id)
+    state.chat_ids.insert(0, state.chat_id)
+    state.output = [
+        ChatMessage(
+            id=message.id,
+            role=message.role,
+            content=message.content,
+            rating=message.rating,
+            results=message.results,
+        )
+        for message in chat_store.last_messages(state.chat_id, _VISIBLE_MESSAGES)
+    ]
     me.focus_component(key="chat_input")
 
 
@@ -531,20 +689,35 @@ def on_click_regenerate(e: me.ClickEvent):
     # Get bot message to be regenerated
     assistant_message = state.output[msg_index]
     assistant_message.content = ""
+    assistant_message.results = []
     state.in_progress = True
     yield
 
     start_time = time.time()
     # Send in the old user input and chat history to get the bot response.
     # We make sure to only pass in the chat history up to this message.
-    output_message = respond_to_chat(user_message.content, state.output[:msg_index])
-    for content in output_message:
-        assistant_message.content += content
-        # TODO: 0.25 is an abitrary choice. In the future, consider making this adjustable.
-        if (time.time() - start_time) >= 0.25:
-            start_time = time.time()
-            yield
+    output_message = respond_to_chat(
+        user_message.content, state.output[:msg_index], assistant_message
+    )
+    try:
+        for content in output_message:
+            assistant_message.content += content
+            # TODO: 0.25 is an abitrary choice. In the future, consider making this adjustable.
+            if (time.time() - start_time) >= 0.25:
+                start_time = time.time()
+                yield
+    except Cancelled:
+        # Replaced by another turn of the session, which owns the state from now on. The stored
+        # message keeps its previous content.
+        return
+    except Exception:
+        logger.exception("Failed to regenerate the response")
+        assistant_message.content = _FAILED_RESPONSE
+        assistant_message.results = []
 
+    chat_store.update_content(
+        assistant_message.id, assistant_message.content, assistant_message.results
+    )
     state.in_progress = False
     me.focus_component(key="chat_input")
     yield
@@ -571,27 +744,54 @@ def _submit_chat_msg():
     state.input = ""
     yield
 
+    if not state.chat_id:
+        state.chat_id = chat_store.create_chat(title=input)
+        state.chat_ids.insert(0, state.chat_id)
     output = state.output
     if output is None:
         output = []
-    output.append(ChatMessage(role="user", content=input))
+    output.append(
+        ChatMessage(
+            id=chat_store.append_message(state.chat_id, "user", input),
+            role="user",
+            content=input,
+        )
+    )
     state.in_progress = True
     me.scroll_into_view(key="scroll-to")
     yield
 
     start_time = time.time()
     # Send user input and chat history to get the bot response.
-    output_message = respond_to_chat(input, state.output)
-    assistant_message = ChatMessage(role="bot")
+    # NOTE: The bot message is stored right away and completed once the turn is done, so that the
+    #  transcript has a reply to the user message even if the turn is cancelled or fails
+    assistant_message = ChatMessage(
+        id=chat_store.append_message(state.chat_id, "bot", ""), role="bot"
+    )
+    output_message = respond_to_chat(input, state.output, assistant_message)
     output.append(assistant_message)
     state.output = output
-    for content in output_message:
-        assistant_message.content += content
-        # TODO: 0.25 is an abitrary choice. In the future, consider making this adjustable.
-        if (time.time() - start_time) >= 0.25:
-            start_time = time.time()
-            yield
+    try:
+        for content in output_message:
+            assistant_message.content += content
+            # TODO: 0.25 is an abitrary choice. In the future, consider making this adjustable.
+            if (time.time() - start_time) >= 0.25:
+                start_time = time.time()
+                yield
+    except Cancelled:
+        # Replaced by another turn of the session, which owns the state from now on
+        chat_store.update_content(assistant_message.id, _CANCELLED_RESPONSE)
+        return
+    except Exception:
+        logger.exception("Failed to respond to the chat message")
+        assistant_message.content = _FAILED_RESPONSE
+        assistant_message.results = []
 
+    chat_store.update_content(
+        assistant_message.id, assistant_message.content, assistant_message.results
+    )
+    # Older messages stay in the chat store only
+    state.output = state.output[-_VISIBLE_MESSAGES:]
     state.in_progress = False
     me.focus_component(key="chat_input")
     yield
@@ -600,6 +800,14 @@ def _submit_chat_msg():
 # Helpers
 
 
+def _session_id() -> str:
+    """Id of the browser session, which keys its agent and its turn in progress."""
+    state = me.state(State)
+    if not state.session_id:
+        state.session_id = uuid.uuid4().hex
+    return state.session_id
+
+
 def _is_mobile():
     return me.viewport_size().width < _MOBILE_BREAKPOINT
 
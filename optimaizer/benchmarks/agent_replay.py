@@ -0,0 +1,136 @@
+# Offline, reproducible benchmark of the agent loop (LLM round trips, tool execution, history handling).
+# To record a fixture (uses OPENAI_API_KEY): `python -m optimaizer.benchmarks.agent_replay record fixture.json`
+# To replay it: `python -m optimaizer.benchmarks.agent_replay replay fixture.json --repeat 20`
+# To compare answers with and without the results rendered by the app, record two fixtures (with and
+# without `--render-results`) and replay them with `--recorded-latency`
+import argparse
+import logging
+import os
+import statistics
+import time
+from pathlib import Path
+from openai import OpenAI
+
+from optimaizer.benchmarks.load_test import SCRIPTED_CONVERSATION
+from optimaizer.llm.transport import (
+    OpenAITransport,
+    RecordingTransport,
+    ReplayTransport,
+)
+from optimaizer.main import start_pricing_agent
+
+logger = logging.getLogger(__name__)
+
+
+def record_conversation(
+    fixture_path: Path,
+    conversation: list[str] = SCRIPTED_CONVERSATION,
+    base_url: str | None = None,
+    render_results: bool = False,
+) -> None:
+    """
+    Run the scripted conversation against a real endpoint and record every completion.
+
+    Args:
+        fixture_path (Path): Where to write the recorded exchanges.
+        conversation (list[str]): User prompts of the conversation.
+        base_url (str | None): OpenAI-compatible endpoint, defaults to the OpenAI API.
+        render_results (bool): Use the system prompt of the app, which renders optimizer results itself.
+    """
+    # NOTE: Local OpenAI-compatible endpoints (e.g. `StubLLMServer`) do not check the API key
+    client = (
+        OpenAI(api_key=os.getenv("OPENAI_API_KEY", "local"), base_url=base_url)
+        if base_url
+        else None
+    )
+    transport = RecordingTransport(OpenAITransport(client), fixture_path)
+    agent = start_pricing_agent(transport=transport, render_results=render_results)
+    for user_prompt in conversation:
+        agent(user_prompt)
+    logger.info(f"Recorded {len(transport.exchanges)} exchanges to {fixture_path}")
+
+
+def replay_conversation(
+    fixture_path: Path,
+    repeat: int = 10,
+    latency_seconds: float = 0.0,
+    replay_recorded_latency: bool = False,
+) -> list[list[float]]:
+    """
+    Replay a recorded conversation through the agent loop and time each turn.
+
+    Args:
+        fixture_path (Path): Fixture written by `record_conversation`.
+        repeat (int): Number of replays of the whole conversation.
+        latency_seconds (float): Simulated LLM latency per request.
+        replay_recorded_latency (bool): Simulate the LLM latency measured at recording time instead.
+
+    Returns:
+        list[list[float]]: Turn latencies (in seconds) of each replay.
+    """
+    transport = ReplayTransport(
+        fixture_path,
+        latency_seconds=latency_seconds,
+        replay_recorded_latency=replay_recorded_latency,
+    )
+
+    latencies = []
+    for _ in range(repeat):
+        transport.rewind()
+        agent = start_pricing_agent(transport=transport)
+        turn_latencies = []
+        for user_prompt in transport.user_prompts:
+            start_time = time.perf_counter()
+            agent(user_prompt)
+            turn_latencies.append(time.perf_counter() - start_time)
+        latencies.append(turn_latencies)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the agent loop")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record")
+    record_parser.add_argument("fixture_path", type=Path)
+    record_parser.add_argument("--base-url", default=None)
+    record_parser.add_argument("--render-results", action="store_true")
+
+    replay_parser = subparsers.add_parser("replay")
+    replay_parser.add_argument("fixture_path", type=Path)
+    replay_parser.add_argument("--repeat", type=int, default=10)
+    replay_parser.add_argument("--llm-latency", type=float, default=0.0)
+    replay_parser.add_argument("--recorded-latency", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_conversation(
+            args.fixture_path,
+            base_url=args.base_url,
+            render_results=args.render_results,
+        )
+        return
+
+    logging.getLogger("optimaizer").setLevel(logging.WARNING)
+    latencies = replay_conversation(
+        args.fixture_path,
+        repeat=args.repeat,
+        latency_seconds=args.llm_latency,
+        replay_recorded_latency=args.recorded_latency,
+    )
+    for turn, turn_latencies in enumerate(zip(*latencies)):
+        print(
+            f"turn {turn}: mean={statistics.mean(turn_latencies):.4f}s "
+            f"min={min(turn_latencies):.4f}s max={max(turn_latencies):.4f}s"
+        )
+    print(f"conversation: mean={statistics.mean(map(sum, latencies)):.4f}s")
+    completion_tokens = [
+        (exchange.response.get("usage") or {}).get("completion_tokens", 0)
+        for exchange in ReplayTransport(args.fixture_path).exchanges
+    ]
+    print(f"completion tokens: {sum(completion_tokens)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# Headless load test of the pricing agent against a local stub LLM server.
+# To run the load test: `python -m optimaizer.benchmarks.load_test --sessions 16`
+import argparse
+import logging
+import statistics
+import textwrap
+import time
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI
+from pydantic import BaseModel
+
+from optimaizer.llm.scheduler import RequestScheduler, ScheduledTransport
+from optimaizer.llm.stub_server import StubLLMServer
+from optimaizer.llm.transport import OpenAITransport
+from optimaizer.main import start_pricing_agent
+
+logger = logging.getLogger(__name__)
+
+# Same interactions as the example script in `optimaizer/main.py`
+SCRIPTED_CONVERSATION = [
+    textwrap.dedent(message).strip()
+    for message in [
+        """
+        Optimize pricing for the following products: product-A, product-B, product-C
+
+        Inventory levels are:
+        - product-A: 90
+        - product-B: 55
+        - product-C: use default value
+        """,
+        """
+        Do the same for product-A and product-B only.
+        Keep the same inventory level, but change the market size for product-A to 1000.
+        """,
+        """
+        Now add a custom constraint to the optimizer such that the price of product-A is lower or equal to the price of product-B.
+        """,
+        """
+        I would like the price of A to be between 0.5 and 1.5.
+        """,
+    ]
+]
+
+
+class TurnResult(BaseModel):
+    session: int
+    turn: int
+    latency_seconds: float
+    error: str | None = None
+
+
+class LoadTestReport(BaseModel):
+    sessions: int
+    turns: int
+    errors: int
+    duration_seconds: float
+    p50_latency_seconds: float
+    p95_latency_seconds: float
+    p99_latency_seconds: float
+
+    @property
+    def throughput(self) -> float:
+        return self.turns / self.duration_seconds
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.turns
+
+    def __str__(self) -> str:
+        return (
+            f"{self.sessions} sessions | {self.turns} turns in {self.duration_seconds:.2f}s "
+            f"({self.throughput:.2f} turns/s) | error rate {self.error_rate:.2%} | "
+            f"latency p50={self.p50_latency_seconds:.3f}s "
+            f"p95={self.p95_latency_seconds:.3f}s "
+            f"p99={self.p99_latency_seconds:.3f}s"
+        )
+
+
+def run_session(
+    session: int,
+    base_url: str,
+    conversation: list[str],
+    scheduler: RequestScheduler | None = None,
+) -> list[TurnResult]:
+    if scheduler is None:
+        transport = OpenAITransport(OpenAI(api_key="stub", base_url=base_url))
+    else:
+        # Retries are left to the scheduler
+        transport = ScheduledTransport(
+            OpenAITransport(OpenAI(api_key="stub", base_url=base_url, max_retries=0)),
+            scheduler,
+            session_id=str(session),
+        )
+    agent = start_pricing_agent(transport=transport)
+
+    results = []
+    for turn, user_prompt in enumerate(conversation):
+        start_time = time.perf_counter()
+        error = None
+        try:
+            agent(user_prompt)
+        except Exception as e:
+            logger.error(f"Session {session} failed at turn {turn}: {e}")
+            error = str(e)
+        results.append(
+            TurnResult(
+                session=session,
+                turn=turn,
+                latency_seconds=time.perf_counter() - start_time,
+                error=error,
+            )
+        )
+    return results
+
+
+def run_load_test(
+    sessions: int,
+    base_url: str,
+    conversation: list[str] = SCRIPTED_CONVERSATION,
+    scheduler: RequestScheduler | None = None,
+) -> LoadTestReport:
+    """
+    Run concurrent chat sessions against an OpenAI-compatible endpoint and report turn latencies.
+
+    Args:
+        sessions (int): Number of concurrent chat sessions (one agent per session).
+        base_url (str): Base URL of the OpenAI-compatible endpoint (e.g. a `StubLLMServer`).
+        conversation (list[str]): User prompts replayed in each session.
+        scheduler (RequestScheduler | None): Scheduler shared by the sessions for their LLM
+            requests, if any.
+
+    Returns:
+        LoadTestReport: Latency percentiles, throughput and error counts.
+    """
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        futures = [
+            executor.submit(run_session, session, base_url, conversation, scheduler)
+            for session in range(sessions)
+        ]
+        results = [result for future in futures for result in future.result()]
+    duration_seconds = time.perf_counter() - start_time
+
+    latencies = [result.latency_seconds for result in results]
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return LoadTestReport(
+        sessions=sessions,
+        turns=len(results),
+        errors=sum(result.error is not None for result in results),
+        duration_seconds=duration_seconds,
+        p50_latency_seconds=percentiles[49],
+        p95_latency_seconds=percentiles[94],
+        p99_latency_seconds=percentiles[98],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Headless load test of the pricing agent"
+    )
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument(
+        "--llm-latency",
+        type=float,
+        default=0.2,
+        help="Simulated latency of the stub LLM server (seconds per request)",
+    )
+    parser.add_argument(
+        "--max-concurrent-requests",
+        type=int,
+        default=None,
+        help="Send the LLM requests through a shared scheduler with this concurrency",
+    )
+    parser.add_argument(
+        "--stub-max-concurrent-requests",
+        type=int,
+        default=None,
+        help="Concurrent requests above which the stub LLM server answers 429",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help="OpenAI-compatible endpoint to target instead of the local stub server",
+    )
+    args = parser.parse_args()
+
+    logging.getLogger("optimaizer").setLevel(logging.WARNING)
+
+    scheduler = (
+        RequestScheduler(max_concurrent_requests=args.max_concurrent_requests)
+        if args.max_concurrent_requests
+        else None
+    )
+    if args.base_url:
+        print(run_load_test(args.sessions, args.base_url, scheduler=scheduler))
+    else:
+        with StubLLMServer(
+            latency_seconds=args.llm_latency,
+            max_concurrent_requests=args.stub_max_concurrent_requests,
+        ) as server:
+            print(run_load_test(args.sessions, server.base_url, scheduler=scheduler))
+            print(f"Stub server: {server.rate_limited_count} requests rate limited")
+    if scheduler is not None:
+        print(f"Scheduler: {scheduler.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# Benchmark of the piecewise-linear price model against the enumerated price points model on dense curves.
+# To run the benchmark: `python -m optimaizer.benchmarks.piecewise_linear --price-points 200 --products 60`
+import argparse
+import logging
+import random
+import time
+import numpy as np
+from pydantic import BaseModel
+
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.piecewise_linear import (
+    PiecewiseLinearPricingOptimizer,
+)
+from optimaizer.pricing_optimizer.types import (
+    ConversionRateCurve,
+    Inventory,
+    MarketSize,
+    Prediction,
+    PricingOptimizerInput,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ModelBenchmark(BaseModel):
+    model: str
+    variables: int
+    integer_variables: int
+    constraints: int
+    build_seconds: float
+    solve_seconds: float
+    total_revenue: float
+
+
+def dense_pricing_parameters(
+    n_products: int = 60, n_price_points: int = 200, seed: int = 0
+) -> PricingOptimizerInput:
+    """
+    Build a catalog from the default curves, resampled on `n_price_points` prices (linear
+    interpolation) and scaled at random for each product. A coupling constraint on the total sales
+    keeps the products from being optimized independently.
+    """
+    default_parameters = get_default_pricing_parameters()
+    default_curves = default_parameters.conversion_rate_curves
+    rng = random.Random(seed)
+
+    product_ids = [f"product-{i}" for i in range(n_products)]
+    conversion_rate_curves, inventories, market_sizes = [], [], []
+    for i, product_id in enumerate(product_ids):
+        curve = sorted(
+            default_curves[i % len(default_curves)].curve,
+            key=lambda prediction: prediction.price,
+        )
+        prices = np.round(
+            np.linspace(curve[0].price, curve[-1].price, n_price_points), 4
+        )
+        conversion_rates = np.interp(
+            prices,
+            [prediction.price for prediction in curve],
+            [prediction.conversion_rate for prediction in curve],
+        ) * rng.uniform(0.7, 1.3)
+        conversion_rate_curves.append(
+            ConversionRateCurve(
+                product_id=product_id,
+                curve=[
+                    Prediction(price=float(price), conversion_rate=float(rate))
+                    for price, rate in zip(prices, conversion_rates)
+                ],
+            )
+        )
+        inventories.append(
+            Inventory(product_id=product_id, inventory=rng.randint(10, 200))
+        )
+        market_sizes.append(
+            MarketSize(product_id=product_id, market_size=rng.randint(100, 1000))
+        )
+
+    total_inventory = sum(inventory.inventory for inventory in inventories)
+    return PricingOptimizerInput(
+        product_ids=product_ids,
+        conversion_rate_curves=conversion_rate_curves,
+        inventories=inventories,
+        market_sizes=market_sizes,
+        adhoc_ortools_constraints=[
+            f"sum(product_sales.values()) <= {int(0.6 * total_inventory)}"
+        ],
+    )
+
+
+def benchmark_model(
+    name: str, optimizer: PricingOptimizer, optim_input: PricingOptimizerInput
+) -> ModelBenchmark:
+    start_time = time.perf_counter()
+    optimizer.build_model(optim_input)
+    build_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    output = optimizer.solve()
+    solve_seconds = time.perf_counter() - start_time
+
+    variables = optimizer.solver.variables()
+    return ModelBenchmark(
+        model=name,
+        variables=len(variables),
+        integer_variables=sum(variable.integer() for variable in variables),
+        constraints=optimizer.solver.NumConstraints(),
+        build_seconds=build_seconds,
+        solve_seconds=solve_seconds,
+        total_revenue=output.total_revenue,
+    )
+
+
+def run_benchmark(
+    optim_input: PricingOptimizerInput, n_segments: list[int] = [4, 8, 16]
+) -> list[ModelBenchmark]:
+    """
+    Solve the same catalog with the enumerated price points model (with and without presolve) and
+    with the piecewise-linear model for each number of segments.
+
+    NOTE: The knapsack is disabled for the enumerated price points model, the benchmark compares
+     the MIP models (the coupling constraint would otherwise be solved by the dynamic program).
+    """
+    results = [
+        benchmark_model(
+            "discrete",
+            PricingOptimizer(verbose=False, presolve=False, knapsack=False),
+            optim_input,
+        ),
+        benchmark_model(
+            "discrete+presolve",
+            PricingOptimizer(verbose=False, presolve=True, knapsack=False),
+            optim_input,
+        ),
+    ]
+    for segments in n_segments:
+        results.append(
+            benchmark_model(
+                f"piecewise-linear[{segments}]",
+                PiecewiseLinearPricingOptimizer(n_segments=segments, verbose=False),
+                optim_input,
+            )
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Piecewise-linear vs enumerated price points model"
+    )
+    parser.add_argument("--products", type=int, default=60)
+    parser.add_argument("--price-points", type=int, default=200)
+    parser.add_argument("--segments", type=int, nargs="+", default=[4, 8, 16])
+    args = parser.parse_args()
+
+    logging.getLogger("optimaizer").setLevel(logging.WARNING)
+    optim_input = dense_pricing_parameters(args.products, args.price_points)
+    results = run_benchmark(optim_input, args.segments)
+
+    print(
+        f"{'model':<22}{'variables':>10}{'integer':>10}{'constraints':>12}"
+        f"{'build (s)':>11}{'solve (s)':>11}{'revenue':>12}"
+    )
+    for result in results:
+        print(
+            f"{result.model:<22}{result.variables:>10}{result.integer_variables:>10}"
+            f"{result.constraints:>12}{result.build_seconds:>11.3f}"
+            f"{result.solve_seconds:>11.3f}{result.total_revenue:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
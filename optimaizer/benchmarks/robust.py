@@ -0,0 +1,83 @@
+# Benchmark of the robust (sample average) pricing mode against the number of demand scenarios.
+# To run the benchmark: `python -m optimaizer.benchmarks.robust --scenarios 100 1000 10000`
+import argparse
+import logging
+
+from optimaizer.benchmarks.piecewise_linear import dense_pricing_parameters
+from optimaizer.pricing_optimizer.robust import RobustPricingOptimizer
+from optimaizer.pricing_optimizer.types import (
+    DemandUncertainty,
+    RobustPricingInput,
+    RobustPricingOutput,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def robust_pricing_parameters(
+    n_products: int = 60,
+    n_price_points: int = 50,
+    market_size_cv: float = 0.3,
+    conversion_rate_cv: float = 0.1,
+) -> RobustPricingInput:
+    optim_input = dense_pricing_parameters(n_products, n_price_points)
+    return RobustPricingInput(
+        **optim_input.model_dump(),
+        uncertainties=[
+            DemandUncertainty(
+                product_id=product_id,
+                market_size_cv=market_size_cv,
+                conversion_rate_cv=conversion_rate_cv,
+            )
+            for product_id in optim_input.product_ids
+        ],
+    )
+
+
+def run_benchmark(
+    optim_input: RobustPricingInput, n_scenarios: list[int] = [100, 1000, 10000]
+) -> list[RobustPricingOutput]:
+    results = []
+    for scenarios in n_scenarios:
+        optimizer = RobustPricingOptimizer(n_scenarios=scenarios)
+        optimizer.build_model(optim_input)
+        results.append(optimizer.solve())
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Robust pricing under uncertain demand, by number of scenarios"
+    )
+    parser.add_argument("--products", type=int, default=60)
+    parser.add_argument("--price-points", type=int, default=50)
+    parser.add_argument("--market-size-cv", type=float, default=0.3)
+    parser.add_argument("--conversion-rate-cv", type=float, default=0.1)
+    parser.add_argument("--scenarios", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    logging.getLogger("optimaizer").setLevel(logging.WARNING)
+    optim_input = robust_pricing_parameters(
+        args.products,
+        args.price_points,
+        args.market_size_cv,
+        args.conversion_rate_cv,
+    )
+    results = run_benchmark(optim_input, args.scenarios)
+
+    print(
+        f"{'scenarios':>10}{'sampling (s)':>14}{'solve (s)':>11}{'expected':>12}"
+        f"{'nominal':>12}{'p5':>12}{'p50':>12}{'p95':>12}"
+    )
+    for result in results:
+        quantiles = result.revenue_quantiles
+        print(
+            f"{result.n_scenarios:>10}{result.sampling_seconds:>14.3f}"
+            f"{result.solve_seconds:>11.3f}{result.expected_revenue:>12.1f}"
+            f"{result.nominal_expected_revenue:>12.1f}{quantiles.get(0.05, float('nan')):>12.1f}"
+            f"{quantiles.get(0.5, float('nan')):>12.1f}{quantiles.get(0.95, float('nan')):>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, NamedTuple
+
+
+class StoredMessage(NamedTuple):
+    id: int
+    role: str
+    content: str
+    rating: int
+    # Structured tool results rendered along with the message (e.g. optimizer outputs)
+    results: list[dict[str, Any]]
+
+
+class ChatStore:
+    """
+    Server-side store of the chat transcripts (SQLite), so that the UI state only carries chat ids
+    and the visible messages instead of whole transcripts.
+
+    User messages are appended once complete. Bot messages are appended when their turn starts and
+    updated with the response (or a note when the turn is cancelled or fails), so that transcripts
+    always alternate user and bot messages. Ratings and regenerated content are also updated.
+    """
+
+    def __init__(self, path: str | Path = ":memory:") -> None:
+        # NOTE: Event handlers run in several threads, the connection is shared behind a lock
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS chats (
+                    id INTEGER PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY,
+                    chat_id INTEGER NOT NULL REFERENCES chats (id),
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    rating INTEGER NOT NULL DEFAULT 0,
+                    results TEXT NOT NULL DEFAULT '[]'
+                );
+                CREATE INDEX IF NOT EXISTS messages_chat_id ON messages (chat_id, id);
+                """
+            )
+
+    def create_chat(self, title: str) -> int:
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO chats (title, created_at) VALUES (?, ?)",
+                (title, time.time()),
+            )
+        return cursor.lastrowid
+
+    def append_message(
+        self,
+        chat_id: int,
+        role: str,
+        content: str,
+        results: list[dict[str, Any]] | None = None,
+    ) -> int:
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO messages (chat_id, role, content, results) VALUES (?, ?, ?, ?)",
+                (chat_id, role, content, json.dumps(results or [])),
+            )
+        return cursor.lastrowid
+
+    def update_content(
+        self,
+        message_id: int,
+        content: str,
+        results: list[dict[str, Any]] | None = None,
+    ) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE messages SET content = ?, results = ? WHERE id = ?",
+                (content, json.dumps(results or []), message_id),
+            )
+
+    def set_rating(self, message_id: int, rating: int) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE messages SET rating = ? WHERE id = ?", (rating, message_id)
+            )
+
+    def titles(self, chat_ids: list[int]) -> dict[int, str]:
+        if not chat_ids:
+            return {}
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT id, title FROM chats WHERE id IN ({','.join('?' * len(chat_ids))})",
+                chat_ids,
+            ).fetchall()
+        return dict(rows)
+
+    def last_messages(self, chat_id: int, limit: int) -> list[StoredMessage]:
+        """Last `limit` messages of the chat, in chronological order."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, role, content, rating, results FROM messages WHERE chat_id = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (chat_id, limit),
+            ).fetchall()
+        return [
+            StoredMessage(*row[:4], results=json.loads(row[4]))
+            for row in reversed(rows)
+        ]
+
+    def count_messages(self, chat_id: int) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM messages WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+        return count
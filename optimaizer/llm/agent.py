@@ -1,24 +1,68 @@
-from openai import OpenAI
+from openai.types.chat import ChatCompletion
 from openai.types.chat.chat_completion_message_tool_call import Function
-from optimaizer.llm.types import Tool
+from optimaizer.llm.transport import OpenAITransport, Transport
+from optimaizer.llm.types import Tool, TurnUsage
+from optimaizer.utils.cancellation import (
+    CancellationToken,
+    Cancelled,
+    current_token,
+)
+from optimaizer.utils.deadline import (
+    DeadlineExceeded,
+    deadline_scope,
+    remaining_seconds,
+)
 import json
+import time
 from pydantic import BaseModel
 
-import os
 from typing import Callable, Any
 from logging import getLogger
 
 logger = getLogger(__name__)
 
+# Instruction of the last LLM request of a turn which ran out of tool call rounds
+BUDGET_EXHAUSTED_INSTRUCTION = (
+    "The tool call budget of this turn is exhausted, no more tools can be called. Answer the user "
+    "now with the best answer you can give from the results obtained so far, and explain briefly "
+    "what could not be completed and how the user could proceed."
+)
+
 
 class OpenAIAgent:
-    def __init__(self, system_prompt: str | None) -> None:
-        self.__client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    """
+    Agent answering the user with the help of tools (one tool call per LLM response).
+
+    Each turn has a budget: at most `max_tool_rounds` tool calls and `turn_deadline_seconds` of
+    wall time (None for no limit). Once the tool calls are exhausted, the LLM is asked to answer
+    without tools. Once the deadline has passed, no more LLM requests or tool calls are made and
+    the turn answers with an explanation (and the last tool error, if any). The budget usage of
+    each turn is recorded in `turn_usages`.
+
+    NOTE: The deadline is passed down to the steps of the turn (`deadline_scope`): LLM requests
+     time out at the deadline, and tools such as `optimize_pricing` limit their solve to the time
+     left, so that a single round cannot overrun it.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str | None,
+        transport: Transport | None = None,
+        max_tool_rounds: int | None = 10,
+        turn_deadline_seconds: float | None = 120.0,
+    ) -> None:
+        self.__transport = transport or OpenAITransport()
         self._model = "gpt-4o-mini"
+        self.max_tool_rounds = max_tool_rounds
+        self.turn_deadline_seconds = turn_deadline_seconds
         self.conversation_history: list[dict[str, str]] = []
+        # Budget usage of each turn of the conversation
+        self.turn_usages: list[TurnUsage] = []
 
         self.tools: list[Tool] = []
         self.functions: dict[str, Callable] = {}
+        # Results of the successful tool calls of the last turn, e.g. for the UI to render them
+        self.tool_results: list[Any] = []
 
         if system_prompt:
             self.conversation_history.append(
@@ -39,14 +83,97 @@ class OpenAIAgent:
         return result
 
     def __call__(self, user_prompt: str) -> str:
+        # NOTE: A turn running under a cancellation token (`cancellation_scope`) stops at the next
+        #  LLM request or tool call once cancelled, and leaves the history as it was before the turn
+        token = current_token()
+        history_length = len(self.conversation_history)
+        usage = TurnUsage(
+            deadline_seconds=self.turn_deadline_seconds,
+            max_tool_rounds=self.max_tool_rounds,
+        )
+        start_time = time.perf_counter()
+        deadline = (
+            start_time + self.turn_deadline_seconds
+            if self.turn_deadline_seconds is not None
+            else None
+        )
+        try:
+            with deadline_scope(deadline):
+                return self._run_turn(user_prompt, token, usage, start_time)
+        except Cancelled:
+            usage.outcome = "cancelled"
+            del self.conversation_history[history_length:]
+            self.tool_results = []
+            logger.info("Turn cancelled")
+            raise
+        except Exception:
+            usage.outcome = "error"
+            raise
+        finally:
+            usage.elapsed_seconds = time.perf_counter() - start_time
+            self.turn_usages.append(usage)
+            logger.info(f"Turn usage: {usage.model_dump_json()}")
+
+    def _create_completion(self, usage: TurnUsage, **kwargs: Any) -> ChatCompletion:
+        # NOTE: A transport which queues requests (`ScheduledTransport`) sets the timeout again when
+        #  the request is sent, from the time left after its wait
+        remaining = remaining_seconds()
+        if remaining is not None:
+            kwargs["timeout"] = max(remaining, 0.0)
+        try:
+            response = self.__transport.create_completion(model=self._model, **kwargs)
+        except (Cancelled, DeadlineExceeded):
+            raise
+        except Exception as e:
+            # e.g. the request timed out at the deadline
+            remaining = remaining_seconds()
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceeded(
+                    "The LLM request did not complete in time"
+                ) from e
+            raise
+        usage.llm_requests += 1
+        if response.usage is not None:
+            usage.prompt_tokens += response.usage.prompt_tokens
+            usage.completion_tokens += response.usage.completion_tokens
+        return response
+
+    def _run_turn(
+        self,
+        user_prompt: str,
+        token: CancellationToken | None,
+        usage: TurnUsage,
+        start_time: float,
+    ) -> str:
         self.conversation_history.append({"role": "user", "content": user_prompt})
+        self.tool_results = []
+        # Tool and error of the last tool call, if it failed
+        last_tool_error: tuple[str, str] | None = None
 
         while True:
-            response = self.__client.chat.completions.create(
-                model=self._model,
-                messages=self.conversation_history,
-                tools=self.tools,
-            )
+            if token is not None:
+                token.raise_if_cancelled()
+            if (
+                self.turn_deadline_seconds is not None
+                and time.perf_counter() - start_time >= self.turn_deadline_seconds
+            ):
+                return self._deadline_answer(usage, last_tool_error)
+            if (
+                self.max_tool_rounds is not None
+                and usage.tool_rounds >= self.max_tool_rounds
+            ):
+                usage.outcome = "tool_rounds"
+                return self._answer_without_tools(usage, token, last_tool_error)
+
+            try:
+                response = self._create_completion(
+                    usage, messages=self.conversation_history, tools=self.tools
+                )
+            except DeadlineExceeded as e:
+                logger.warning(f"LLM request stopped at the turn deadline: {e}")
+                return self._deadline_answer(usage, last_tool_error)
+            if token is not None:
+                token.raise_if_cancelled()
             message = response.choices[0].message
 
             if message.tool_calls:
@@ -55,6 +182,7 @@ class OpenAIAgent:
                     logger.warning("Multiple function calls are not supported")
                     message.tool_calls = message.tool_calls[:1]
                 self.conversation_history.append(message)
+                usage.tool_rounds += 1
 
                 try:
                     result = self.call_function(
@@ -65,11 +193,17 @@ class OpenAIAgent:
                         if isinstance(result, BaseModel)
                         else str(result)
                     )
+                    self.tool_results.append(result)
+                    last_tool_error = None
 
+                except Cancelled:
+                    raise
                 except Exception as e:
                     serialized_result = str(e)
                     function = response.choices[0].message.tool_calls[0].function
                     logger.error(f"Error executing function ({function.name}): {e}")
+                    usage.tool_errors += 1
+                    last_tool_error = (function.name, serialized_result)
 
                 self.conversation_history.append(
                     {
@@ -84,3 +218,54 @@ class OpenAIAgent:
 
         self.conversation_history.append(message)
         return message.content
+
+    def _answer_without_tools(
+        self,
+        usage: TurnUsage,
+        token: CancellationToken | None,
+        last_tool_error: tuple[str, str] | None,
+    ) -> str:
+        # NOTE: The instruction is only sent with this request, it is not kept in the history
+        try:
+            response = self._create_completion(
+                usage,
+                messages=[
+                    *self.conversation_history,
+                    {"role": "system", "content": BUDGET_EXHAUSTED_INSTRUCTION},
+                ],
+                tools=self.tools,
+                tool_choice="none",
+            )
+        except DeadlineExceeded as e:
+            logger.warning(f"LLM request stopped at the turn deadline: {e}")
+            return self._deadline_answer(usage, last_tool_error)
+        if token is not None:
+            token.raise_if_cancelled()
+        message = response.choices[0].message
+        if message.tool_calls or not message.content:
+            return self._budget_exhausted_answer(
+                f"the limit of {self.max_tool_rounds} tool calls was reached",
+                last_tool_error,
+            )
+        self.conversation_history.append(message)
+        return message.content
+
+    def _deadline_answer(
+        self, usage: TurnUsage, last_tool_error: tuple[str, str] | None
+    ) -> str:
+        usage.outcome = "deadline"
+        return self._budget_exhausted_answer(
+            f"the time budget of {self.turn_deadline_seconds:g}s was exhausted",
+            last_tool_error,
+        )
+
+    def _budget_exhausted_answer(
+        self, reason: str, last_tool_error: tuple[str, str] | None
+    ) -> str:
+        answer = f"I could not complete your request: {reason}."
+        if last_tool_error is not None:
+            answer += f" The last call to {last_tool_error[0]} failed with: {last_tool_error[1]}"
+        answer += " Please simplify or rephrase your request and try again."
+        logger.warning(f"Turn budget exhausted: {reason}")
+        self.conversation_history.append({"role": "assistant", "content": answer})
+        return answer
@@ -0,0 +1,301 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, TypeVar
+
+import openai
+from openai.types.chat import ChatCompletion
+
+from optimaizer.llm.transport import Transport, _to_json
+from optimaizer.utils.cancellation import current_token
+from optimaizer.utils.deadline import DeadlineExceeded, remaining_seconds
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Errors worth retrying: rate limits, timeouts, connection errors and server errors
+_TRANSIENT_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+# Delay between two checks of the cancellation of a waiting request
+_WAIT_CHECK_INTERVAL_SECONDS = 0.1
+
+
+@dataclass
+class _Ticket:
+    session_id: str
+    tokens: int
+    queued_at: float = field(default_factory=time.perf_counter)
+    granted: threading.Event = field(default_factory=threading.Event)
+
+
+@dataclass
+class SchedulerMetrics:
+    requests_total: int = 0
+    retries_total: int = 0
+    rate_limited_total: int = 0
+    errors_total: int = 0
+    wait_seconds: deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+
+def _percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:  # e.g. an HTTP date, the backoff applies
+        pass
+    return None
+
+
+def estimate_tokens(request: dict[str, Any], completion_tokens: int) -> int:
+    """
+    Rough estimate of the tokens of a chat completion request (~4 characters per token for the
+    messages and tools), plus the tokens reserved for the completion.
+    """
+    prompt_characters = len(json.dumps(_to_json(request.get("messages", []))))
+    prompt_characters += len(json.dumps(_to_json(request.get("tools") or [])))
+    return prompt_characters // 4 + request.get("max_tokens", completion_tokens)
+
+
+class RequestScheduler:
+    """
+    Admission control of the LLM requests of all the agents of the process, to stay within the
+    rate limits of the provider instead of failing whole turns.
+
+    - At most `max_concurrent_requests` requests, totalling at most `max_concurrent_tokens`
+      (estimated) tokens, are in flight at once. A request larger than the token budget runs
+      alone.
+    - Waiting requests are queued per session and sessions are served in turns (round-robin), so
+      that a busy session cannot starve the others.
+    - Transient errors (429, timeouts, 5xx) are retried up to `max_retries` times with a full
+      jitter exponential backoff (at least the `Retry-After` of the response, at most
+      `max_backoff_seconds`). A rate limit also pauses the dispatch of all the queued requests
+      until the retry delay has passed.
+
+    NOTE: Requests waiting in the queue or for a retry stop when the cancellation token of their
+     turn is cancelled (`current_token`), and raise `DeadlineExceeded` when their turn would
+     overrun its deadline (`deadline_scope`): once the deadline has passed while queued, or when
+     the retry delay ends after it.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_requests: int = 8,
+        max_concurrent_tokens: int = 200_000,
+        max_retries: int = 5,
+        base_backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30.0,
+        completion_tokens: int = 1024,
+    ) -> None:
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_concurrent_tokens = max_concurrent_tokens
+        self.max_retries = max_retries
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        # Tokens reserved for the completion of requests without `max_tokens`
+        self.completion_tokens = completion_tokens
+        self._lock = threading.Lock()
+        # Waiting requests of each session, sessions in the order they are served
+        self._queues: OrderedDict[str, deque[_Ticket]] = OrderedDict()
+        self._in_flight_requests = 0
+        self._in_flight_tokens = 0
+        # No request is dispatched before this time (`time.monotonic`), after a rate limit
+        self._paused_until = 0.0
+        self.metrics = SchedulerMetrics()
+
+    def submit(self, session_id: str, tokens: int, fn: Callable[[], T]) -> T:
+        """
+        Run `fn` (an LLM request) once admitted, retrying it on transient errors.
+
+        Args:
+            session_id (str): Session of the request, for fair queuing.
+            tokens (int): Estimated tokens of the request (see `estimate_tokens`).
+            fn (Callable[[], T]): The request.
+
+        Returns:
+            T: The result of `fn`.
+        """
+        tokens = min(tokens, self.max_concurrent_tokens)
+        with self._lock:
+            self.metrics.requests_total += 1
+        for attempt in range(self.max_retries + 1):
+            ticket = self._acquire(session_id, tokens)
+            try:
+                return fn()
+            except _TRANSIENT_ERRORS as e:
+                retry_after = _retry_after_seconds(e)
+                delay = min(
+                    self.max_backoff_seconds,
+                    max(
+                        retry_after or 0.0,
+                        random.uniform(0, self.base_backoff_seconds * 2**attempt),
+                    ),
+                )
+                remaining = remaining_seconds()
+                with self._lock:
+                    if isinstance(e, openai.RateLimitError):
+                        self.metrics.rate_limited_total += 1
+                        self._paused_until = max(
+                            self._paused_until, time.monotonic() + delay
+                        )
+                    if attempt == self.max_retries:
+                        self.metrics.errors_total += 1
+                        raise
+                    if remaining is not None and delay >= remaining:
+                        self.metrics.errors_total += 1
+                        raise DeadlineExceeded(
+                            f"No time left to retry the LLM request after {type(e).__name__}"
+                        ) from e
+                    self.metrics.retries_total += 1
+                logger.warning(
+                    f"LLM request of session {session_id} failed ({type(e).__name__}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                )
+            except Exception:
+                with self._lock:
+                    self.metrics.errors_total += 1
+                raise
+            finally:
+                self._release(ticket)
+            self._sleep(delay)
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            wait_seconds = sorted(self.metrics.wait_seconds)
+            return {
+                "max_concurrent_requests": self.max_concurrent_requests,
+                "max_concurrent_tokens": self.max_concurrent_tokens,
+                "queue_depth": sum(len(queue) for queue in self._queues.values()),
+                "queued_sessions": len(self._queues),
+                "in_flight_requests": self._in_flight_requests,
+                "in_flight_tokens": self._in_flight_tokens,
+                "requests_total": self.metrics.requests_total,
+                "retries_total": self.metrics.retries_total,
+                "rate_limited_total": self.metrics.rate_limited_total,
+                "errors_total": self.metrics.errors_total,
+                "p50_wait_seconds": _percentile(wait_seconds, 0.50),
+                "p95_wait_seconds": _percentile(wait_seconds, 0.95),
+                "p99_wait_seconds": _percentile(wait_seconds, 0.99),
+            }
+
+    def _acquire(self, session_id: str, tokens: int) -> _Ticket:
+        ticket = _Ticket(session_id=session_id, tokens=tokens)
+        with self._lock:
+            self._queues.setdefault(session_id, deque()).append(ticket)
+            self._dispatch()
+        token = current_token()
+        while not ticket.granted.wait(_WAIT_CHECK_INTERVAL_SECONDS):
+            with self._lock:
+                if ticket.granted.is_set():
+                    break
+                cancelled = token is not None and token.cancelled
+                remaining = remaining_seconds()
+                if cancelled or (remaining is not None and remaining <= 0):
+                    self._queues[session_id].remove(ticket)
+                    if not self._queues[session_id]:
+                        del self._queues[session_id]
+                    if cancelled:
+                        token.raise_if_cancelled()
+                    self.metrics.errors_total += 1
+                    raise DeadlineExceeded(
+                        "Deadline passed while the LLM request was queued"
+                    )
+                # Dispatch resumes once a rate limit pause is over
+                self._dispatch()
+        wait_seconds = time.perf_counter() - ticket.queued_at
+        with self._lock:
+            self.metrics.wait_seconds.append(wait_seconds)
+        logger.debug(f"LLM request of session {session_id} waited {wait_seconds:.3f}s")
+        return ticket
+
+    def _release(self, ticket: _Ticket) -> None:
+        with self._lock:
+            self._in_flight_requests -= 1
+            self._in_flight_tokens -= ticket.tokens
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        # NOTE: Called with the lock held. Requests are granted in round-robin order of the
+        #  sessions, the next request waits (instead of being skipped) when it exceeds the
+        #  remaining token budget, so that large requests are not starved by small ones.
+        if time.monotonic() < self._paused_until:
+            return
+        while self._queues and self._in_flight_requests < self.max_concurrent_requests:
+            session_id, queue = next(iter(self._queues.items()))
+            ticket = queue[0]
+            if (
+                self._in_flight_requests
+                and self._in_flight_tokens + ticket.tokens > self.max_concurrent_tokens
+            ):
+                return
+            queue.popleft()
+            if queue:
+                self._queues.move_to_end(session_id)
+            else:
+                del self._queues[session_id]
+            self._in_flight_requests += 1
+            self._in_flight_tokens += ticket.tokens
+            ticket.granted.set()
+
+    def _sleep(self, seconds: float) -> None:
+        token = current_token()
+        deadline = time.monotonic() + seconds
+        while (remaining := deadline - time.monotonic()) > 0:
+            if token is not None:
+                token.raise_if_cancelled()
+            time.sleep(min(remaining, _WAIT_CHECK_INTERVAL_SECONDS))
+
+
+class ScheduledTransport:
+    """
+    Sends the requests of a session through a shared `RequestScheduler`.
+
+    NOTE: Retries are done by the scheduler, the OpenAI client of the wrapped transport should not
+     retry itself (`OpenAI(max_retries=0)`).
+
+    NOTE: Within a deadline (`deadline_scope`), the timeout of the request is the time left when it
+     is sent (each attempt), after its wait in the queue.
+    """
+
+    def __init__(
+        self, transport: Transport, scheduler: RequestScheduler, session_id: str
+    ) -> None:
+        self.transport = transport
+        self.scheduler = scheduler
+        self.session_id = session_id
+
+    def create_completion(self, **kwargs: Any) -> ChatCompletion:
+        def send() -> ChatCompletion:
+            remaining = remaining_seconds()
+            if remaining is None:
+                return self.transport.create_completion(**kwargs)
+            if remaining <= 0:
+                raise DeadlineExceeded(
+                    "Deadline passed before the LLM request was sent"
+                )
+            return self.transport.create_completion(**{**kwargs, "timeout": remaining})
+
+        return self.scheduler.submit(
+            self.session_id,
+            estimate_tokens(kwargs, self.scheduler.completion_tokens),
+            send,
+        )
@@ -0,0 +1,213 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def scripted_completion(messages: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Deterministic stand-in for the LLM which replays the tool-calling flow of the pricing agent:
+    fetch the default parameters, run the optimizer with them, then answer the user.
+
+    Args:
+        messages (list[dict[str, Any]]): The conversation sent to the chat completions endpoint.
+
+    Returns:
+        dict[str, Any]: The assistant message to return (either a tool call or a text answer).
+    """
+    last_message = messages[-1]
+
+    if last_message["role"] == "user":
+        return _tool_call_message("get_default_pricing_parameters", {})
+
+    if last_message["role"] == "tool":
+        tool_name = _last_tool_call_name(messages)
+        if tool_name == "get_default_pricing_parameters":
+            default_parameters = json.loads(last_message["content"])
+            return _tool_call_message(
+                "optimize_pricing",
+                {
+                    "product_ids": default_parameters["product_ids"],
+                    "inventories": default_parameters["inventories"],
+                    "market_sizes": default_parameters["market_sizes"],
+                    "adhoc_ortools_constraints": [],
+                },
+            )
+        return {
+            "role": "assistant",
+            "content": f"Here are the results of {tool_name}: {last_message['content']}",
+        }
+
+    return {"role": "assistant", "content": "How can I help you?"}
+
+
+def _tool_call_message(name: str, arguments: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            }
+        ],
+    }
+
+
+def _last_tool_call_name(messages: list[dict[str, Any]]) -> str | None:
+    for message in reversed(messages):
+        if message["role"] == "assistant" and message.get("tool_calls"):
+            return message["tool_calls"][-1]["function"]["name"]
+    return None
+
+
+class StubLLMServer:
+    """
+    Local OpenAI-compatible server (`POST /v1/chat/completions`) answering with `scripted_completion`.
+    Point an `OpenAI` client at `server.base_url` to exercise the agent without network access.
+
+    With `max_concurrent_requests`, requests beyond this number of concurrent requests are
+    rejected like a rate limited provider would: status 429 with a `retry-after-ms` header of
+    `retry_after_seconds`.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_seconds: float = 0.0,
+        max_concurrent_requests: int | None = None,
+        retry_after_seconds: float = 0.05,
+    ) -> None:
+        self.latency_seconds = latency_seconds
+        self.max_concurrent_requests = max_concurrent_requests
+        self.retry_after_seconds = retry_after_seconds
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Stub LLM server listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def completion(self, request: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            self.request_count += 1
+
+        message = scripted_completion(request["messages"])
+        prompt_tokens = sum(
+            len(str(m.get("content") or "")) // 4 for m in request["messages"]
+        )
+        completion_tokens = len(json.dumps(message)) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls"
+                    if message.get("tool_calls")
+                    else "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(
+                        404, {"error": {"message": f"Unknown path {self.path}"}}
+                    )
+                    return
+
+                content_length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(content_length))
+                with stub._lock:
+                    rate_limited = (
+                        stub.max_concurrent_requests is not None
+                        and stub._in_flight >= stub.max_concurrent_requests
+                    )
+                    if rate_limited:
+                        stub.rate_limited_count += 1
+                    else:
+                        stub._in_flight += 1
+                if rate_limited:
+                    self._send_json(
+                        429,
+                        {
+                            "error": {
+                                "message": "Rate limit reached",
+                                "type": "requests",
+                                "code": "rate_limit_exceeded",
+                            }
+                        },
+                        {"retry-after-ms": str(int(stub.retry_after_seconds * 1000))},
+                    )
+                    return
+                try:
+                    time.sleep(stub.latency_seconds)
+                    response = stub.completion(request)
+                finally:
+                    with stub._lock:
+                        stub._in_flight -= 1
+                self._send_json(200, response)
+
+            def _send_json(
+                self,
+                status: int,
+                body: dict[str, Any],
+                headers: dict[str, str] | None = None,
+            ) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug(f"Stub LLM server: {format % args}")
+
+        return Handler
@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Protocol
+
+from openai import OpenAI
+from openai.types.chat import ChatCompletion
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class Transport(Protocol):
+    """Sends chat completion requests on behalf of the agent."""
+
+    def create_completion(self, **kwargs: Any) -> ChatCompletion: ...
+
+
+class OpenAITransport:
+    def __init__(self, client: OpenAI | None = None) -> None:
+        self.client = client or OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    def create_completion(self, **kwargs: Any) -> ChatCompletion:
+        return self.client.chat.completions.create(**kwargs)
+
+
+class Exchange(BaseModel):
+    request: dict[str, Any]
+    response: dict[str, Any]
+    latency_seconds: float
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    return value
+
+
+class RecordingTransport:
+    """Forwards requests to another transport and records every exchange to a JSON fixture file."""
+
+    def __init__(self, transport: Transport, fixture_path: str | Path) -> None:
+        self.transport = transport
+        self.fixture_path = Path(fixture_path)
+        self.exchanges: list[Exchange] = []
+
+    def create_completion(self, **kwargs: Any) -> ChatCompletion:
+        start_time = time.perf_counter()
+        response = self.transport.create_completion(**kwargs)
+        # NOTE: Only the new message is kept, the history is already in the previous exchanges
+        messages = _to_json(kwargs["messages"])
+        self.exchanges.append(
+            Exchange(
+                request={
+                    "model": kwargs.get("model"),
+                    "roles": [message["role"] for message in messages],
+                    "last_message": messages[-1],
+                },
+                response=response.model_dump(mode="json"),
+                latency_seconds=time.perf_counter() - start_time,
+            )
+        )
+        # NOTE: The fixture is rewritten after each exchange so that a crash keeps what was recorded
+        self.fixture_path.parent.mkdir(parents=True, exist_ok=True)
+        self.fixture_path.write_text(
+            json.dumps([exchange.model_dump() for exchange in self.exchanges], indent=2)
+            + "\n"
+        )
+        return response
+
+
+class ReplayTransport:
+    """
+    Replays the exchanges of a fixture file in order, without any network access.
+
+    Latency is simulated with a fixed `latency_seconds` per request, or with the latency measured
+    at recording time when `replay_recorded_latency` is set.
+    """
+
+    def __init__(
+        self,
+        fixture_path: str | Path,
+        latency_seconds: float = 0.0,
+        replay_recorded_latency: bool = False,
+    ) -> None:
+        self.exchanges = [
+            Exchange.model_validate(exchange)
+            for exchange in json.loads(Path(fixture_path).read_text())
+        ]
+        self.latency_seconds = latency_seconds
+        self.replay_recorded_latency = replay_recorded_latency
+        self.cursor = 0
+
+    @property
+    def user_prompts(self) -> list[str]:
+        return [
+            exchange.request["last_message"]["content"]
+            for exchange in self.exchanges
+            if exchange.request["last_message"]["role"] == "user"
+        ]
+
+    def rewind(self) -> None:
+        self.cursor = 0
+
+    def create_completion(self, **kwargs: Any) -> ChatCompletion:
+        if self.cursor >= len(self.exchanges):
+            raise RuntimeError(
+                f"Replay fixture exhausted after {len(self.exchanges)} exchanges"
+            )
+        exchange = self.exchanges[self.cursor]
+        self.cursor += 1
+
+        # The conversation must follow the recorded one, otherwise the replayed answer is meaningless
+        roles = [message["role"] for message in _to_json(kwargs["messages"])]
+        recorded_roles = exchange.request["roles"]
+        if roles != recorded_roles:
+            raise RuntimeError(
+                f"Request {self.cursor - 1} diverges from the recording: "
+                f"roles {roles} != recorded roles {recorded_roles}"
+            )
+
+        time.sleep(
+            exchange.latency_seconds
+            if self.replay_recorded_latency
+            else self.latency_seconds
+        )
+        return ChatCompletion.model_validate(exchange.response)
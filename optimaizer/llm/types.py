@@ -61,3 +61,21 @@ class Tool(BaseModel):
                 strict=True,
             ),
         )
+
+
+class TurnUsage(BaseModel):
+    """Budget usage of an agent turn, recorded for latency SLA tracking."""
+
+    # "deadline" and "tool_rounds" when the budget ran out before the LLM answered by itself
+    outcome: Literal["answered", "deadline", "tool_rounds", "cancelled", "error"] = (
+        "answered"
+    )
+    elapsed_seconds: float = 0.0
+    llm_requests: int = 0
+    tool_rounds: int = 0
+    tool_errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Budget of the turn
+    deadline_seconds: float | None = None
+    max_tool_rounds: int | None = None
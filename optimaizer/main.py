@@ -1,10 +1,12 @@
 from dotenv import load_dotenv
 import logging
 from optimaizer.llm.agent import OpenAIAgent
+from optimaizer.llm.transport import Transport
 from optimaizer.pricing_optimizer.functions import (
     get_pricing_optimizer_code,
     optimize_pricing,
     get_default_pricing_parameters,
+    query_pricing_parameters,
 )
 
 from optimaizer.utils import logging_config  # noqa: F401
@@ -14,13 +16,23 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 
-def start_pricing_agent() -> OpenAIAgent:
+# NOTE: Only for front-ends rendering the results of `optimize_pricing` themselves (e.g. the app),
+#  writing the results back as a table is most of the output tokens (and latency) of a turn
+RENDERED_RESULTS_INSTRUCTION = """
+    8. The results of `optimize_pricing` are displayed to the user as a table and a chart. Do not repeat them (no table, no list of prices, revenues or sales): answer with a short commentary of at most 3 sentences with the key takeaways and the constraints applied.
+    """
+
+
+def start_pricing_agent(
+    transport: Transport | None = None, render_results: bool = False
+) -> OpenAIAgent:
     SYSTEM_PROMPT = """
     You are an AI-powered pricing optimizer tasked with determining the optimal pricing strategy for a range of products based on historical data, current inventory, and market conditions.
 
     You have access to specialized tools that allow you to:
 
         • Retrieve default data (supported products, current inventory, market size, etc.).
+        • Look up specific parameters of a few products (e.g. the current inventory of a product, or its conversion rates in a price range) without retrieving all the data.
         • Execute an OR model to compute optimal pricing with the given input parameters. It is also possible to inject custom constraints that will be executed at runtime.
         • Get the source code of the OR model to inspect its formulation. This is needed to know the syntax to inject a custom constraint into the OR model.
 
@@ -31,14 +43,21 @@ def start_pricing_agent() -> OpenAIAgent:
     4. When ready to conclude the interaction, provide a clear and concise summary of your pricing recommendations and the constraints applied.
     5. Base your decisions strictly on the data provided by the tools and follow a logical, step-by-step approach in optimizing the pricing strategy.
     6. If you need to inject a custom constraint, pay extra attention to the syntax provided in the source code of the OR model, and the variables in the namespace.
-    7. If a user asked you something that you cannot answer or this raises an error you cannot fix easily, provide an informative error message and suggest a way to proceed.
+    7. If a user asked you something that you cannot answer or this raises an error you cannot fix easily, provide an informative error message and suggest a way to proceed.{rendered_results_instruction}
 
     Your objective is to guide the user toward the best pricing strategy while adapting to dynamic constraints and new data inputs.
     """
 
-    agent = OpenAIAgent(system_prompt=SYSTEM_PROMPT)
+    SYSTEM_PROMPT = SYSTEM_PROMPT.format(
+        rendered_results_instruction=RENDERED_RESULTS_INSTRUCTION.rstrip()
+        if render_results
+        else ""
+    )
+
+    agent = OpenAIAgent(system_prompt=SYSTEM_PROMPT, transport=transport)
     agent.register_function(optimize_pricing)
     agent.register_function(get_default_pricing_parameters)
+    agent.register_function(query_pricing_parameters)
     agent.register_function(get_pricing_optimizer_code)
     return agent
 
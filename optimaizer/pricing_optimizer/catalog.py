@@ -0,0 +1,229 @@
+import bisect
+import logging
+import threading
+from typing import Callable
+
+from optimaizer.pricing_optimizer.curves import CurveInterner
+from optimaizer.pricing_optimizer.types import (
+    CatalogChange,
+    CatalogDelta,
+    ConversionRateCurve,
+    Inventory,
+    MarketSize,
+    Prediction,
+    PricingOptimizerInput,
+    ProductParameterField,
+    ProductParameters,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Catalog:
+    """
+    In-memory catalog of the products, updated in place by partial updates (deltas) from the feeds
+    instead of reloading all the data.
+
+    Each delta bumps the catalog version and stamps the changed products with it. Listeners are
+    notified of the changed products, so that caches only invalidate what depends on them.
+
+    Identical curves are interned (`CurveInterner`): they are stored once, shared by their products.
+
+    NOTE: Deltas only update known products, new products come with a full reload of the data.
+    """
+
+    def __init__(self, optim_input: PricingOptimizerInput) -> None:
+        self.version = 0
+        self._curve_interner = CurveInterner()
+        # Curves are sorted by price, to look up price ranges by bisection
+        sorted_curves: dict[int, list[Prediction]] = {}
+        self._curves = {}
+        for product_id, curve in optim_input.conversion_rate_curves_dict.items():
+            if id(curve) not in sorted_curves:
+                sorted_curves[id(curve)] = sorted(
+                    curve, key=lambda prediction: prediction.price
+                )
+            self._curves[product_id] = self._curve_interner.intern(
+                sorted_curves[id(curve)]
+            )
+        curve_prices: dict[int, list[float]] = {}
+        self._curve_prices = {}
+        for product_id, curve in self._curves.items():
+            if id(curve) not in curve_prices:
+                curve_prices[id(curve)] = [prediction.price for prediction in curve]
+            self._curve_prices[product_id] = curve_prices[id(curve)]
+        self._inventories = optim_input.inventories_dict
+        self._market_sizes = optim_input.market_sizes_dict
+        self._product_ids = list(optim_input.product_ids)
+        self._product_versions = dict.fromkeys(self._product_ids, 0)
+        self._listeners: list[Callable[[CatalogChange], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener: Callable[[CatalogChange], None]) -> None:
+        self._listeners.append(listener)
+
+    def product_versions(self, product_ids: list[str] | None = None) -> dict[str, int]:
+        """Version of the catalog in which each product last changed."""
+        with self._lock:
+            if product_ids is None:
+                return dict(self._product_versions)
+            return {
+                product_id: self._product_versions[product_id]
+                for product_id in product_ids
+            }
+
+    def snapshot(self) -> PricingOptimizerInput:
+        """Pricing optimizer input with the current data of all the products."""
+        # NOTE: The data was validated when loaded or applied, models are created without validation
+        with self._lock:
+            # Each distinct curve is copied once, products with identical curves keep sharing it
+            curve_copies: dict[int, list[Prediction]] = {}
+            for curve in self._curves.values():
+                if id(curve) not in curve_copies:
+                    curve_copies[id(curve)] = list(curve)
+            return PricingOptimizerInput.model_construct(
+                product_ids=list(self._product_ids),
+                conversion_rate_curves=[
+                    ConversionRateCurve.model_construct(
+                        product_id=product_id, curve=curve_copies[id(curve)]
+                    )
+                    for product_id, curve in self._curves.items()
+                ],
+                inventories=[
+                    Inventory.model_construct(
+                        product_id=product_id, inventory=inventory
+                    )
+                    for product_id, inventory in self._inventories.items()
+                ],
+                market_sizes=[
+                    MarketSize.model_construct(
+                        product_id=product_id, market_size=market_size
+                    )
+                    for product_id, market_size in self._market_sizes.items()
+                ],
+                adhoc_ortools_constraints=[],
+            )
+
+    def query(
+        self,
+        product_ids: list[str],
+        fields: list[ProductParameterField],
+        min_price: float | None = None,
+        max_price: float | None = None,
+    ) -> list[ProductParameters]:
+        """
+        Current parameters of some products, in time proportional to the returned data.
+
+        Args:
+            product_ids (list[str]): Products to look up.
+            fields (list[ProductParameterField]): Parameters to return.
+            min_price (float | None): Lowest price of the returned curve points.
+            max_price (float | None): Highest price of the returned curve points.
+
+        Returns:
+            list[ProductParameters]: The requested fields of each product.
+        """
+        unknown_product_ids = [
+            product_id
+            for product_id in product_ids
+            if product_id not in self._product_versions
+        ]
+        if unknown_product_ids:
+            raise ValueError(f"Unknown products: {unknown_product_ids}")
+
+        results = []
+        with self._lock:
+            for product_id in product_ids:
+                result = ProductParameters(product_id=product_id)
+                if "inventory" in fields:
+                    result.inventory = self._inventories[product_id]
+                if "market_size" in fields:
+                    result.market_size = self._market_sizes[product_id]
+                if "conversion_rate_curve" in fields:
+                    prices = self._curve_prices[product_id]
+                    start = (
+                        bisect.bisect_left(prices, min_price)
+                        if min_price is not None
+                        else 0
+                    )
+                    end = (
+                        bisect.bisect_right(prices, max_price)
+                        if max_price is not None
+                        else len(prices)
+                    )
+                    result.conversion_rate_curve = self._curves[product_id][start:end]
+                results.append(result)
+        return results
+
+    def apply_delta(self, delta: CatalogDelta) -> CatalogChange:
+        """
+        Apply a partial update. Values equal to the current ones are not counted as changes, since
+        the feeds resend unchanged rows.
+
+        Args:
+            delta (CatalogDelta): The updated inventories, market sizes and curve points.
+
+        Returns:
+            CatalogChange: The new version and the products that changed.
+        """
+        unknown_product_ids = {
+            row.product_id
+            for rows in (delta.inventories, delta.market_sizes, delta.curve_points)
+            for row in rows
+            if row.product_id not in self._product_versions
+        }
+        if unknown_product_ids:
+            raise ValueError(
+                f"Unknown products in delta: {sorted(unknown_product_ids)}"
+            )
+
+        with self._lock:
+            changed_product_ids = set()
+            for inventory in delta.inventories:
+                if self._inventories[inventory.product_id] != inventory.inventory:
+                    self._inventories[inventory.product_id] = inventory.inventory
+                    changed_product_ids.add(inventory.product_id)
+            for market_size in delta.market_sizes:
+                if (
+                    self._market_sizes[market_size.product_id]
+                    != market_size.market_size
+                ):
+                    self._market_sizes[market_size.product_id] = market_size.market_size
+                    changed_product_ids.add(market_size.product_id)
+
+            curve_product_ids = set()
+            for curve_points in delta.curve_points:
+                curve = {
+                    prediction.price: prediction
+                    for prediction in self._curves[curve_points.product_id]
+                }
+                new_curve = curve | {
+                    prediction.price: prediction for prediction in curve_points.curve
+                }
+                if new_curve != curve:
+                    self._curve_interner.release(self._curves[curve_points.product_id])
+                    self._curves[curve_points.product_id] = self._curve_interner.intern(
+                        [new_curve[price] for price in sorted(new_curve)]
+                    )
+                    self._curve_prices[curve_points.product_id] = sorted(new_curve)
+                    curve_product_ids.add(curve_points.product_id)
+            changed_product_ids |= curve_product_ids
+
+            if changed_product_ids:
+                self.version += 1
+                for product_id in changed_product_ids:
+                    self._product_versions[product_id] = self.version
+            change = CatalogChange(
+                version=self.version,
+                product_ids=sorted(changed_product_ids),
+                curve_product_ids=sorted(curve_product_ids),
+            )
+
+        if change.product_ids:
+            logger.info(
+                f"Catalog version {change.version}: {len(change.product_ids)} products "
+                f"changed ({len(change.curve_product_ids)} curves)"
+            )
+            for listener in self._listeners:
+                listener(change)
+        return change
@@ -0,0 +1,280 @@
+import numbers
+from collections.abc import Iterator, Mapping
+from typing import Any, Literal
+
+# Terms of a symbolic expression:
+#  • ("price" | "sales" | "revenue", product_id) for product_price/product_sales/product_revenue
+#  • ("x", product_id, price) for the boolean variables x
+Term = tuple[Any, ...]
+Sense = Literal["<=", ">=", "=="]
+
+
+class UnsupportedConstraintError(ValueError):
+    pass
+
+
+class SymbolicExpression:
+    """
+    Lightweight stand-in for the linear expressions of the OR model, so that ad-hoc constraints can
+    be analyzed without building the model.
+    """
+
+    def __init__(self, terms: dict[Term, float] | None = None, constant: float = 0.0):
+        self.terms = terms or {}
+        self.constant = constant
+
+    @staticmethod
+    def wrap(value: Any) -> "SymbolicExpression":
+        if isinstance(value, SymbolicExpression):
+            return value
+        if isinstance(value, numbers.Real) and not isinstance(value, bool):
+            return SymbolicExpression(constant=float(value))
+        raise UnsupportedConstraintError(
+            f"Unsupported operand of type {type(value).__name__} in constraint"
+        )
+
+    @property
+    def product_ids(self) -> set[str]:
+        return {term[1] for term in self.terms}
+
+    def __add__(self, other: Any) -> "SymbolicExpression":
+        other = SymbolicExpression.wrap(other)
+        terms = dict(self.terms)
+        for term, coefficient in other.terms.items():
+            terms[term] = terms.get(term, 0.0) + coefficient
+        return SymbolicExpression(terms, self.constant + other.constant)
+
+    def __radd__(self, other: Any) -> "SymbolicExpression":
+        return self + other
+
+    def __neg__(self) -> "SymbolicExpression":
+        return self * -1
+
+    def __sub__(self, other: Any) -> "SymbolicExpression":
+        return self + (-SymbolicExpression.wrap(other))
+
+    def __rsub__(self, other: Any) -> "SymbolicExpression":
+        return SymbolicExpression.wrap(other) - self
+
+    def __mul__(self, other: Any) -> "SymbolicExpression":
+        other = SymbolicExpression.wrap(other)
+        if self.terms and other.terms:
+            raise UnsupportedConstraintError(
+                "Non-linear expression: products of variables are not supported"
+            )
+        scalar, expression = (
+            (other.constant, self) if not other.terms else (self.constant, other)
+        )
+        return SymbolicExpression(
+            {term: c * scalar for term, c in expression.terms.items()},
+            expression.constant * scalar,
+        )
+
+    def __rmul__(self, other: Any) -> "SymbolicExpression":
+        return self * other
+
+    def __truediv__(self, other: Any) -> "SymbolicExpression":
+        other = SymbolicExpression.wrap(other)
+        if other.terms:
+            raise UnsupportedConstraintError(
+                "Non-linear expression: division by a variable is not supported"
+            )
+        return self * (1 / other.constant)
+
+    def __le__(self, other: Any) -> "SymbolicConstraint":
+        return SymbolicConstraint(self - other, "<=")
+
+    def __ge__(self, other: Any) -> "SymbolicConstraint":
+        return SymbolicConstraint(self - other, ">=")
+
+    def __eq__(self, other: Any) -> "SymbolicConstraint":  # type: ignore[override]
+        return SymbolicConstraint(self - other, "==")
+
+    def __lt__(self, other: Any) -> "SymbolicConstraint":
+        raise UnsupportedConstraintError(
+            "Strict inequalities (<) are not supported, use <= instead"
+        )
+
+    def __gt__(self, other: Any) -> "SymbolicConstraint":
+        raise UnsupportedConstraintError(
+            "Strict inequalities (>) are not supported, use >= instead"
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+class SymbolicConstraint:
+    """Linear constraint `expression <sense> 0`."""
+
+    def __init__(self, expression: SymbolicExpression, sense: Sense) -> None:
+        self.expression = expression
+        self.sense = sense
+
+    @property
+    def product_ids(self) -> set[str]:
+        return self.expression.product_ids
+
+    def __bool__(self) -> bool:
+        # NOTE: `a <= b <= c` evaluates `bool(a <= b)` and silently drops the first comparison
+        raise UnsupportedConstraintError(
+            "Chained comparisons are not supported, split them into separate constraints"
+        )
+
+
+class _SymbolicVariables(Mapping):
+    # Read-only dict of the symbolic variables of a field ("x" is keyed by (product_id, price), the
+    # others by product_id), each one built on first access: a catalog has millions of prices
+    def __init__(self, field: str, prices: dict[str, list[float]]) -> None:
+        self.field = field
+        self.prices = prices
+        self._expressions: dict[Any, SymbolicExpression] = {}
+
+    def __getitem__(self, key: Any) -> SymbolicExpression:
+        expression = self._expressions.get(key)
+        if expression is None:
+            if self.field == "x":
+                if not (
+                    isinstance(key, tuple)
+                    and len(key) == 2
+                    and key[0] in self.prices
+                    and key[1] in self.prices[key[0]]
+                ):
+                    raise KeyError(key)
+                term = ("x", *key)
+            else:
+                if key not in self.prices:
+                    raise KeyError(key)
+                term = (self.field, key)
+            expression = self._expressions[key] = SymbolicExpression({term: 1.0})
+        return expression
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.field != "x":
+            return iter(self.prices)
+        return (
+            (product_id, price)
+            for product_id, product_prices in self.prices.items()
+            for price in product_prices
+        )
+
+    def __len__(self) -> int:
+        if self.field != "x":
+            return len(self.prices)
+        return sum(len(product_prices) for product_prices in self.prices.values())
+
+
+def symbolic_namespace(
+    prices: dict[str, list[float]],
+) -> dict[str, Mapping[Any, SymbolicExpression]]:
+    """
+    Build symbolic stand-ins for the variables available to ad-hoc constraints. The expressions
+    are built when a constraint accesses them.
+
+    Args:
+        prices (dict[str, list[float]]): Candidate prices of each product.
+
+    Returns:
+        dict[str, Mapping[Any, SymbolicExpression]]: Symbolic x, product_price, product_sales and product_revenue.
+    """
+    return {
+        "x": _SymbolicVariables("x", prices),
+        **{
+            f"product_{field}": _SymbolicVariables(field, prices)
+            for field in ("price", "sales", "revenue")
+        },
+    }
+
+
+def parse_constraint(
+    constraint: str, namespace: dict[str, Mapping[Any, SymbolicExpression]]
+) -> SymbolicConstraint:
+    """
+    Evaluate an ad-hoc constraint against the symbolic namespace.
+
+    Raises:
+        UnsupportedConstraintError: If the constraint is not a single linear (in)equality.
+        KeyError: If the constraint references an unknown product (or price).
+    """
+    result = eval(constraint, dict(namespace))
+    if not isinstance(result, SymbolicConstraint):
+        raise UnsupportedConstraintError(
+            f"Expected a linear (in)equality, got {type(result).__name__}"
+        )
+    return result
+
+
+def parse_constraints(
+    constraints: list[str], prices: dict[str, list[float]]
+) -> list[SymbolicConstraint] | None:
+    """
+    Parse all the ad-hoc constraints, or return None if any of them cannot be analyzed
+    (in which case it might reference any product).
+    """
+    if not constraints:
+        return []
+    namespace = symbolic_namespace(prices)
+    try:
+        return [parse_constraint(constraint, namespace) for constraint in constraints]
+    except Exception:
+        return None
+
+
+class _SymbolicSolver:
+    # Stand-in for the `solver` available to ad-hoc constraints, limited to the expressions
+    @staticmethod
+    def Sum(expressions: list[Any]) -> SymbolicExpression:
+        return sum(expressions, SymbolicExpression())
+
+
+def validate_constraints(
+    constraints: list[str], prices: dict[str, list[float]]
+) -> list[str]:
+    """
+    Pre-flight check of the ad-hoc constraints against the symbolic namespace, before building the
+    model. Only errors which would make the injection fail (syntax errors, unknown names, products
+    or prices, non-linear expressions, strict inequalities) or silently drop part of the
+    constraint (chained comparisons) are reported. Constraints that cannot be analyzed
+    symbolically are left to the solver.
+
+    Args:
+        constraints (list[str]): The ad-hoc constraints.
+        prices (dict[str, list[float]]): Candidate prices of each product of the model.
+
+    Returns:
+        list[str]: One error message per invalid constraint (empty if all of them are valid).
+    """
+    if not constraints:
+        return []
+    namespace = {"solver": _SymbolicSolver(), **symbolic_namespace(prices)}
+    errors = []
+    for constraint in constraints:
+        try:
+            result = eval(compile(constraint, "<constraint>", "eval"), dict(namespace))
+            if isinstance(result, (SymbolicConstraint, bool)):
+                continue
+            error = f"expected a linear (in)equality, got {type(result).__name__}"
+        except UnsupportedConstraintError as e:
+            error = str(e)
+        except SyntaxError as e:
+            error = f"invalid syntax ({e.msg})"
+        except NameError as e:
+            error = f"{e}, the available names are {sorted(namespace)}"
+        except KeyError as e:
+            (key,) = e.args
+            # Keys are product IDs, or (product_id, price) for x
+            product_id = key[0] if isinstance(key, tuple) else key
+            if product_id in prices:
+                error = (
+                    f"unknown price {key[1]!r} of product {product_id!r} in x, "
+                    f"the candidate prices are {prices[product_id]}"
+                )
+            else:
+                error = (
+                    f"unknown product {product_id!r}, the products of the optimization "
+                    f"are {list(prices)}"
+                )
+        except Exception:
+            # Cannot be analyzed (e.g. other solver methods), the solver will tell
+            continue
+        errors.append(f"Invalid ad-hoc constraint `{constraint}`: {error}")
+    return errors
@@ -0,0 +1,57 @@
+from optimaizer.pricing_optimizer.types import Prediction
+
+# Content of a curve: its (price, conversion rate) points, in order
+CurveKey = tuple[tuple[float, float], ...]
+
+
+def curve_key(curve: list[Prediction]) -> CurveKey:
+    return tuple((prediction.price, prediction.conversion_rate) for prediction in curve)
+
+
+class CurveInterner:
+    """
+    Canonical instance of each distinct conversion rate curve, keyed by content.
+
+    Many products share the same curve (e.g. the sizes or colors of an item). Interned curves are
+    stored once and referenced by all their products, and computations on a curve can be shared
+    between products by identity (see `compute_price_points_by_product`).
+
+    Each product interning a curve holds a reference to it, curves are dropped once released by
+    all their products (e.g. when deltas replace them).
+
+    NOTE: Interned curves are shared, they must not be modified in place.
+    """
+
+    def __init__(self) -> None:
+        self._curves: dict[CurveKey, list[Prediction]] = {}
+        self._references: dict[CurveKey, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._curves)
+
+    def intern(self, curve: list[Prediction]) -> list[Prediction]:
+        return self._intern(curve_key(curve), curve)
+
+    def intern_points(self, points: CurveKey) -> list[Prediction]:
+        """Interned curve with these points, the predictions are only created for new curves."""
+        if points in self._curves:
+            return self._intern(points, self._curves[points])
+        return self._intern(
+            points,
+            [
+                Prediction.model_construct(price=price, conversion_rate=conversion_rate)
+                for price, conversion_rate in points
+            ],
+        )
+
+    def _intern(self, key: CurveKey, curve: list[Prediction]) -> list[Prediction]:
+        curve = self._curves.setdefault(key, curve)
+        self._references[key] = self._references.get(key, 0) + 1
+        return curve
+
+    def release(self, curve: list[Prediction]) -> None:
+        key = curve_key(curve)
+        self._references[key] -= 1
+        if not self._references[key]:
+            del self._curves[key]
+            del self._references[key]
@@ -0,0 +1,260 @@
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from optimaizer.pricing_optimizer.constraints import (
+    SymbolicConstraint,
+    parse_constraints,
+)
+from optimaizer.pricing_optimizer.knapsack import _best_point, _is_satisfied
+from optimaizer.pricing_optimizer.optimizer import (
+    InfeasibleProblemError,
+    PricingOptimizer,
+)
+from optimaizer.pricing_optimizer.presolve import compute_price_points_by_product
+from optimaizer.pricing_optimizer.types import (
+    PricePoint,
+    PricingOptimizerInput,
+    PricingOptimizerOutput,
+    ProductResult,
+    SolveStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def connected_components(
+    product_ids: list[str], constraints: list[SymbolicConstraint]
+) -> list[list[str]]:
+    """
+    Group the products linked (directly or not) by the constraints, with a union-find.
+
+    Returns:
+        list[list[str]]: The products of each component, in the order of `product_ids`.
+    """
+    parents = {product_id: product_id for product_id in product_ids}
+
+    def find(product_id: str) -> str:
+        while parents[product_id] != product_id:
+            parents[product_id] = parents[parents[product_id]]
+            product_id = parents[product_id]
+        return product_id
+
+    for constraint in constraints:
+        constraint_product_ids = sorted(constraint.product_ids)
+        for product_id in constraint_product_ids[1:]:
+            parents[find(product_id)] = find(constraint_product_ids[0])
+
+    components: dict[str, list[str]] = {}
+    for product_id in product_ids:
+        components.setdefault(find(product_id), []).append(product_id)
+    return list(components.values())
+
+
+def _solve_component(
+    optim_input: PricingOptimizerInput,
+    deadline: float | None,
+    remaining_components: int,
+) -> PricingOptimizerOutput:
+    # The component gets its share of the time left when it starts (`remaining_components` are
+    # still to be solved by the worker, this one included), the deadline is a `time.time` since
+    # components are solved in other processes
+    time_limit_seconds = None
+    if deadline is not None:
+        remaining_seconds = deadline - time.time()
+        if remaining_seconds <= 0:
+            raise TimeoutError(
+                "Time limit reached before all the components could be solved"
+            )
+        time_limit_seconds = remaining_seconds / remaining_components
+    optimizer = PricingOptimizer(verbose=False)
+    optimizer.build_model(optim_input)
+    return optimizer.solve(time_limit_seconds=time_limit_seconds)
+
+
+class DecomposedPricingOptimizer:
+    """
+    Split the catalog into the connected components of the ad-hoc constraints (products referenced
+    by a same constraint are connected) and solve each component independently.
+
+    Products without constraints are priced in closed form (best revenue), the other components
+    are solved with `PricingOptimizer`, in parallel processes when there are several of them. The
+    solutions are merged into a single output.
+
+    NOTE: Constraints that cannot be analyzed might reference any product, the catalog is then
+     solved as a single component.
+    """
+
+    def __init__(self, n_workers: int | None = None) -> None:
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.optim_input: PricingOptimizerInput | None = None
+        self.closed_form_solution: dict[str, PricePoint] = {}
+        self.subproblems: list[PricingOptimizerInput] = []
+
+    def build_model(self, optim_input: PricingOptimizerInput) -> None:
+        product_ids = optim_input.product_ids
+        curves = optim_input.conversion_rate_curves_dict
+        inventories = optim_input.inventories_dict
+        market_sizes = optim_input.market_sizes_dict
+        adhoc_ortools_constraints = optim_input.adhoc_ortools_constraints
+
+        constraints = parse_constraints(
+            adhoc_ortools_constraints,
+            {
+                product_id: [prediction.price for prediction in curves[product_id]]
+                for product_id in product_ids
+            },
+        )
+        if constraints is None:
+            logger.info("Constraints cannot be analyzed, the catalog is not decomposed")
+            components = [product_ids]
+            component_constraints = [adhoc_ortools_constraints]
+        else:
+            if any(
+                not constraint.product_ids
+                and not _is_satisfied(constraint.expression.constant, constraint)
+                for constraint in constraints
+            ):
+                raise InfeasibleProblemError(
+                    "Infeasible or unbounded optimization problem"
+                )
+
+            components = connected_components(product_ids, constraints)
+            component_indices = {
+                product_id: index
+                for index, component in enumerate(components)
+                for product_id in component
+            }
+            component_constraints = [[] for _ in components]
+            for constraint, parsed_constraint in zip(
+                adhoc_ortools_constraints, constraints
+            ):
+                if parsed_constraint.product_ids:
+                    product_id = next(iter(parsed_constraint.product_ids))
+                    component_constraints[component_indices[product_id]].append(
+                        constraint
+                    )
+
+        independent_product_ids = []
+        subproblems = []
+        for component, constraints_of_component in zip(
+            components, component_constraints
+        ):
+            if not constraints_of_component:
+                # A component without constraints is a single independent product
+                (product_id,) = component
+                independent_product_ids.append(product_id)
+                continue
+            component_product_ids = set(component)
+            subproblems.append(
+                PricingOptimizerInput.model_construct(
+                    product_ids=component,
+                    conversion_rate_curves=[
+                        curve
+                        for curve in optim_input.conversion_rate_curves
+                        if curve.product_id in component_product_ids
+                    ],
+                    inventories=[
+                        inventory
+                        for inventory in optim_input.inventories
+                        if inventory.product_id in component_product_ids
+                    ],
+                    market_sizes=[
+                        market_size
+                        for market_size in optim_input.market_sizes
+                        if market_size.product_id in component_product_ids
+                    ],
+                    adhoc_ortools_constraints=constraints_of_component,
+                )
+            )
+
+        # Independent products with the same curve, inventory and market size share their points
+        best_points: dict[int, PricePoint] = {}
+        closed_form_solution = {}
+        for product_id, points in compute_price_points_by_product(
+            independent_product_ids, curves, inventories, market_sizes
+        ).items():
+            if id(points) not in best_points:
+                best_points[id(points)] = _best_point(points)
+            closed_form_solution[product_id] = best_points[id(points)]
+
+        self.optim_input = optim_input
+        self.closed_form_solution = closed_form_solution
+        self.subproblems = subproblems
+        logger.info(
+            f"Decomposed {len(product_ids)} products into {len(subproblems)} constrained "
+            f"components (largest: {max((len(s.product_ids) for s in subproblems), default=0)}"
+            f" products) and {len(closed_form_solution)} independent products"
+        )
+
+    def solve(self, time_limit_seconds: float | None = None) -> PricingOptimizerOutput:
+        if self.optim_input is None:
+            raise RuntimeError("Model must be built before solving")
+
+        # NOTE: The time limit is shared by the components: each worker solves about
+        #  `len(subproblems) / n_workers` of them one after the other, a component gets its share
+        #  of the time left when it starts (so the time saved by the previous ones is reused)
+        n_workers = (
+            min(self.n_workers, len(self.subproblems))
+            if self.n_workers > 1 and len(self.subproblems) > 1
+            else 1
+        )
+        deadlines = [
+            time.time() + time_limit_seconds if time_limit_seconds is not None else None
+        ] * len(self.subproblems)
+        remaining_components = [
+            math.ceil((len(self.subproblems) - index) / n_workers)
+            for index in range(len(self.subproblems))
+        ]
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                outputs = list(
+                    executor.map(
+                        _solve_component,
+                        self.subproblems,
+                        deadlines,
+                        remaining_components,
+                        chunksize=max(1, len(self.subproblems) // (4 * n_workers)),
+                    )
+                )
+        else:
+            outputs = list(
+                map(
+                    _solve_component,
+                    self.subproblems,
+                    deadlines,
+                    remaining_components,
+                )
+            )
+
+        product_results = {
+            product_id: ProductResult(
+                product_id=product_id,
+                price=point.price,
+                revenue=point.revenue,
+                sales=point.sales,
+            )
+            for product_id, point in self.closed_form_solution.items()
+        }
+        for output in outputs:
+            for product_result in output.product_results:
+                product_results[product_result.product_id] = product_result
+
+        # Merged gap: the bound on the total revenue is the sum of the bounds of the components
+        merged_output = PricingOptimizerOutput(
+            product_results=[
+                product_results[product_id]
+                for product_id in self.optim_input.product_ids
+            ]
+        )
+        revenue_gap = sum(
+            output.optimality_gap * abs(output.total_revenue) for output in outputs
+        )
+        if any(output.status == SolveStatus.FEASIBLE for output in outputs):
+            merged_output.status = SolveStatus.FEASIBLE
+            merged_output.optimality_gap = revenue_gap / max(
+                abs(merged_output.total_revenue), 1e-9
+            )
+        return merged_output
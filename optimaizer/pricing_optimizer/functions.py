@@ -4,48 +4,152 @@ from optimaizer.pricing_optimizer.types import (
     Inventory,
     MarketSize,
     ConversionRateCurve,
-    Prediction,
+    ProductParameterField,
+    ProductParametersQueryResult,
 )
+from optimaizer.pricing_optimizer.catalog import Catalog
+from optimaizer.pricing_optimizer.constraints import validate_constraints
+from optimaizer.pricing_optimizer.curves import CurveInterner
 from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.workbook import WorkbookCache
+from optimaizer.utils.cancellation import current_token
+from optimaizer.utils.deadline import DeadlineExceeded, remaining_seconds
+from pydantic import TypeAdapter
 import pandas as pd
+from pathlib import Path
 import importlib.util
+import os
+import tempfile
+import threading
 
+_PRODUCT_IDS = TypeAdapter(list[str])
+_INVENTORIES = TypeAdapter(list[Inventory])
+_MARKET_SIZES = TypeAdapter(list[MarketSize])
+_ADHOC_ORTOOLS_CONSTRAINTS = TypeAdapter(list[str])
+# Default catalog, loaded once and then updated by deltas (`get_catalog().apply_delta`)
+_CATALOG: Catalog | None = None
+_CATALOG_LOCK = threading.Lock()
 
-def load_data_from_csv(dfs) -> PricingOptimizerInput:
-    product_ids = [*dfs["conversion_rate"]["product"].unique()]
 
-    conversion_rate_curves = [
-        ConversionRateCurve(
-            product_id=product_id,
-            curve=[
-                Prediction(price=row["price"], conversion_rate=row["conversion_rate"])
-                for _, row in dfs["conversion_rate"]
-                .loc[dfs["conversion_rate"]["product"] == product_id]
-                .iterrows()
-            ],
-        )
-        for product_id in product_ids
-    ]
+def _validated_columns(
+    df: pd.DataFrame, dtypes: dict[str, type], name: str
+) -> dict[str, list]:
+    # Bulk validation of a whole column, instead of one pydantic model per row
+    columns = {}
+    for column, dtype in dtypes.items():
+        if column not in df:
+            raise ValueError(f"Missing column '{column}' in {name} data")
+        values = df[column]
+        if values.isna().any():
+            raise ValueError(f"Missing values in column '{column}' of {name} data")
+        if dtype is str:
+            columns[column] = values.astype(str).tolist()
+            continue
+        values = pd.to_numeric(values, errors="raise")
+        if dtype is int and not (values % 1 == 0).all():
+            raise ValueError(f"Non-integer values in column '{column}' of {name} data")
+        columns[column] = values.astype(dtype).tolist()
+    return columns
 
-    inventories = [
-        Inventory(product_id=row["product"], inventory=row["inventory"])
-        for _, row in dfs["inventory"].iterrows()
-    ]
 
-    market_sizes = [
-        MarketSize(product_id=row["product"], market_size=row["market_size"])
-        for _, row in dfs["market_size"].iterrows()
+def load_data_from_csv(dfs) -> PricingOptimizerInput:
+    # NOTE: The data is validated once per column, the pydantic models are then created without
+    #  validation (`model_construct`). This is only meant for trusted data loaded by us, inputs
+    #  coming from the LLM or the API are always fully validated.
+    conversion_rates = _validated_columns(
+        dfs["conversion_rate"],
+        {"product": str, "price": float, "conversion_rate": float},
+        "conversion_rate",
+    )
+    points: dict[str, list[tuple[float, float]]] = {}
+    for product_id, price, conversion_rate in zip(
+        conversion_rates["product"],
+        conversion_rates["price"],
+        conversion_rates["conversion_rate"],
+    ):
+        points.setdefault(product_id, []).append((price, conversion_rate))
+    # Products with identical curves share a single list of predictions
+    curve_interner = CurveInterner()
+    curves = {
+        product_id: curve_interner.intern_points(tuple(product_points))
+        for product_id, product_points in points.items()
+    }
+    conversion_rate_curves = [
+        ConversionRateCurve.model_construct(product_id=product_id, curve=curve)
+        for product_id, curve in curves.items()
     ]
 
-    pricing_optimizer_input = PricingOptimizerInput(
-        product_ids=product_ids,
+    inventories = _validated_columns(
+        dfs["inventory"], {"product": str, "inventory": int}, "inventory"
+    )
+    market_sizes = _validated_columns(
+        dfs["market_size"], {"product": str, "market_size": int}, "market_size"
+    )
+
+    pricing_optimizer_input = PricingOptimizerInput.model_construct(
+        product_ids=[*curves],
         conversion_rate_curves=conversion_rate_curves,
-        inventories=inventories,
-        market_sizes=market_sizes,
+        inventories=[
+            Inventory.model_construct(product_id=product_id, inventory=inventory)
+            for product_id, inventory in zip(
+                inventories["product"], inventories["inventory"]
+            )
+        ],
+        market_sizes=[
+            MarketSize.model_construct(product_id=product_id, market_size=market_size)
+            for product_id, market_size in zip(
+                market_sizes["product"], market_sizes["market_size"]
+            )
+        ],
+        adhoc_ortools_constraints=[],
     )
     return pricing_optimizer_input
 
 
+def load_data_from_workbook(
+    path: str | Path, cache_dir: str | Path
+) -> PricingOptimizerInput:
+    """
+    Load pricing parameters from the conversion_rate, inventory and market_size sheets of an Excel
+    workbook. Parsed sheets are cached in `cache_dir`, only the sheets changed since the last load
+    are parsed again (see `WorkbookCache`).
+
+    Args:
+        path (str | Path): Path of the workbook (.xlsx).
+        cache_dir (str | Path): Directory of the parsed sheets.
+
+    Returns:
+        PricingOptimizerInput: The pricing input parameters.
+    """
+    return load_data_from_csv(WorkbookCache(cache_dir).load(path))
+
+
+def get_catalog() -> Catalog:
+    """
+    In-memory catalog of the default pricing parameters, loaded on first use: from the workbook
+    `OPTIMAIZER_WORKBOOK_PATH` if set (cached in `OPTIMAIZER_WORKBOOK_CACHE_DIR`), otherwise from
+    the CSV files of the data directory.
+    """
+    global _CATALOG
+    with _CATALOG_LOCK:
+        if _CATALOG is None:
+            workbook_path = os.getenv("OPTIMAIZER_WORKBOOK_PATH")
+            if workbook_path:
+                optim_input = load_data_from_workbook(
+                    workbook_path,
+                    os.getenv("OPTIMAIZER_WORKBOOK_CACHE_DIR")
+                    or Path(tempfile.gettempdir()) / "optimaizer_workbook_cache",
+                )
+            else:
+                from data import DATA_PATH
+
+                csvs = [file for file in DATA_PATH.iterdir() if file.suffix == ".csv"]
+                dfs = {file.stem: pd.read_csv(file) for file in csvs}
+                optim_input = load_data_from_csv(dfs)
+            _CATALOG = Catalog(optim_input)
+        return _CATALOG
+
+
 def get_default_pricing_parameters() -> PricingOptimizerInput:
     """
     Load default pricing parameters from a static data storage.
@@ -53,12 +157,31 @@ def get_default_pricing_parameters() -> PricingOptimizerInput:
     Returns:
         PricingOptimizerInput: The default pricing input parameters.
     """
-    from data import DATA_PATH
+    return get_catalog().snapshot()
 
-    csvs = [file for file in DATA_PATH.iterdir() if file.suffix == ".csv"]
-    dfs = {file.stem: pd.read_csv(file) for file in csvs}
-    pricing_optimizer_input = load_data_from_csv(dfs)
-    return pricing_optimizer_input
+
+def query_pricing_parameters(
+    product_ids: list[str],
+    fields: list[ProductParameterField],
+    min_price: float | None,
+    max_price: float | None,
+) -> ProductParametersQueryResult:
+    """
+    Look up the current inventory, market size and/or conversion rate curve of specific products.
+    Prefer this tool over `get_default_pricing_parameters` to answer questions about a few products or parameters.
+
+    Args:
+        product_ids (list[str]): List of product ids to look up
+        fields (list[str]): Parameters to return for each product: "inventory", "market_size" and/or "conversion_rate_curve"
+        min_price (float | None): Only return the points of the conversion rate curves with a price greater or equal to this price (null for no lower bound)
+        max_price (float | None): Only return the points of the conversion rate curves with a price lower or equal to this price (null for no upper bound)
+
+    Returns:
+        ProductParametersQueryResult: The requested parameters of each product.
+    """
+    return ProductParametersQueryResult(
+        products=get_catalog().query(product_ids, fields, min_price, max_price)
+    )
 
 
 def get_pricing_optimizer_code() -> str:
@@ -106,13 +229,50 @@ def optimize_pricing(
     """
     pricing_optimizer_input = get_default_pricing_parameters()
 
-    pricing_optimizer_input = PricingOptimizerInput(
-        product_ids=product_ids,
-        inventories=inventories,
-        market_sizes=market_sizes,
+    # NOTE: Only the arguments (coming from the LLM) are validated, the conversion rate curves
+    #  were already validated by the loader
+    pricing_optimizer_input = PricingOptimizerInput.model_construct(
+        product_ids=_PRODUCT_IDS.validate_python(product_ids),
+        inventories=_INVENTORIES.validate_python(inventories),
+        market_sizes=_MARKET_SIZES.validate_python(market_sizes),
         conversion_rate_curves=pricing_optimizer_input.conversion_rate_curves,
-        adhoc_ortools_constraints=adhoc_ortools_constraints,
+        adhoc_ortools_constraints=_ADHOC_ORTOOLS_CONSTRAINTS.validate_python(
+            adhoc_ortools_constraints
+        ),
     )
+    # Invalid constraints are reported before building the model (which would fail when injecting
+    # them), with all the errors at once
+    curves = pricing_optimizer_input.conversion_rate_curves_dict
+    errors = validate_constraints(
+        pricing_optimizer_input.adhoc_ortools_constraints,
+        {
+            product_id: [prediction.price for prediction in curves[product_id]]
+            for product_id in pricing_optimizer_input.product_ids
+            if product_id in curves
+        },
+    )
+    if errors:
+        raise ValueError("\n".join(errors))
+
     optimizer = PricingOptimizer()
     optimizer.build_model(pricing_optimizer_input)
-    return optimizer.solve()
+    solve_kwargs = {}
+    # The solve is limited to the time left before the deadline of the turn, if any (the solution
+    # found by then is returned, with its optimality gap)
+    remaining = remaining_seconds()
+    if remaining is not None:
+        if remaining <= 0:
+            raise DeadlineExceeded(
+                "No time left in this turn to run the pricing optimizer"
+            )
+        solve_kwargs["time_limit_seconds"] = remaining
+    # NOTE: The solver cannot be interrupted, a cancelled turn stops before the solve or right
+    #  after it (the solve is capped by the deadline of the turn). Solving in time slices to check
+    #  the cancellation would restart the search of CBC at every slice.
+    token = current_token()
+    if token is not None:
+        token.raise_if_cancelled()
+    output = optimizer.solve(**solve_kwargs)
+    if token is not None:
+        token.raise_if_cancelled()
+    return output
@@ -0,0 +1,246 @@
+import logging
+import numpy as np
+
+from optimaizer.pricing_optimizer.constraints import SymbolicConstraint
+from optimaizer.pricing_optimizer.presolve import _constraint_contribution
+from optimaizer.pricing_optimizer.types import PricePoint
+
+logger = logging.getLogger(__name__)
+
+TOLERANCE = 1e-9
+
+
+def _is_satisfied(value: float, constraint: SymbolicConstraint) -> bool:
+    if constraint.sense == "<=":
+        return value <= TOLERANCE
+    if constraint.sense == ">=":
+        return value >= -TOLERANCE
+    return abs(value) <= TOLERANCE
+
+
+def _best_point(points: list[PricePoint]) -> PricePoint:
+    # Ties are broken towards the highest price, which keeps the most inventory
+    return max(points, key=lambda point: (point.revenue, point.price))
+
+
+def solve_multiple_choice_knapsack(
+    price_points: dict[str, list[PricePoint]],
+    constraints: list[SymbolicConstraint] | None,
+    max_states: int = 200_000,
+) -> dict[str, PricePoint] | None:
+    """
+    Solve the pricing problem without the MIP when the ad-hoc constraints have a knapsack structure:
+    at most one inequality coupling several products through `product_sales` / `product_revenue`,
+    all the other constraints involving a single product.
+
+    Single-product constraints filter the price points of their product. The coupling constraint
+    makes the problem a multiple-choice knapsack (one price per product, one shared budget), solved
+    exactly with a dynamic program over the Pareto front of (budget used, revenue).
+
+    Args:
+        price_points (dict[str, list[PricePoint]]): Candidate price points of each product.
+        constraints (list[SymbolicConstraint] | None): Ad-hoc constraints of the model, parsed by
+            `parse_constraints` (None if they cannot be analyzed).
+        max_states (int): Give up when the Pareto front grows beyond this size.
+
+    Returns:
+        dict[str, PricePoint] | None: The optimal price point of each product, or None if the
+            constraints do not have this structure (or the problem is infeasible), in which case the
+            MIP must be solved instead.
+    """
+    if constraints is None:
+        return None
+
+    coupling_constraints = [c for c in constraints if len(c.product_ids) > 1]
+    if len(coupling_constraints) > 1:
+        return None
+    coupling_constraint = coupling_constraints[0] if coupling_constraints else None
+    if coupling_constraint is not None and (
+        coupling_constraint.sense == "=="
+        or any(
+            term[0] not in {"sales", "revenue"}
+            for term in coupling_constraint.expression.terms
+        )
+    ):
+        return None
+
+    feasible_points = {}
+    for product_id, points in price_points.items():
+        product_constraints = [c for c in constraints if c.product_ids == {product_id}]
+        feasible_points[product_id] = [
+            point
+            for point in points
+            if all(
+                _is_satisfied(
+                    _constraint_contribution(c, product_id, point)
+                    + c.expression.constant,
+                    c,
+                )
+                for c in product_constraints
+            )
+        ]
+        if not feasible_points[product_id]:
+            return None
+    if any(
+        not c.product_ids and not _is_satisfied(c.expression.constant, c)
+        for c in constraints
+    ):
+        return None
+
+    solution = {
+        product_id: _best_point(points)
+        for product_id, points in feasible_points.items()
+    }
+    if coupling_constraint is None:
+        return solution
+
+    # Budget used by each price point, oriented such that sum(weights) <= capacity
+    sign = 1.0 if coupling_constraint.sense == "<=" else -1.0
+    capacity = -sign * coupling_constraint.expression.constant
+    items = {}
+    for product_id in sorted(coupling_constraint.product_ids):
+        points = feasible_points[product_id]
+        weights = np.array(
+            [
+                sign * _constraint_contribution(coupling_constraint, product_id, point)
+                for point in points
+            ]
+        )
+        # NOTE: Weights are shifted to be non-negative, so that partial solutions exceeding the
+        #  capacity can be discarded early
+        capacity -= weights.min()
+        order = np.argsort(weights, kind="stable")
+        items[product_id] = (
+            [points[i] for i in order],
+            weights[order] - weights.min(),
+            np.array([points[i].revenue for i in order]),
+        )
+    if capacity < -TOLERANCE:
+        return None
+
+    selection = _solve_knapsack_dp(list(items.values()), capacity, max_states)
+    if selection is None:
+        return None
+    for product_id, selected_point in zip(items, selection):
+        solution[product_id] = items[product_id][0][selected_point]
+    logger.info(f"Solved as a multiple-choice knapsack over {len(items)} products")
+    return solution
+
+
+def _lagrangian_multiplier(
+    weights: np.ndarray, revenues: np.ndarray, capacity: float
+) -> float:
+    """
+    Smallest multiplier of the budget (up to the bisection precision) for which picking the best
+    `revenue - multiplier * weight` of each product fits in the capacity.
+    """
+
+    def used_capacity(multiplier: float) -> float:
+        choices = np.argmax(revenues - multiplier * weights, axis=1)
+        return np.take_along_axis(weights, choices[:, None], axis=1).sum()
+
+    if used_capacity(0.0) <= capacity + TOLERANCE:
+        return 0.0
+    finite_revenues = np.where(np.isfinite(revenues), revenues, np.nan)
+    revenue_range = np.nanmax(finite_revenues) - np.nanmin(finite_revenues)
+    positive_weights = weights[(weights > TOLERANCE) & np.isfinite(revenues)]
+    lower, upper = 0.0, 1.0 + revenue_range / positive_weights.min()
+    for _ in range(60):
+        middle = (lower + upper) / 2
+        if used_capacity(middle) <= capacity + TOLERANCE:
+            upper = middle
+        else:
+            lower = middle
+    return upper
+
+
+def _fill_remaining_capacity(
+    weights: np.ndarray,
+    revenues: np.ndarray,
+    capacity: float,
+    choices: np.ndarray,
+) -> tuple[float, np.ndarray]:
+    # Greedy repair of a feasible solution: the unused capacity is spent on the best revenue
+    # increase available, one product at a time
+    choices = choices.copy()
+    rows = np.arange(len(choices))
+    slack = capacity - weights[rows, choices].sum()
+    while True:
+        gains = revenues - revenues[rows, choices][:, None]
+        extra_weights = weights - weights[rows, choices][:, None]
+        gains[extra_weights > slack + TOLERANCE] = -np.inf
+        product, point = np.unravel_index(np.argmax(gains), gains.shape)
+        if gains[product, point] <= TOLERANCE:
+            return revenues[rows, choices].sum(), choices
+        slack -= extra_weights[product, point]
+        choices[product] = point
+
+
+def _solve_knapsack_dp(
+    items: list[tuple[list[PricePoint], np.ndarray, np.ndarray]],
+    capacity: float,
+    max_states: int,
+) -> list[int] | None:
+    # Items of all products in padded arrays, padding points can never be selected
+    n_points = max(len(points) for points, _, _ in items)
+    weights = np.zeros((len(items), n_points))
+    revenues = np.full((len(items), n_points), -np.inf)
+    for i, (points, product_weights, product_revenues) in enumerate(items):
+        weights[i, : len(points)] = product_weights
+        revenues[i, : len(points)] = product_revenues
+
+    # Lagrangian relaxation of the budget: its solution is feasible (lower bound) and
+    # revenue + multiplier * (capacity - weight) is an upper bound for any partial solution
+    multiplier = _lagrangian_multiplier(weights, revenues, capacity)
+    scores = revenues - multiplier * weights
+    lagrangian_choices = np.argmax(scores, axis=1)
+    lower_bound, lagrangian_choices = _fill_remaining_capacity(
+        weights, revenues, capacity, lagrangian_choices
+    )
+    remaining_upper_bounds = np.append(np.cumsum(scores.max(axis=1)[::-1])[::-1], 0.0)
+    if lower_bound >= remaining_upper_bounds[0] + multiplier * capacity - TOLERANCE:
+        return lagrangian_choices.tolist()
+
+    # Pareto front of the partial solutions: increasing weight and strictly increasing revenue
+    state_weights, state_revenues = np.zeros(1), np.zeros(1)
+    parents = []
+    for i, (points, product_weights, product_revenues) in enumerate(items):
+        candidate_weights = (state_weights[:, None] + product_weights[None, :]).ravel()
+        candidate_revenues = (
+            state_revenues[:, None] + product_revenues[None, :]
+        ).ravel()
+        upper_bounds = (
+            candidate_revenues
+            + multiplier * (capacity - candidate_weights)
+            + remaining_upper_bounds[i + 1]
+        )
+        candidates = np.flatnonzero(
+            (candidate_weights <= capacity + TOLERANCE)
+            & (upper_bounds >= lower_bound - TOLERANCE)
+        )
+        candidates = candidates[
+            np.lexsort((-candidate_revenues[candidates], candidate_weights[candidates]))
+        ]
+        revenues_so_far = np.maximum.accumulate(candidate_revenues[candidates])
+        is_pareto = np.ones(candidates.size, dtype=bool)
+        is_pareto[1:] = (
+            candidate_revenues[candidates[1:]] > revenues_so_far[:-1] + TOLERANCE
+        )
+        candidates = candidates[is_pareto]
+        if candidates.size > max_states:
+            logger.info(
+                f"Knapsack skipped: more than {max_states} non-dominated partial solutions"
+            )
+            return None
+
+        state_weights = candidate_weights[candidates]
+        state_revenues = candidate_revenues[candidates]
+        parents.append(np.divmod(candidates, len(points)))
+
+    # The Lagrangian solution is always kept by the bounds, so the front cannot be empty
+    state = int(np.argmax(state_revenues))
+    selection = []
+    for parent_states, selected_points in reversed(parents):
+        selection.append(int(selected_points[state]))
+        state = int(parent_states[state])
+    return selection[::-1]
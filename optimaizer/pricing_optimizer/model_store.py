@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from ortools.linear_solver import linear_solver_pb2
+
+from optimaizer.pricing_optimizer.constraints import parse_constraints
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.presolve import compute_price_points_by_product
+from optimaizer.pricing_optimizer.types import PricingOptimizerInput
+
+logger = logging.getLogger(__name__)
+
+
+def _write_atomically(path: Path, content: bytes) -> None:
+    # NOTE: Several worker processes can share the store, readers must never see a partial file
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+        f.write(content)
+    os.replace(f.name, path)
+
+
+class ModelStore:
+    """
+    Directory of built models, to skip `build_model` on repeated runs over the same catalog.
+
+    Models are keyed by products, conversion rate curves and ad-hoc constraints. Each model is
+    stored as an OR-Tools `MPModelProto` (`<key>.pb`) with a JSON sidecar (`<key>.json`) mapping
+    the variable indices to (product_id, price) and recording the inventories and market sizes it
+    was built with.
+
+    Inventories and market sizes only change the objective coefficients, so they are patched in
+    the loaded model. The model is rebuilt when a changed product is referenced by an ad-hoc
+    constraint, since its sales and revenue also appear in the constraint rows.
+
+    NOTE: Stored models are built without presolve and without the knapsack engine, both depend on
+     the inventories.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(optim_input: PricingOptimizerInput) -> str:
+        content = json.dumps(
+            {
+                "product_ids": optim_input.product_ids,
+                "conversion_rate_curves": [
+                    curve.model_dump() for curve in optim_input.conversion_rate_curves
+                ],
+                "adhoc_ortools_constraints": optim_input.adhoc_ortools_constraints,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def load_or_build(
+        self, optim_input: PricingOptimizerInput, verbose: bool = False
+    ) -> PricingOptimizer:
+        """
+        Load the stored model of the catalog (patched with the current inventories and market
+        sizes), or build it and add it to the store.
+
+        Args:
+            optim_input (PricingOptimizerInput): The pricing optimizer input.
+            verbose (bool): Enable the solver output.
+
+        Returns:
+            PricingOptimizer: An optimizer with its model ready to solve.
+        """
+        optimizer = self.load(optim_input, verbose)
+        if optimizer is None:
+            optimizer = PricingOptimizer(
+                verbose=verbose, presolve=False, knapsack=False
+            )
+            optimizer.build_model(optim_input)
+            self.save(optimizer, optim_input)
+        return optimizer
+
+    def save(
+        self, optimizer: PricingOptimizer, optim_input: PricingOptimizerInput
+    ) -> None:
+        if optimizer.presolve or optimizer.knapsack:
+            raise ValueError(
+                "Only models built without presolve and knapsack can be stored"
+            )
+
+        constraints = parse_constraints(
+            optim_input.adhoc_ortools_constraints,
+            {
+                product_id: [point.price for point in points]
+                for product_id, points in optimizer.price_points.items()
+            },
+        )
+        x_keys = {variable.index(): key for key, variable in optimizer.x.items()}
+        model = linear_solver_pb2.MPModelProto()
+        optimizer.solver.ExportModelToProto(model)
+        sidecar = {
+            "x_keys": [x_keys[index] for index in range(len(x_keys))],
+            "inventories": optim_input.inventories_dict,
+            "market_sizes": optim_input.market_sizes_dict,
+            # None when the constraints cannot be analyzed: they might reference any product
+            "constrained_product_ids": sorted(
+                {
+                    product_id
+                    for constraint in constraints
+                    for product_id in constraint.product_ids
+                }
+            )
+            if constraints is not None
+            else None,
+        }
+
+        key = self.key(optim_input)
+        _write_atomically(self.directory / f"{key}.pb", model.SerializeToString())
+        _write_atomically(self.directory / f"{key}.json", json.dumps(sidecar).encode())
+        logger.info(f"Stored model {key} ({len(x_keys)} variables)")
+
+    def evict(self, product_ids: list[str]) -> int:
+        """
+        Delete the stored models involving any of the products. Models are keyed by curves, so
+        after a curve change they would never be loaded again.
+
+        Returns:
+            int: The number of deleted models.
+        """
+        product_ids = set(product_ids)
+        evicted = 0
+        for sidecar_path in self.directory.glob("*.json"):
+            try:
+                x_keys = json.loads(sidecar_path.read_text())["x_keys"]
+            except FileNotFoundError:
+                # Deleted concurrently by another worker
+                continue
+            if product_ids.isdisjoint(product_id for product_id, _ in x_keys):
+                continue
+            sidecar_path.with_suffix(".pb").unlink(missing_ok=True)
+            sidecar_path.unlink(missing_ok=True)
+            evicted += 1
+        if evicted:
+            logger.info(f"Evicted {evicted} stored models")
+        return evicted
+
+    def load(
+        self, optim_input: PricingOptimizerInput, verbose: bool = False
+    ) -> PricingOptimizer | None:
+        key = self.key(optim_input)
+        model_path = self.directory / f"{key}.pb"
+        sidecar_path = self.directory / f"{key}.json"
+        if not (model_path.exists() and sidecar_path.exists()):
+            return None
+
+        sidecar = json.loads(sidecar_path.read_text())
+        inventories = optim_input.inventories_dict
+        market_sizes = optim_input.market_sizes_dict
+        changed_product_ids = {
+            product_id
+            for product_id in optim_input.product_ids
+            if inventories[product_id] != sidecar["inventories"][product_id]
+            or market_sizes[product_id] != sidecar["market_sizes"][product_id]
+        }
+        constrained_product_ids = sidecar["constrained_product_ids"]
+        if changed_product_ids and (
+            constrained_product_ids is None
+            or changed_product_ids & set(constrained_product_ids)
+        ):
+            logger.info(f"Stored model {key} is stale: constrained products changed")
+            return None
+
+        model = linear_solver_pb2.MPModelProto()
+        model.ParseFromString(model_path.read_bytes())
+        price_points = compute_price_points_by_product(
+            optim_input.product_ids,
+            optim_input.conversion_rate_curves_dict,
+            inventories,
+            market_sizes,
+        )
+
+        # The objective coefficient of x[product_id, price] is the revenue at that price
+        revenues = {
+            (product_id, point.price): point.revenue
+            for product_id in changed_product_ids
+            for point in price_points[product_id]
+        }
+        x_keys = [tuple(x_key) for x_key in sidecar["x_keys"]]
+        if revenues:
+            for variable, x_key in zip(model.variable, x_keys):
+                if x_key in revenues:
+                    variable.objective_coefficient = revenues[x_key]
+
+        optimizer = PricingOptimizer(verbose=verbose, presolve=False, knapsack=False)
+        optimizer.load_model(model, x_keys, price_points)
+        logger.info(
+            f"Loaded stored model {key} ({len(changed_product_ids)} products patched)"
+        )
+        return optimizer
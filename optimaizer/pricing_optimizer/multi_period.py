@@ -0,0 +1,314 @@
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.types import (
+    Inventory,
+    LagrangianIteration,
+    MarketSize,
+    MultiPeriodPricingInput,
+    MultiPeriodPricingOutput,
+    MultiPeriodProductResult,
+    Prediction,
+    PricingOptimizerInput,
+)
+
+logger = logging.getLogger(__name__)
+
+# Subproblem inputs are shipped once to every worker process (see `_init_worker`),
+# each iteration then only sends the subproblem index and the Lagrange multipliers.
+_WORKER_SUBPROBLEMS: list[PricingOptimizerInput] = []
+
+
+def _sales(prediction: Prediction, inventory: int, market_size: int) -> int:
+    # Same definition as the single-period model: sales = min(demand, inventory)
+    return int(min(inventory, prediction.conversion_rate * market_size))
+
+
+def _init_worker(subproblems: list[PricingOptimizerInput]) -> None:
+    global _WORKER_SUBPROBLEMS
+    _WORKER_SUBPROBLEMS = subproblems
+
+
+def _solve_worker_subproblem(
+    index: int, penalties: dict[str, float]
+) -> dict[str, float]:
+    return solve_subproblem(_WORKER_SUBPROBLEMS[index], penalties)
+
+
+def solve_subproblem(
+    optim_input: PricingOptimizerInput, penalties: dict[str, float]
+) -> dict[str, float]:
+    """
+    Price a single (location, period) for the Lagrangian objective: sum((price - penalty) * sales).
+
+    Args:
+        optim_input (PricingOptimizerInput): Single-period input of the subproblem.
+        penalties (dict[str, float]): Lagrange multiplier (shadow price of inventory) of each product.
+
+    Returns:
+        dict[str, float]: The selected price of each product.
+    """
+    curves = optim_input.conversion_rate_curves_dict
+    inventories = optim_input.inventories_dict
+    market_sizes = optim_input.market_sizes_dict
+
+    def lagrangian_revenue(product_id: str, prediction: Prediction) -> float:
+        sales = _sales(prediction, inventories[product_id], market_sizes[product_id])
+        # Selling a unit is only worth it above the shadow price of the inventory
+        return max(0.0, prediction.price - penalties[product_id]) * sales
+
+    if not optim_input.adhoc_ortools_constraints:
+        # NOTE: Without ad-hoc constraints products are independent, no need for a MIP.
+        #  Ties are broken towards the highest price, which keeps the most inventory.
+        return {
+            product_id: max(
+                curves[product_id],
+                key=lambda p: (lagrangian_revenue(product_id, p), p.price),
+            ).price
+            for product_id in optim_input.product_ids
+        }
+
+    # NOTE: The presolve and the knapsack assume the revenue objective, which is replaced below
+    optimizer = PricingOptimizer(verbose=False, presolve=False, knapsack=False)
+    optimizer.build_model(optim_input)
+    predictions = {
+        (product_id, p.price): p
+        for product_id in optim_input.product_ids
+        for p in curves[product_id]
+    }
+    optimizer.solver.Maximize(
+        sum(
+            variable * lagrangian_revenue(product_id, predictions[product_id, price])
+            for (product_id, price), variable in optimizer.x.items()
+        )
+    )
+    status = optimizer.solver.Solve()
+    optimizer.raise_exception_if_model_did_not_solve(status)
+    return {
+        product_id: price
+        for (product_id, price), variable in optimizer.x.items()
+        if variable.solution_value() > 0.5
+    }
+
+
+class MultiPeriodPricingOptimizer:
+    """
+    Multi-period / multi-location pricing where inventory carries over between periods.
+
+    The inventory-linking constraints sum_t(sales[l, i, t]) <= inventory[l, i] are relaxed with
+    Lagrange multipliers, which decomposes the model into one single-period subproblem per
+    (location, period). Subproblems are solved in parallel and the multipliers are updated with
+    a projected subgradient step. Every iteration also builds a feasible plan by simulating the
+    inventory forward, which gives the lower bound of the convergence gap.
+    """
+
+    def __init__(
+        self,
+        max_iterations: int = 100,
+        tolerance: float = 1e-3,
+        n_workers: int | None = None,
+    ) -> None:
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.n_workers = n_workers or os.cpu_count() or 1
+
+        self.optim_input: MultiPeriodPricingInput | None = None
+        self.subproblem_keys: list[tuple[str, int]] = []
+        self.subproblems: list[PricingOptimizerInput] = []
+
+    def build_model(self, optim_input: MultiPeriodPricingInput) -> None:
+        inventories = optim_input.inventories_dict
+        market_sizes = optim_input.market_sizes_dict
+
+        subproblem_keys = []
+        subproblems = []
+        for location_id in optim_input.location_ids:
+            for period in range(optim_input.n_periods):
+                subproblem_keys.append((location_id, period))
+                subproblems.append(
+                    PricingOptimizerInput(
+                        product_ids=optim_input.product_ids,
+                        conversion_rate_curves=optim_input.conversion_rate_curves,
+                        inventories=[
+                            Inventory(
+                                product_id=product_id,
+                                inventory=inventories[location_id, product_id],
+                            )
+                            for product_id in optim_input.product_ids
+                        ],
+                        market_sizes=[
+                            MarketSize(
+                                product_id=product_id,
+                                market_size=market_sizes[
+                                    location_id, product_id, period
+                                ],
+                            )
+                            for product_id in optim_input.product_ids
+                        ],
+                        adhoc_ortools_constraints=optim_input.adhoc_ortools_constraints,
+                    )
+                )
+
+        self.optim_input = optim_input
+        self.subproblem_keys = subproblem_keys
+        self.subproblems = subproblems
+
+    def solve(self) -> MultiPeriodPricingOutput:
+        if self.optim_input is None:
+            raise RuntimeError("Model must be built before solving")
+
+        if self.n_workers > 1 and len(self.subproblems) > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(self.n_workers, len(self.subproblems)),
+                initializer=_init_worker,
+                initargs=(self.subproblems,),
+            ) as executor:
+                return self._run_subgradient(executor)
+
+        return self._run_subgradient(None)
+
+    def _solve_subproblems(
+        self, executor: Executor | None, multipliers: dict[tuple[str, str], float]
+    ) -> dict[tuple[str, int], dict[str, float]]:
+        penalties = [
+            {
+                product_id: multipliers[location_id, product_id]
+                for product_id in self.optim_input.product_ids
+            }
+            for location_id, _ in self.subproblem_keys
+        ]
+        if executor is None:
+            prices = map(solve_subproblem, self.subproblems, penalties)
+        else:
+            prices = executor.map(
+                _solve_worker_subproblem, range(len(self.subproblems)), penalties
+            )
+        return dict(zip(self.subproblem_keys, prices))
+
+    def _run_subgradient(self, executor: Executor | None) -> MultiPeriodPricingOutput:
+        optim_input = self.optim_input
+        inventories = optim_input.inventories_dict
+        market_sizes = optim_input.market_sizes_dict
+        predictions = {
+            (product_id, p.price): p
+            for product_id, curve in optim_input.conversion_rate_curves_dict.items()
+            for p in curve
+        }
+
+        multipliers = {key: 0.0 for key in inventories}
+        upper_bound = float("inf")
+        lower_bound = float("-inf")
+        best_results: list[MultiPeriodProductResult] = []
+        iterations: list[LagrangianIteration] = []
+        # Polyak step scale, halved when the dual bound stalls
+        theta, stalled_iterations = 2.0, 0
+
+        for iteration in range(self.max_iterations):
+            start_time = time.perf_counter()
+            prices = self._solve_subproblems(executor, multipliers)
+
+            # Dual bound: Lagrangian value of the relaxed solution
+            dual_value = sum(
+                multiplier * inventories[key] for key, multiplier in multipliers.items()
+            )
+            relaxed_sales = {key: 0 for key in inventories}
+            for (location_id, period), product_prices in prices.items():
+                for product_id, price in product_prices.items():
+                    multiplier = multipliers[location_id, product_id]
+                    if price <= multiplier:
+                        continue
+                    sales = _sales(
+                        predictions[product_id, price],
+                        inventories[location_id, product_id],
+                        market_sizes[location_id, product_id, period],
+                    )
+                    relaxed_sales[location_id, product_id] += sales
+                    dual_value += (price - multiplier) * sales
+
+            if dual_value < upper_bound - 1e-9:
+                upper_bound, stalled_iterations = dual_value, 0
+            else:
+                stalled_iterations += 1
+                if stalled_iterations >= 5:
+                    theta, stalled_iterations = theta / 2, 0
+
+            # Primal bound: keep the relaxed prices and simulate the inventory forward
+            primal_value, results = self._simulate_inventory(prices, predictions)
+            if primal_value > lower_bound:
+                lower_bound, best_results = primal_value, results
+
+            gap = (upper_bound - lower_bound) / max(abs(upper_bound), 1e-9)
+            subgradient = {
+                key: inventories[key] - relaxed_sales[key] for key in inventories
+            }
+            # Projected subgradient: components that cannot move the multipliers are ignored
+            norm = sum(
+                g**2
+                for key, g in subgradient.items()
+                if not (multipliers[key] == 0.0 and g >= 0)
+            )
+            step_size = theta * (upper_bound - lower_bound) / norm if norm else 0.0
+            multipliers = {
+                key: max(0.0, multiplier - step_size * subgradient[key])
+                for key, multiplier in multipliers.items()
+            }
+
+            iterations.append(
+                LagrangianIteration(
+                    iteration=iteration,
+                    lower_bound=lower_bound,
+                    upper_bound=upper_bound,
+                    gap=gap,
+                    step_size=step_size,
+                    elapsed_seconds=time.perf_counter() - start_time,
+                )
+            )
+            logger.info(
+                f"Lagrangian iteration {iteration}: lower bound={lower_bound:.2f} "
+                f"upper bound={upper_bound:.2f} gap={gap:.4%} "
+                f"({iterations[-1].elapsed_seconds:.3f}s)"
+            )
+
+            if gap <= self.tolerance or norm == 0:
+                break
+
+        return MultiPeriodPricingOutput(
+            product_results=best_results, iterations=iterations
+        )
+
+    def _simulate_inventory(
+        self,
+        prices: dict[tuple[str, int], dict[str, float]],
+        predictions: dict[tuple[str, float], Prediction],
+    ) -> tuple[float, list[MultiPeriodProductResult]]:
+        optim_input = self.optim_input
+        remaining_inventories = optim_input.inventories_dict
+        market_sizes = optim_input.market_sizes_dict
+
+        total_revenue = 0.0
+        results = []
+        for location_id in optim_input.location_ids:
+            for period in range(optim_input.n_periods):
+                for product_id in optim_input.product_ids:
+                    price = prices[location_id, period][product_id]
+                    remaining_inventory = remaining_inventories[location_id, product_id]
+                    sales = _sales(
+                        predictions[product_id, price],
+                        remaining_inventory,
+                        market_sizes[location_id, product_id, period],
+                    )
+                    remaining_inventories[location_id, product_id] -= sales
+                    total_revenue += price * sales
+                    results.append(
+                        MultiPeriodProductResult(
+                            location_id=location_id,
+                            period=period,
+                            product_id=product_id,
+                            price=price,
+                            revenue=price * sales,
+                            sales=sales,
+                        )
+                    )
+        return total_revenue, results
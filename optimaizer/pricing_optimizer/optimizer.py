@@ -1,30 +1,68 @@
 import logging
-from ortools.linear_solver import pywraplp
+import time
+from typing import Callable
+from ortools.linear_solver import linear_solver_pb2, pywraplp
+from optimaizer.pricing_optimizer.constraints import parse_constraints
+from optimaizer.pricing_optimizer.knapsack import solve_multiple_choice_knapsack
+from optimaizer.pricing_optimizer.presolve import (
+    compute_price_points_by_product,
+    presolve_price_points,
+)
+from optimaizer.pricing_optimizer.shared_catalog import SharedCatalog
 from optimaizer.pricing_optimizer.types import (
+    PresolveReport,
+    PricePoint,
     PricingOptimizerInput,
     PricingOptimizerOutput,
     ProductResult,
+    SolveProgress,
+    SolveStatus,
 )
 from optimaizer.utils.execute_code import CodeExecutionStatus, execute_code
 
 logger = logging.getLogger(__name__)
 
 
+class InfeasibleProblemError(RuntimeError):
+    """Raised when the constraints of the problem cannot be satisfied (or it is unbounded)."""
+
+
+# Solvers which use hints (`SetHint`, prefixes of `SolverVersion`), the others ignore them
+_HINTED_SOLVERS = ("SCIP", "CP-SAT", "Gurobi")
+
+
 class PricingOptimizer:
-    def __init__(self, verbose: bool = True) -> None:
-        self.solver = pywraplp.Solver.CreateSolver("CBC_MIXED_INTEGER_PROGRAMMING")
+    def __init__(
+        self,
+        verbose: bool = True,
+        presolve: bool = True,
+        knapsack: bool = True,
+        solver_id: str = "CBC_MIXED_INTEGER_PROGRAMMING",
+    ) -> None:
+        self.solver_id = solver_id
+        self.solver = pywraplp.Solver.CreateSolver(solver_id)
         if not self.solver:
-            raise RuntimeError("Solver not available")
+            raise RuntimeError(f"Solver {solver_id} not available")
 
         if verbose:
             self.solver.EnableOutput()
 
+        self.presolve = presolve
+        self.presolve_report: PresolveReport | None = None
+        self.knapsack = knapsack
+        self.knapsack_solution: dict[str, PricePoint] | None = None
+        self.price_points: dict[str, list[PricePoint]] = {}
         self.x: dict[tuple[str, float], pywraplp.Variable] = {}
         self.product_price: dict[str, pywraplp.LinearExpr] = {}
         self.product_revenue: dict[str, pywraplp.LinearExpr] = {}
         self.product_sales: dict[str, pywraplp.LinearExpr] = {}
 
-    def build_model(self, optim_input: PricingOptimizerInput) -> None:
+    def build_model(
+        self,
+        optim_input: PricingOptimizerInput,
+        price_points: dict[str, list[PricePoint]] | None = None,
+        shared_catalog: SharedCatalog | None = None,
+    ) -> None:
         product_ids = optim_input.product_ids
 
         # x is a boolean variable which equals 1 if price p is selected for product i
@@ -33,39 +71,128 @@ class PricingOptimizer:
         product_revenue: dict[str, pywraplp.LinearExpr] = {}
         product_sales: dict[str, pywraplp.LinearExpr] = {}
 
+        # Price, sales and revenue of each candidate price
+        # sales = min(demand, inventory) = min(conversion_rate * market_size, inventory)
+        curves = optim_input.conversion_rate_curves_dict
+        inventories = optim_input.inventories_dict
+        market_sizes = optim_input.market_sizes_dict
+        # NOTE: Price points can also be given, e.g. with the expected sales over demand scenarios,
+        #  or computed from the curves of a shared catalog (the input then needs no curves)
+        if price_points is None and shared_catalog is not None:
+            price_points = shared_catalog.price_points(
+                product_ids, inventories, market_sizes
+            )
+        elif price_points is None:
+            price_points = compute_price_points_by_product(
+                product_ids, curves, inventories, market_sizes
+            )
+
+        # The ad-hoc constraints are parsed once, for the presolve and the knapsack
+        # NOTE: The presolve keeps the prices referenced in x, the parsed constraints remain valid
+        #  for the presolved price points
+        constraints = (
+            parse_constraints(
+                optim_input.adhoc_ortools_constraints,
+                {
+                    product_id: [point.price for point in points]
+                    for product_id, points in price_points.items()
+                },
+            )
+            if optim_input.adhoc_ortools_constraints
+            else []
+        )
+
+        # Drop the price points which cannot be optimal given the ad-hoc constraints
+        if self.presolve:
+            price_points, self.presolve_report = presolve_price_points(
+                price_points, inventories, constraints
+            )
+
+        self.price_points = price_points
+
+        # With a single constraint shared by all products, the problem is a multiple-choice
+        # knapsack solved directly, the MIP is only built for more general constraints
+        self.knapsack_solution = None
+        if self.knapsack:
+            self.knapsack_solution = solve_multiple_choice_knapsack(
+                price_points, constraints
+            )
+            if self.knapsack_solution is not None:
+                return
+
         for product_id in product_ids:
-            curve = optim_input.conversion_rate_curves_dict[product_id]
-            for prediction in curve:
-                x[(product_id, prediction.price)] = self.solver.IntVar(
-                    0.0, 1.0, f"x[{product_id}, {prediction.price}]"
+            points = price_points[product_id]
+            for p in points:
+                x[(product_id, p.price)] = self.solver.IntVar(
+                    0.0, 1.0, f"x[{product_id}, {p.price}]"
                 )
 
             # Only one price can be chosen for each product
-            self.solver.Add(sum(x[product_id, p.price] for p in curve) == 1)
+            self.solver.Add(sum(x[product_id, p.price] for p in points) == 1)
 
             # Calculate intermediate quantities (price, sales, revenue)
             product_price[product_id] = sum(
-                x[product_id, p.price] * p.price for p in curve
+                x[product_id, p.price] * p.price for p in points
             )
-
-            inventory = optim_input.inventories_dict[product_id]
-            market_size = optim_input.market_sizes_dict[product_id]
-            # sales = min(demand, inventory) = min(conversion_rate * market_size, inventory)
             product_sales[product_id] = sum(
-                x[product_id, p.price]
-                * int(min(inventory, p.conversion_rate * market_size))
-                for p in curve
+                x[product_id, p.price] * p.sales for p in points
             )
             product_revenue[product_id] = sum(
-                x[product_id, p.price]
-                * p.price
-                * int(min(inventory, p.conversion_rate * market_size))
-                for p in curve
+                x[product_id, p.price] * p.revenue for p in points
             )
 
+        self.add_adhoc_constraints_and_objective(
+            optim_input.adhoc_ortools_constraints,
+            x,
+            product_price,
+            product_revenue,
+            product_sales,
+        )
+
+    def load_model(
+        self,
+        model: linear_solver_pb2.MPModelProto,
+        x_keys: list[tuple[str, float]],
+        price_points: dict[str, list[PricePoint]],
+    ) -> None:
+        """
+        Load a model exported with `solver.ExportModelToProto` instead of building it.
+
+        NOTE: Only x is restored, the linear expressions used by ad-hoc constraints are not rebuilt
+         (the constraints are already part of the model).
+
+        Args:
+            model (MPModelProto): The exported model.
+            x_keys (list[tuple[str, float]]): (product_id, price) of each variable, by index.
+            price_points (dict[str, list[PricePoint]]): Price points of each product.
+        """
+        error = self.solver.LoadModelFromProto(model)
+        if error:
+            raise RuntimeError(f"Error loading the model: {error}")
+        self.knapsack_solution = None
+        self.price_points = price_points
+        self.x = dict(zip(x_keys, self.solver.variables()))
+
+    @property
+    def supports_hints(self) -> bool:
+        """Whether the solver uses hints, e.g. between time slices (not CBC, HiGHS or the knapsack)."""
+        return (
+            self.knapsack_solution is None
+            and self.solver.SolverVersion().startswith(_HINTED_SOLVERS)
+        )
+
+    def add_adhoc_constraints_and_objective(
+        self,
+        adhoc_ortools_constraints: list[str],
+        x: dict[tuple[str, float], pywraplp.Variable],
+        product_price: dict[str, pywraplp.LinearExpr],
+        product_revenue: dict[str, pywraplp.LinearExpr],
+        product_sales: dict[str, pywraplp.LinearExpr],
+    ) -> None:
         # Inject Adhoc OR-Tools constraints
         # NOTE(for LLM): Pay careful attention to the syntax here.
         #  • x is a dictionary of boolean variables, where x[(product_id, price)] is 1 if price is selected for product_id
+        #    (prices that can never be optimal are removed by the presolve, unless a constraint references them in x)
         #  • product_price is a dictionary of linear expressions where product_price[product_id] is the price for product_id
         #  • product_revenue is a dictionary of linear expressions where product_revenue[product_id] is the revenue for product_id
         #  • product_sales is a dictionary of linear expressions where product_sales[product_id] is the sales for product_id
@@ -76,7 +203,7 @@ class PricingOptimizer:
             "product_revenue": product_revenue,
             "product_sales": product_sales,
         }
-        for constraint in optim_input.adhoc_ortools_constraints:
+        for constraint in adhoc_ortools_constraints:
             logger.info(f"Injecting custom constraint: {constraint}")
             result = execute_code(f"solver.Add({constraint})", namespace)
 
@@ -95,35 +222,171 @@ class PricingOptimizer:
         self.product_revenue = product_revenue
         self.product_sales = product_sales
 
-    def solve(self) -> PricingOptimizerOutput:
-        status = self.solver.Solve()
-        self.raise_exception_if_model_did_not_solve(status)
-        return self.format_solution()
+    def solve(
+        self,
+        time_limit_seconds: float | None = None,
+        progress_callback: Callable[[SolveProgress], None] | None = None,
+        progress_interval_seconds: float = 1.0,
+    ) -> PricingOptimizerOutput:
+        """
+        Solve the model. With a time limit, the best feasible solution found before the deadline is
+        returned along with its optimality gap.
 
-    def format_solution(self) -> PricingOptimizerOutput:
+        NOTE: The solver does not expose callbacks, progress is reported by solving in time slices
+        (doubling in length) and passing the incumbent of a slice as a hint to the next one. Solvers
+        which ignore hints (`supports_hints`, e.g. CBC) would restart the search from scratch at
+        every slice: they run a single solve and report its progress once, at the end.
+        """
+        if self.knapsack_solution is not None:
+            return PricingOptimizerOutput(
+                product_results=[
+                    ProductResult(
+                        product_id=product_id,
+                        price=point.price,
+                        revenue=point.revenue,
+                        sales=point.sales,
+                    )
+                    for product_id, point in self.knapsack_solution.items()
+                ]
+            )
+
+        if progress_callback is None or not self.supports_hints:
+            start_time = time.perf_counter()
+            if time_limit_seconds is not None:
+                self.solver.SetTimeLimit(int(time_limit_seconds * 1000))
+            status = self.solver.Solve()
+            if progress_callback is not None:
+                solved = status in {pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE}
+                progress_callback(
+                    SolveProgress(
+                        incumbent_value=self.solver.Objective().Value()
+                        if solved
+                        else None,
+                        best_bound=self.solver.Objective().BestBound()
+                        if solved
+                        else None,
+                        elapsed_seconds=time.perf_counter() - start_time,
+                    )
+                )
+            self.raise_exception_if_model_did_not_solve(status)
+            return self.format_solution(status)
+
+        start_time = time.perf_counter()
+        slice_seconds = progress_interval_seconds
+        best_status, best_values = None, None
+        best_value, best_bound = None, None
+        while True:
+            elapsed_seconds = time.perf_counter() - start_time
+            if time_limit_seconds is not None:
+                slice_seconds = min(slice_seconds, time_limit_seconds - elapsed_seconds)
+            self.solver.SetTimeLimit(max(1, int(slice_seconds * 1000)))
+            status = self.solver.Solve()
+
+            if status in {pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE}:
+                objective = self.solver.Objective()
+                # Every slice gives a valid bound on the optimal revenue, the best one is kept
+                if best_bound is None or objective.BestBound() < best_bound:
+                    best_bound = objective.BestBound()
+                if best_value is None or objective.Value() > best_value:
+                    best_status, best_value = status, objective.Value()
+                    best_values = [
+                        variable.solution_value()
+                        for variable in self.solver.variables()
+                    ]
+                elif (
+                    status == pywraplp.Solver.OPTIMAL
+                    and objective.Value() == best_value
+                ):
+                    # The incumbent was proven optimal by this slice
+                    best_status = status
+
+            progress_callback(
+                SolveProgress(
+                    incumbent_value=best_value,
+                    best_bound=best_bound,
+                    elapsed_seconds=time.perf_counter() - start_time,
+                )
+            )
+
+            deadline_reached = (
+                time_limit_seconds is not None
+                and time.perf_counter() - start_time >= time_limit_seconds
+            )
+            if (
+                status not in {pywraplp.Solver.FEASIBLE, pywraplp.Solver.NOT_SOLVED}
+                or deadline_reached
+            ):
+                break
+
+            if best_values is not None:
+                self.solver.SetHint(self.solver.variables(), best_values)
+            slice_seconds *= 2
+
+        if best_values is None:
+            self.raise_exception_if_model_did_not_solve(status)
+        return self.format_solution(best_status, best_values, best_bound)
+
+    def format_solution(
+        self,
+        status: int = pywraplp.Solver.OPTIMAL,
+        values: list[float] | None = None,
+        best_bound: float | None = None,
+    ) -> PricingOptimizerOutput:
+        output = PricingOptimizerOutput(product_results=self.product_results(values))
+        if status == pywraplp.Solver.FEASIBLE:
+            if best_bound is None:
+                best_bound = self.solver.Objective().BestBound()
+            output.status = SolveStatus.FEASIBLE
+            output.optimality_gap = abs(best_bound - output.total_revenue) / max(
+                abs(output.total_revenue), 1e-9
+            )
+        return output
+
+    def product_results(self, values: list[float] | None = None) -> list[ProductResult]:
         product_results = []
         for (product_id, price), variable in self.x.items():
-            if variable.solution_value() == 1:
+            if self.solution_value(variable, values) > 0.5:
+                point = next(
+                    point
+                    for point in self.price_points[product_id]
+                    if point.price == price
+                )
                 product_results.append(
                     ProductResult(
                         product_id=product_id,
                         price=price,
-                        revenue=self.product_revenue[product_id].solution_value(),
-                        sales=self.product_sales[product_id].solution_value(),
+                        revenue=point.revenue,
+                        sales=point.sales,
                     )
                 )
-        return PricingOptimizerOutput(product_results=product_results)
+        return product_results
+
+    @staticmethod
+    def solution_value(
+        expression: pywraplp.LinearExpr, values: list[float] | None = None
+    ) -> float:
+        # Value in the current solution of the solver, or in a snapshot of the variables values
+        if values is None:
+            return expression.solution_value()
+        coefficients = expression.GetCoeffs()
+        offset = coefficients.pop(pywraplp.OFFSET_KEY, 0.0)
+        return offset + sum(values[v.index()] * c for v, c in coefficients.items())
 
     def raise_exception_if_model_did_not_solve(self, status: int) -> None:
         if status in {pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE}:
             return
 
         if status in {pywraplp.Solver.INFEASIBLE, pywraplp.Solver.UNBOUNDED}:
-            raise RuntimeError("Infeasible or unbounded optimization problem")
+            raise InfeasibleProblemError("Infeasible or unbounded optimization problem")
 
         if status == pywraplp.Solver.MODEL_INVALID:
             raise RuntimeError(
                 "Invalid model error when solving the optimization problem"
             )
 
+        if status == pywraplp.Solver.NOT_SOLVED:
+            raise RuntimeError(
+                "No feasible solution was found before the time limit of the solver"
+            )
+
         raise RuntimeError("Model failed to solve")
@@ -0,0 +1,255 @@
+import logging
+import time
+from typing import Callable
+
+import numpy as np
+from ortools.linear_solver import pywraplp
+
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.types import (
+    Prediction,
+    PricingOptimizerInput,
+    PricingOptimizerOutput,
+    ProductResult,
+    SolveProgress,
+    SolveStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _interpolate_conversion_rate(
+    curve: list[Prediction], prices: np.ndarray
+) -> np.ndarray:
+    points = sorted(curve, key=lambda prediction: prediction.price)
+    return np.interp(
+        prices,
+        [prediction.price for prediction in points],
+        [prediction.conversion_rate for prediction in points],
+    )
+
+
+class PiecewiseLinearPricingOptimizer(PricingOptimizer):
+    """
+    Pricing model with a few breakpoints per product instead of every price point of its curve,
+    refined around the selected price. Prices are not restricted to the prices of the curves: they
+    can be any multiple of `10 ** -price_decimals` between the lowest and highest price of the
+    curve, the conversion rate being interpolated linearly between two points of the curve.
+
+    Each curve is sampled at `n_segments + 1` evenly spaced breakpoints and price, sales and
+    revenue are combinations of two consecutive breakpoints (lambda / SOS2 formulation). As the
+    objective is linear in the weights of the breakpoints, the optimum is always on a breakpoint:
+    after each solve, the breakpoints around the selected price of each product are resampled
+    `n_segments` times finer and the model is solved again (at most `refinements` times, or until
+    the breakpoints reach the price resolution). The incumbent prices remain breakpoints, so each
+    refinement can only increase the revenue.
+
+    The size of the model depends on `n_segments` (at most `3 * n_segments + 1` breakpoints per
+    product), not on the number of points of the curves. Breakpoints are rounded to
+    `price_decimals`, the revenue of the model is exact at the selected prices.
+
+    NOTE: Refinement is a local search around the incumbent prices: a better price far from the
+     incumbent and between two coarse breakpoints can be missed.
+    """
+
+    def __init__(
+        self,
+        n_segments: int = 8,
+        verbose: bool = True,
+        price_decimals: int = 2,
+        refinements: int = 10,
+    ) -> None:
+        # NOTE: The presolve works on enumerated price points, it does not apply to this model
+        super().__init__(verbose=verbose, presolve=False)
+        if n_segments < 1:
+            raise ValueError("n_segments must be at least 1")
+        self.n_segments = n_segments
+        self.price_decimals = price_decimals
+        self.refinements = refinements
+        self.verbose = verbose
+        self.product_ids: list[str] = []
+        self.adhoc_ortools_constraints: list[str] = []
+        self.curves: dict[str, list[Prediction]] = {}
+        self.inventories: dict[str, int] = {}
+        self.market_sizes: dict[str, int] = {}
+        self.product_breakpoints: dict[str, np.ndarray] = {}
+
+    def breakpoints(self, curve: list[Prediction]) -> np.ndarray:
+        prices = sorted({prediction.price for prediction in curve})
+        # Curves with few points are used as is, the model is then exact at every price of the curve
+        if len(prices) <= self.n_segments + 1:
+            return np.unique(np.round(prices, self.price_decimals))
+        return np.unique(
+            np.round(
+                np.linspace(prices[0], prices[-1], self.n_segments + 1),
+                self.price_decimals,
+            )
+        )
+
+    def refined_breakpoints(self, product_id: str, price: float) -> np.ndarray:
+        """Initial breakpoints, plus `n_segments` finer ones around `price` (a breakpoint)."""
+        breakpoints = self.product_breakpoints[product_id]
+        k = int(np.abs(breakpoints - price).argmin())
+        low, high = (
+            breakpoints[max(0, k - 1)],
+            breakpoints[min(len(breakpoints) - 1, k + 1)],
+        )
+        return np.unique(
+            np.round(
+                np.concatenate(
+                    [
+                        self.breakpoints(self.curves[product_id]),
+                        np.linspace(low, high, self.n_segments + 1),
+                        [price],
+                    ]
+                ),
+                self.price_decimals,
+            )
+        )
+
+    def build_model(self, optim_input: PricingOptimizerInput) -> None:
+        self.product_ids = list(optim_input.product_ids)
+        self.adhoc_ortools_constraints = optim_input.adhoc_ortools_constraints
+        self.curves = optim_input.conversion_rate_curves_dict
+        self.inventories = optim_input.inventories_dict
+        self.market_sizes = optim_input.market_sizes_dict
+        self.product_breakpoints = {
+            product_id: self.breakpoints(self.curves[product_id])
+            for product_id in self.product_ids
+        }
+        self._build_breakpoints_model()
+
+    def _build_breakpoints_model(self) -> None:
+        product_price: dict[str, pywraplp.LinearExpr] = {}
+        product_revenue: dict[str, pywraplp.LinearExpr] = {}
+        product_sales: dict[str, pywraplp.LinearExpr] = {}
+
+        for product_id in self.product_ids:
+            prices = self.product_breakpoints[product_id]
+            # sales = min(demand, inventory) = min(conversion_rate * market_size, inventory)
+            sales = np.floor(
+                np.minimum(
+                    self.inventories[product_id],
+                    _interpolate_conversion_rate(self.curves[product_id], prices)
+                    * self.market_sizes[product_id],
+                )
+            )
+            revenues = prices * sales
+
+            # weight[k] is the weight of breakpoint k in the convex combination giving the price
+            weight = [
+                self.solver.NumVar(0.0, 1.0, f"weight[{product_id}, {k}]")
+                for k in range(len(prices))
+            ]
+            self.solver.Add(sum(weight) == 1)
+
+            # segment[k] is a boolean variable which equals 1 if the price is between breakpoints
+            # k and k + 1. Only the weights of these two breakpoints can be non-zero (SOS2).
+            if len(prices) > 1:
+                segment = [
+                    self.solver.IntVar(0.0, 1.0, f"segment[{product_id}, {k}]")
+                    for k in range(len(prices) - 1)
+                ]
+                self.solver.Add(sum(segment) == 1)
+                for k in range(len(prices)):
+                    adjacent_segments = segment[max(0, k - 1) : k + 1]
+                    self.solver.Add(weight[k] <= sum(adjacent_segments))
+
+            product_price[product_id] = sum(
+                w * float(p) for w, p in zip(weight, prices)
+            )
+            product_sales[product_id] = sum(w * float(s) for w, s in zip(weight, sales))
+            product_revenue[product_id] = sum(
+                w * float(r) for w, r in zip(weight, revenues)
+            )
+
+        # NOTE: Breakpoints change with refinements, ad-hoc constraints cannot select a price
+        #  through x
+        self.add_adhoc_constraints_and_objective(
+            self.adhoc_ortools_constraints,
+            {},
+            product_price,
+            product_revenue,
+            product_sales,
+        )
+
+    def solve(
+        self,
+        time_limit_seconds: float | None = None,
+        progress_callback: Callable[[SolveProgress], None] | None = None,
+        progress_interval_seconds: float = 1.0,
+    ) -> PricingOptimizerOutput:
+        """
+        Solve the model, then refine the breakpoints around the selected prices and solve again
+        until the prices no longer change (or the time limit is reached).
+        """
+        start_time = time.perf_counter()
+        output = super().solve(
+            time_limit_seconds, progress_callback, progress_interval_seconds
+        )
+        for refinement in range(self.refinements):
+            remaining_seconds = (
+                None
+                if time_limit_seconds is None
+                else time_limit_seconds - (time.perf_counter() - start_time)
+            )
+            if output.status != SolveStatus.OPTIMAL or (
+                remaining_seconds is not None and remaining_seconds <= 0
+            ):
+                break
+            prices = {
+                result.product_id: result.price for result in output.product_results
+            }
+            product_breakpoints = {
+                product_id: self.refined_breakpoints(product_id, prices[product_id])
+                for product_id in self.product_ids
+            }
+            if all(
+                np.array_equal(breakpoints, self.product_breakpoints[product_id])
+                for product_id, breakpoints in product_breakpoints.items()
+            ):
+                break
+
+            self.product_breakpoints = product_breakpoints
+            self.solver = pywraplp.Solver.CreateSolver(self.solver_id)
+            if self.verbose:
+                self.solver.EnableOutput()
+            self._build_breakpoints_model()
+            refined_output = super().solve(
+                remaining_seconds, progress_callback, progress_interval_seconds
+            )
+            logger.debug(
+                f"Refinement {refinement + 1}: revenue {output.total_revenue} -> "
+                f"{refined_output.total_revenue}"
+            )
+            # NOTE: The incumbent is a breakpoint of the refined model, the revenue can only
+            #  decrease when the refined model was not solved to optimality
+            if refined_output.total_revenue < output.total_revenue:
+                break
+            output = refined_output
+        return output
+
+    def product_results(self, values: list[float] | None = None) -> list[ProductResult]:
+        product_results = []
+        for product_id, price_expression in self.product_price.items():
+            price = round(
+                self.solution_value(price_expression, values), self.price_decimals
+            )
+            conversion_rate = _interpolate_conversion_rate(
+                self.curves[product_id], np.array([price])
+            )[0]
+            sales = int(
+                min(
+                    self.inventories[product_id],
+                    conversion_rate * self.market_sizes[product_id],
+                )
+            )
+            product_results.append(
+                ProductResult(
+                    product_id=product_id,
+                    price=price,
+                    revenue=price * sales,
+                    sales=sales,
+                )
+            )
+        return product_results
@@ -0,0 +1,187 @@
+import logging
+import multiprocessing
+import queue
+import time
+from pathlib import Path
+
+from optimaizer.pricing_optimizer.constraints import parse_constraints
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.types import (
+    ModelFeatures,
+    PortfolioRun,
+    PricingOptimizerInput,
+    PricingOptimizerOutput,
+    SolveStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOLVER_IDS = ("CBC", "SCIP", "SAT", "HIGHS")
+
+
+def model_features(optim_input: PricingOptimizerInput) -> ModelFeatures:
+    curves = optim_input.conversion_rate_curves_dict
+    constraints = parse_constraints(
+        optim_input.adhoc_ortools_constraints,
+        {
+            product_id: [prediction.price for prediction in curves[product_id]]
+            for product_id in optim_input.product_ids
+        },
+    )
+    return ModelFeatures(
+        n_products=len(optim_input.product_ids),
+        n_price_points=sum(
+            len(curves[product_id]) for product_id in optim_input.product_ids
+        ),
+        n_adhoc_constraints=len(optim_input.adhoc_ortools_constraints),
+        n_coupling_constraints=sum(
+            len(constraint.product_ids) > 1 for constraint in constraints
+        )
+        if constraints is not None
+        else None,
+    )
+
+
+def _race_worker(
+    solver_id: str,
+    optim_input: PricingOptimizerInput,
+    time_limit_seconds: float | None,
+    results: multiprocessing.Queue,
+) -> None:
+    start_time = time.perf_counter()
+    try:
+        # NOTE: The knapsack would solve single budget models with the same dynamic program in
+        #  every process, the first process started would always win the race
+        optimizer = PricingOptimizer(verbose=False, knapsack=False, solver_id=solver_id)
+        optimizer.build_model(optim_input)
+        output = optimizer.solve(time_limit_seconds=time_limit_seconds)
+        results.put(
+            (solver_id, output.model_dump(), None, time.perf_counter() - start_time)
+        )
+    except Exception as e:
+        results.put((solver_id, None, str(e), time.perf_counter() - start_time))
+
+
+class PortfolioPricingOptimizer:
+    """
+    Solve the same model with several solver backends in parallel processes.
+
+    The first proven-optimal solution wins and the other processes are cancelled. With a time
+    limit, the best feasible solution is returned if no backend proves optimality in time.
+    The winner of each race is appended to `history_path` (JSON lines) along with the features of
+    the model, to later route models to the best backend directly.
+
+    NOTE: The backends race on the MIP. Models with a single budget constraint are solved faster
+     by the knapsack of `PricingOptimizer`, without a race.
+    """
+
+    def __init__(
+        self,
+        solver_ids: tuple[str, ...] = DEFAULT_SOLVER_IDS,
+        history_path: str | Path | None = None,
+    ) -> None:
+        self.solver_ids = solver_ids
+        self.history_path = Path(history_path) if history_path else None
+        self.last_run: PortfolioRun | None = None
+
+    def solve(
+        self,
+        optim_input: PricingOptimizerInput,
+        time_limit_seconds: float | None = None,
+    ) -> PricingOptimizerOutput:
+        """
+        Race the solver backends on the model.
+
+        Args:
+            optim_input (PricingOptimizerInput): The pricing optimizer input.
+            time_limit_seconds (float | None): Deadline of the race.
+
+        Returns:
+            PricingOptimizerOutput: The solution of the winning backend.
+        """
+        results: multiprocessing.Queue = multiprocessing.Queue()
+        processes = {
+            solver_id: multiprocessing.Process(
+                target=_race_worker,
+                args=(solver_id, optim_input, time_limit_seconds, results),
+                daemon=True,
+            )
+            for solver_id in self.solver_ids
+        }
+        for process in processes.values():
+            process.start()
+
+        # NOTE: Backends stop themselves at the time limit, the extra delay covers model building
+        deadline = (
+            time.perf_counter() + 2 * time_limit_seconds
+            if time_limit_seconds is not None
+            else None
+        )
+        solve_seconds: dict[str, float | None] = dict.fromkeys(self.solver_ids)
+        outputs: dict[str, PricingOptimizerOutput] = {}
+        errors: dict[str, str] = {}
+        try:
+            while len(outputs) + len(errors) < len(processes):
+                try:
+                    solver_id, output, error, seconds = results.get(timeout=0.1)
+                except queue.Empty:
+                    # A backend may crash without reporting, so the processes are also checked
+                    if (
+                        deadline is not None and time.perf_counter() > deadline
+                    ) or not any(process.is_alive() for process in processes.values()):
+                        break
+                    continue
+                if error is not None:
+                    logger.info(f"Portfolio: {solver_id} failed: {error}")
+                    errors[solver_id] = error
+                    continue
+                solve_seconds[solver_id] = seconds
+                outputs[solver_id] = PricingOptimizerOutput.model_validate(output)
+                if outputs[solver_id].status == SolveStatus.OPTIMAL:
+                    break
+        finally:
+            for process in processes.values():
+                if process.is_alive():
+                    process.terminate()
+            for process in processes.values():
+                process.join()
+
+        if not outputs:
+            raise RuntimeError(
+                next(iter(errors.values()), "No solver finished before the deadline")
+            )
+
+        winner = max(
+            outputs,
+            key=lambda solver_id: (
+                outputs[solver_id].status == SolveStatus.OPTIMAL,
+                outputs[solver_id].total_revenue,
+            ),
+        )
+        self.last_run = PortfolioRun(
+            features=model_features(optim_input),
+            winner=winner,
+            status=outputs[winner].status,
+            total_revenue=outputs[winner].total_revenue,
+            solve_seconds=solve_seconds,
+        )
+        logger.info(
+            f"Portfolio: {winner} won in {solve_seconds[winner]:.3f}s "
+            f"({outputs[winner].status})"
+        )
+        if self.history_path is not None:
+            self.history_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.history_path.open("a") as f:
+                f.write(self.last_run.model_dump_json() + "\n")
+        return outputs[winner]
+
+    @staticmethod
+    def read_history(history_path: str | Path) -> list[PortfolioRun]:
+        path = Path(history_path)
+        if not path.exists():
+            return []
+        return [
+            PortfolioRun.model_validate_json(line)
+            for line in path.read_text().splitlines()
+            if line
+        ]
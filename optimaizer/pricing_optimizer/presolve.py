@@ -0,0 +1,175 @@
+import logging
+from optimaizer.pricing_optimizer.constraints import SymbolicConstraint
+from optimaizer.pricing_optimizer.types import PresolveReport, Prediction, PricePoint
+
+logger = logging.getLogger(__name__)
+
+
+def compute_price_points(
+    curve: list[Prediction], inventory: int, market_size: int
+) -> list[PricePoint]:
+    points = []
+    for prediction in curve:
+        # sales = min(demand, inventory) = min(conversion_rate * market_size, inventory)
+        sales = int(min(inventory, prediction.conversion_rate * market_size))
+        points.append(PricePoint(prediction.price, sales, prediction.price * sales))
+    return points
+
+
+def compute_price_points_by_product(
+    product_ids: list[str],
+    curves: dict[str, list[Prediction]],
+    inventories: dict[str, int],
+    market_sizes: dict[str, int],
+) -> dict[str, list[PricePoint]]:
+    """
+    Price points of each product. Products with the same curve instance (see `CurveInterner`),
+    inventory and market size share the same list of price points, which is computed once.
+    """
+    # NOTE: The curves are referenced by `curves` during the call, so their ids are unique
+    shared_price_points: dict[tuple[int, int, int], list[PricePoint]] = {}
+    price_points = {}
+    for product_id in product_ids:
+        curve = curves[product_id]
+        key = (id(curve), inventories[product_id], market_sizes[product_id])
+        points = shared_price_points.get(key)
+        if points is None:
+            points = shared_price_points[key] = compute_price_points(
+                curve, inventories[product_id], market_sizes[product_id]
+            )
+        price_points[product_id] = points
+    return price_points
+
+
+def _constraint_contribution(
+    constraint: SymbolicConstraint, product_id: str, point: PricePoint
+) -> float:
+    terms = constraint.expression.terms
+    return (
+        terms.get(("price", product_id), 0.0) * point.price
+        + terms.get(("sales", product_id), 0.0) * point.sales
+        + terms.get(("revenue", product_id), 0.0) * point.revenue
+        + terms.get(("x", product_id, point.price), 0.0)
+    )
+
+
+def _pareto_front(
+    points: list[PricePoint], costs: list[tuple[float, ...]]
+) -> list[PricePoint]:
+    # A point is dominated if another point has a revenue at least as high and a cost at least as
+    # low on every ad-hoc constraint. Among identical points, the highest price is kept.
+    order = sorted(
+        range(len(points)),
+        key=lambda i: (-points[i].revenue, costs[i], -points[i].price),
+    )
+    front: list[int] = []
+    for i in order:
+        if not any(
+            all(kept_cost <= cost for kept_cost, cost in zip(costs[j], costs[i]))
+            for j in front
+        ):
+            front.append(i)
+    return [points[i] for i in sorted(front)]
+
+
+def presolve_price_points(
+    price_points: dict[str, list[PricePoint]],
+    inventories: dict[str, int],
+    constraints: list[SymbolicConstraint] | None,
+) -> tuple[dict[str, list[PricePoint]], PresolveReport]:
+    """
+    Remove the price points which can never be selected in an optimal solution.
+
+    The revenue is maximized, so a price point can be dropped when another price of the same
+    product has a revenue at least as high and is at least as good for every ad-hoc constraint.
+    Products that are not referenced by any constraint therefore reduce to their best price.
+    If a constraint cannot be analyzed, nothing is pruned.
+
+    Args:
+        price_points (dict[str, list[PricePoint]]): Candidate price points of each product.
+        inventories (dict[str, int]): Inventory of each product.
+        constraints (list[SymbolicConstraint] | None): Ad-hoc constraints injected in the model,
+            parsed by `parse_constraints` (None if they cannot be analyzed).
+
+    Returns:
+        tuple[dict[str, list[PricePoint]], PresolveReport]: The remaining price points and a report.
+    """
+    price_points_before = sum(len(points) for points in price_points.values())
+    if constraints is None:
+        logger.info("Presolve skipped: ad-hoc constraints could not be analyzed")
+        return price_points, PresolveReport(
+            price_points_before=price_points_before,
+            price_points_after=price_points_before,
+            pruned_inventory_capped=0,
+            pruned_dominated=0,
+        )
+
+    constraints_by_product: dict[str, list[SymbolicConstraint]] = {}
+    for constraint in constraints:
+        for product_id in constraint.product_ids:
+            constraints_by_product.setdefault(product_id, []).append(constraint)
+
+    presolved_price_points = {}
+    pruned_inventory_capped = 0
+    # Products without constraints only depend on their price points, which are shared between
+    # products with identical curves: they are presolved once per list of price points
+    unconstrained_results: dict[tuple[int, int], tuple[list[PricePoint], int]] = {}
+    for product_id, points in price_points.items():
+        product_constraints = constraints_by_product.get(product_id, [])
+        unconstrained_key = (id(points), inventories[product_id])
+        if not product_constraints and unconstrained_key in unconstrained_results:
+            presolved_points, pruned = unconstrained_results[unconstrained_key]
+            presolved_price_points[product_id] = presolved_points
+            pruned_inventory_capped += pruned
+            continue
+
+        costs = []
+        for point in points:
+            cost = []
+            for constraint in product_constraints:
+                contribution = _constraint_contribution(constraint, product_id, point)
+                # Costs are oriented such that lower is always better for the constraint
+                if constraint.sense in {"<=", "=="}:
+                    cost.append(contribution)
+                if constraint.sense in {">=", "=="}:
+                    cost.append(-contribution)
+            costs.append(tuple(cost))
+
+        kept_points = _pareto_front(points, costs)
+        # Points explicitly referenced through x must remain available to the constraints
+        referenced_prices = {
+            term[2]
+            for constraint in product_constraints
+            for term in constraint.expression.terms
+            if term[0] == "x" and term[1] == product_id
+        }
+        kept_prices = {point.price for point in kept_points} | referenced_prices
+        presolved_price_points[product_id] = [
+            point for point in points if point.price in kept_prices
+        ]
+        pruned = sum(
+            point.price not in kept_prices and point.sales == inventories[product_id]
+            for point in points
+        )
+        pruned_inventory_capped += pruned
+        if not product_constraints:
+            unconstrained_results[unconstrained_key] = (
+                presolved_price_points[product_id],
+                pruned,
+            )
+
+    price_points_after = sum(len(points) for points in presolved_price_points.values())
+    report = PresolveReport(
+        price_points_before=price_points_before,
+        price_points_after=price_points_after,
+        pruned_inventory_capped=pruned_inventory_capped,
+        pruned_dominated=price_points_before
+        - price_points_after
+        - pruned_inventory_capped,
+    )
+    logger.info(
+        f"Presolve removed {price_points_before - price_points_after} of "
+        f"{price_points_before} price points "
+        f"({pruned_inventory_capped} below the inventory-capped price)"
+    )
+    return presolved_price_points, report
@@ -0,0 +1,254 @@
+import logging
+import time
+import numpy as np
+
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.types import (
+    PricePoint,
+    RobustPricingInput,
+    RobustPricingOutput,
+    RobustProductResult,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _lognormal_factors(
+    rng: np.random.Generator, cvs: np.ndarray, n_scenarios: int
+) -> np.ndarray:
+    # Factors with mean 1 and coefficient of variation `cvs`, shape (n_scenarios, n_products)
+    sigmas = np.sqrt(np.log1p(np.square(cvs)))
+    return np.exp(
+        rng.standard_normal((n_scenarios, len(cvs))) * sigmas - np.square(sigmas) / 2
+    )
+
+
+class RobustPricingOptimizer:
+    """
+    Pricing maximizing the expected revenue over sampled demand scenarios (sample average
+    approximation).
+
+    The market size and the conversion rate curve of each uncertain product are scaled by lognormal
+    factors with mean 1, sampled independently for each product and scenario. A single price is
+    selected per product, so the sample-average model is the deterministic model with the expected
+    sales and revenue of each price point: it keeps the presolve and the ad-hoc constraints (which
+    apply to the expected sales and revenue).
+
+    Sales of all the price points are computed at once (NumPy), by chunks of scenarios to bound the
+    memory. Price vectors are then scored in bulk over all the scenarios for the risk quantiles.
+    """
+
+    def __init__(
+        self,
+        n_scenarios: int = 1000,
+        seed: int = 0,
+        quantiles: tuple[float, ...] = (0.05, 0.5, 0.95),
+        chunk_size: int = 128,
+        verbose: bool = False,
+    ) -> None:
+        self.n_scenarios = n_scenarios
+        self.seed = seed
+        self.quantiles = quantiles
+        self.chunk_size = chunk_size
+        self.verbose = verbose
+
+        self.optim_input: RobustPricingInput | None = None
+        self.price_points: dict[str, list[PricePoint]] = {}
+        self.sampling_seconds = 0.0
+        # Price points of all the products, flattened: product index, price and conversion rate
+        self._point_products = np.empty(0, dtype=int)
+        self._point_prices = np.empty(0)
+        self._point_conversion_rates = np.empty(0)
+        self._point_index: dict[tuple[str, float], int] = {}
+        self._inventories = np.empty(0)
+        self._market_sizes = np.empty(0)
+        self._market_size_factors = np.empty((0, 0))
+        self._conversion_rate_factors = np.empty((0, 0))
+
+    def build_model(self, optim_input: RobustPricingInput) -> None:
+        start_time = time.perf_counter()
+        product_ids = optim_input.product_ids
+        curves = optim_input.conversion_rate_curves_dict
+        inventories = optim_input.inventories_dict
+        market_sizes = optim_input.market_sizes_dict
+        uncertainties = {
+            uncertainty.product_id: uncertainty
+            for uncertainty in optim_input.uncertainties
+        }
+
+        point_keys = [
+            (product_index, prediction)
+            for product_index, product_id in enumerate(product_ids)
+            for prediction in curves[product_id]
+        ]
+        self._point_products = np.array([index for index, _ in point_keys], dtype=int)
+        self._point_prices = np.array([p.price for _, p in point_keys])
+        self._point_conversion_rates = np.array(
+            [p.conversion_rate for _, p in point_keys]
+        )
+        self._point_index = {
+            (product_ids[index], prediction.price): point
+            for point, (index, prediction) in enumerate(point_keys)
+        }
+        self._inventories = np.array(
+            [inventories[product_id] for product_id in product_ids], dtype=float
+        )
+        self._market_sizes = np.array(
+            [market_sizes[product_id] for product_id in product_ids], dtype=float
+        )
+
+        rng = np.random.default_rng(self.seed)
+        self._market_size_factors = _lognormal_factors(
+            rng,
+            np.array(
+                [
+                    uncertainties[product_id].market_size_cv
+                    if product_id in uncertainties
+                    else 0.0
+                    for product_id in product_ids
+                ]
+            ),
+            self.n_scenarios,
+        )
+        self._conversion_rate_factors = _lognormal_factors(
+            rng,
+            np.array(
+                [
+                    uncertainties[product_id].conversion_rate_cv
+                    if product_id in uncertainties
+                    else 0.0
+                    for product_id in product_ids
+                ]
+            ),
+            self.n_scenarios,
+        )
+
+        # Expected sales of every price point over the scenarios
+        points = np.arange(len(point_keys))
+        total_sales = np.zeros(len(point_keys))
+        for start in range(0, self.n_scenarios, self.chunk_size):
+            scenarios = slice(start, start + self.chunk_size)
+            total_sales += self._sales(scenarios, points).sum(axis=0)
+        expected_sales = total_sales / self.n_scenarios
+
+        # NOTE: Expected sales are not rounded to units: the optimizer would pick the prices whose
+        #  sales are rounded down and overshoot constraints on the sales. With fractional sales,
+        #  the knapsack engine rarely applies (partial solutions do not share the same sales).
+        price_points: dict[str, list[PricePoint]] = {
+            product_id: [] for product_id in product_ids
+        }
+        for (product_index, prediction), sales in zip(point_keys, expected_sales):
+            price_points[product_ids[product_index]].append(
+                PricePoint(
+                    prediction.price, float(sales), float(prediction.price * sales)
+                )
+            )
+
+        self.optim_input = optim_input
+        self.price_points = price_points
+        self.sampling_seconds = time.perf_counter() - start_time
+        logger.info(
+            f"Sampled {self.n_scenarios} scenarios of {len(point_keys)} price points "
+            f"in {self.sampling_seconds:.3f}s"
+        )
+
+    def _sales(self, scenarios: slice, points: np.ndarray) -> np.ndarray:
+        # Same definition as the deterministic model, in each scenario:
+        # sales = min(demand, inventory) = min(conversion_rate * market_size, inventory)
+        products = self._point_products[points]
+        conversion_rates = np.minimum(
+            self._point_conversion_rates[points]
+            * self._conversion_rate_factors[scenarios][:, products],
+            1.0,
+        )
+        demand = (
+            conversion_rates
+            * self._market_sizes[products]
+            * self._market_size_factors[scenarios][:, products]
+        )
+        return np.floor(np.minimum(demand, self._inventories[products]))
+
+    def score(self, candidates: list[dict[str, float]]) -> np.ndarray:
+        """
+        Total revenue of price vectors in every scenario.
+
+        Args:
+            candidates (list[dict[str, float]]): Price of each product, for each candidate.
+
+        Returns:
+            np.ndarray: Revenues, of shape (number of candidates, number of scenarios).
+        """
+        if self.optim_input is None:
+            raise RuntimeError("Model must be built before scoring")
+
+        revenues = np.zeros((len(candidates), self.n_scenarios))
+        for candidate_index, prices in enumerate(candidates):
+            points = np.array(
+                [
+                    self._point_index[product_id, prices[product_id]]
+                    for product_id in self.optim_input.product_ids
+                ],
+                dtype=int,
+            )
+            for start in range(0, self.n_scenarios, self.chunk_size):
+                scenarios = slice(start, start + self.chunk_size)
+                revenues[candidate_index, scenarios] = (
+                    self._sales(scenarios, points) @ self._point_prices[points]
+                )
+        return revenues
+
+    def _solve_prices(
+        self, price_points: dict[str, list[PricePoint]] | None
+    ) -> dict[str, float]:
+        optimizer = PricingOptimizer(verbose=self.verbose)
+        optimizer.build_model(self.optim_input, price_points)
+        if optimizer.knapsack_solution is not None:
+            return {
+                product_id: point.price
+                for product_id, point in optimizer.knapsack_solution.items()
+            }
+        status = optimizer.solver.Solve()
+        optimizer.raise_exception_if_model_did_not_solve(status)
+        return {
+            product_id: price
+            for (product_id, price), variable in optimizer.x.items()
+            if variable.solution_value() > 0.5
+        }
+
+    def solve(self) -> RobustPricingOutput:
+        if self.optim_input is None:
+            raise RuntimeError("Model must be built before solving")
+
+        start_time = time.perf_counter()
+        prices = self._solve_prices(self.price_points)
+        solve_seconds = time.perf_counter() - start_time
+
+        # The prices optimized for the nominal demand show what the robust mode gains
+        nominal_prices = self._solve_prices(None)
+        revenues, nominal_revenues = self.score([prices, nominal_prices])
+
+        points = {
+            (product_id, point.price): point
+            for product_id, product_points in self.price_points.items()
+            for point in product_points
+        }
+        product_results = [
+            RobustProductResult(
+                product_id=product_id,
+                price=price,
+                expected_revenue=points[product_id, price].revenue,
+                expected_sales=points[product_id, price].sales,
+            )
+            for product_id, price in prices.items()
+        ]
+        return RobustPricingOutput(
+            product_results=product_results,
+            n_scenarios=self.n_scenarios,
+            expected_revenue=float(revenues.mean()),
+            revenue_quantiles=dict(
+                zip(self.quantiles, np.quantile(revenues, self.quantiles).tolist())
+            ),
+            nominal_expected_revenue=float(nominal_revenues.mean()),
+            sampling_seconds=self.sampling_seconds,
+            solve_seconds=solve_seconds,
+        )
@@ -0,0 +1,268 @@
+import json
+import logging
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from optimaizer.pricing_optimizer.curves import CurveKey, curve_key
+from optimaizer.pricing_optimizer.types import (
+    ConversionRateCurve,
+    Inventory,
+    MarketSize,
+    Prediction,
+    PricePoint,
+    PricingOptimizerInput,
+)
+
+logger = logging.getLogger(__name__)
+
+# Number of products, of distinct curves and of curve points, and size of the encoded product IDs
+_HEADER = np.dtype(
+    [
+        ("n_products", "<i8"),
+        ("n_curves", "<i8"),
+        ("n_points", "<i8"),
+        ("ids_nbytes", "<i8"),
+    ]
+)
+
+
+class SharedCatalog:
+    """
+    Catalog data packed into a single shared memory block, written once by the service and
+    attached zero-copy by the worker processes (instead of each worker loading its own frames and
+    pydantic curves).
+
+    Layout of the block: a header, then the arrays `product_curves` (curve of each product),
+    `curve_offsets` (the points of the c-th curve are `curve_offsets[c]:curve_offsets[c + 1]`),
+    `inventories`, `market_sizes`, `prices` and `conversion_rates`, then the product IDs encoded
+    as JSON. Identical curves are stored once, and curves are sorted by price.
+
+    NOTE: The block is immutable once created, a new block is created when curves change. The
+     creator owns the block and unlinks it, processes that attached to it only close it.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        self._shm = shm
+        self._owner = owner
+        header = np.frombuffer(shm.buf, dtype=_HEADER, count=1)[0]
+        n_products, n_curves = int(header["n_products"]), int(header["n_curves"])
+        n_points = int(header["n_points"])
+
+        offset = _HEADER.itemsize
+        arrays = {}
+        for name, dtype, count in (
+            ("product_curves", np.int64, n_products),
+            ("curve_offsets", np.int64, n_curves + 1),
+            ("inventories", np.int64, n_products),
+            ("market_sizes", np.int64, n_products),
+            ("prices", np.float64, n_points),
+            ("conversion_rates", np.float64, n_points),
+        ):
+            array = np.frombuffer(shm.buf, dtype=dtype, count=count, offset=offset)
+            array.flags.writeable = False
+            arrays[name] = array
+            offset += array.nbytes
+        self.product_curves: np.ndarray = arrays["product_curves"]
+        self.curve_offsets: np.ndarray = arrays["curve_offsets"]
+        self.inventories: np.ndarray = arrays["inventories"]
+        self.market_sizes: np.ndarray = arrays["market_sizes"]
+        self.prices: np.ndarray = arrays["prices"]
+        self.conversion_rates: np.ndarray = arrays["conversion_rates"]
+
+        self.product_ids: list[str] = json.loads(
+            bytes(shm.buf[offset : offset + int(header["ids_nbytes"])])
+        )
+        self._product_indices = {
+            product_id: index for index, product_id in enumerate(self.product_ids)
+        }
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @classmethod
+    def create(cls, optim_input: PricingOptimizerInput) -> "SharedCatalog":
+        """Copy the products, curves, inventories and market sizes into a new shared block."""
+        product_ids = list(optim_input.product_ids)
+        curves = optim_input.conversion_rate_curves_dict
+        inventories = optim_input.inventories_dict
+        market_sizes = optim_input.market_sizes_dict
+        # Index of each distinct curve (sorted by price), in order of first use
+        curve_indices: dict[CurveKey, int] = {}
+        # Interned curves are only sorted once
+        curve_indices_by_id: dict[int, int] = {}
+        product_curves = np.zeros(len(product_ids), dtype=np.int64)
+        for index, product_id in enumerate(product_ids):
+            curve = curves[product_id]
+            if id(curve) not in curve_indices_by_id:
+                key = curve_key(sorted(curve, key=lambda prediction: prediction.price))
+                curve_indices_by_id[id(curve)] = curve_indices.setdefault(
+                    key, len(curve_indices)
+                )
+            product_curves[index] = curve_indices_by_id[id(curve)]
+        sorted_curves = list(curve_indices)
+        curve_offsets = np.zeros(len(sorted_curves) + 1, dtype=np.int64)
+        np.cumsum([len(curve) for curve in sorted_curves], out=curve_offsets[1:])
+        encoded_product_ids = json.dumps(product_ids).encode()
+
+        arrays = [
+            product_curves,
+            curve_offsets,
+            np.array([inventories[p] for p in product_ids], dtype=np.int64),
+            np.array([market_sizes[p] for p in product_ids], dtype=np.int64),
+            np.array([price for curve in sorted_curves for price, _ in curve]),
+            np.array([rate for curve in sorted_curves for _, rate in curve]),
+        ]
+        header = np.array(
+            [
+                (
+                    len(product_ids),
+                    len(sorted_curves),
+                    int(curve_offsets[-1]),
+                    len(encoded_product_ids),
+                )
+            ],
+            dtype=_HEADER,
+        )
+        size = (
+            header.nbytes
+            + sum(array.nbytes for array in arrays)
+            + len(encoded_product_ids)
+        )
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        offset = 0
+        for array in (header, *arrays):
+            shm.buf[offset : offset + array.nbytes] = array.tobytes()
+            offset += array.nbytes
+        shm.buf[offset : offset + len(encoded_product_ids)] = encoded_product_ids
+        logger.info(
+            f"Created shared catalog {shm.name}: {len(product_ids)} products, "
+            f"{len(sorted_curves)} distinct curves of {int(curve_offsets[-1])} points in total "
+            f"({size} bytes)"
+        )
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedCatalog":
+        """Map a block created by `SharedCatalog.create` (in another process), without copy."""
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    def close(self) -> None:
+        """Unmap the block (and delete it, in the process which created it)."""
+        # The array views must be released before the buffer can be closed
+        self.product_curves = self.curve_offsets = None
+        self.inventories = self.market_sizes = None
+        self.prices = self.conversion_rates = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self) -> "SharedCatalog":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _indices(self, product_ids: list[str]) -> np.ndarray:
+        unknown_product_ids = [
+            product_id
+            for product_id in product_ids
+            if product_id not in self._product_indices
+        ]
+        if unknown_product_ids:
+            raise ValueError(f"Unknown products: {unknown_product_ids}")
+        return np.array(
+            [self._product_indices[product_id] for product_id in product_ids],
+            dtype=np.int64,
+        )
+
+    def curve(self, product_id: str) -> list[Prediction]:
+        (index,) = self._indices([product_id])
+        curve = self.product_curves[index]
+        points = slice(self.curve_offsets[curve], self.curve_offsets[curve + 1])
+        return [
+            Prediction.model_construct(price=price, conversion_rate=conversion_rate)
+            for price, conversion_rate in zip(
+                self.prices[points].tolist(), self.conversion_rates[points].tolist()
+            )
+        ]
+
+    def optimizer_input(
+        self, product_ids: list[str] | None = None, with_curves: bool = False
+    ) -> PricingOptimizerInput:
+        """
+        Pricing optimizer input with the inventories and market sizes of the block. Curves are
+        only materialized on demand (e.g. for `ModelStore` keys), `PricingOptimizer.build_model`
+        reads them from the block.
+        """
+        product_ids = self.product_ids if product_ids is None else product_ids
+        indices = self._indices(product_ids).tolist()
+        return PricingOptimizerInput.model_construct(
+            product_ids=list(product_ids),
+            conversion_rate_curves=[
+                ConversionRateCurve.model_construct(
+                    product_id=product_id, curve=self.curve(product_id)
+                )
+                for product_id in product_ids
+            ]
+            if with_curves
+            else [],
+            inventories=[
+                Inventory.model_construct(product_id=product_id, inventory=inventory)
+                for product_id, inventory in zip(
+                    product_ids, self.inventories[indices].tolist()
+                )
+            ],
+            market_sizes=[
+                MarketSize.model_construct(
+                    product_id=product_id, market_size=market_size
+                )
+                for product_id, market_size in zip(
+                    product_ids, self.market_sizes[indices].tolist()
+                )
+            ],
+            adhoc_ortools_constraints=[],
+        )
+
+    def price_points(
+        self,
+        product_ids: list[str],
+        inventories: dict[str, int],
+        market_sizes: dict[str, int],
+    ) -> dict[str, list[PricePoint]]:
+        """
+        Price points of the products, computed for all the points at once. Same values as
+        `compute_price_points` on the curves of the block.
+        """
+        curves = self.product_curves[self._indices(product_ids)]
+        starts = self.curve_offsets[curves]
+        counts = self.curve_offsets[curves + 1] - starts
+        # Index of every point of the products, and the position of its product in `product_ids`
+        point_products = np.repeat(np.arange(len(product_ids)), counts)
+        points = (
+            np.arange(counts.sum())
+            - np.repeat(np.cumsum(counts) - counts, counts)
+            + starts[point_products]
+        )
+
+        prices = self.prices[points]
+        # sales = min(demand, inventory) = min(conversion_rate * market_size, inventory)
+        sales = np.minimum(
+            np.array([inventories[p] for p in product_ids], dtype=float)[
+                point_products
+            ],
+            self.conversion_rates[points]
+            * np.array([market_sizes[p] for p in product_ids], dtype=float)[
+                point_products
+            ],
+        ).astype(np.int64)
+        all_points = list(
+            map(PricePoint, prices.tolist(), sales.tolist(), (prices * sales).tolist())
+        )
+
+        bounds = np.concatenate([[0], np.cumsum(counts)]).tolist()
+        return {
+            product_id: all_points[start:end]
+            for product_id, start, end in zip(product_ids, bounds, bounds[1:])
+        }
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from enum import StrEnum, unique
+from typing import Any, Literal, NamedTuple
+from pydantic import BaseModel, SerializerFunctionWrapHandler, model_serializer
 
 
 class Prediction(BaseModel):
@@ -11,6 +13,13 @@ class ConversionRateCurve(BaseModel):
     curve: list[Prediction]
 
 
+class PricePoint(NamedTuple):
+    # NOTE: Not a pydantic model, price points are created in bulk when building the model
+    price: float
+    sales: int
+    revenue: float
+
+
 class Inventory(BaseModel):
     product_id: str
     inventory: int
@@ -46,6 +55,15 @@ class PricingOptimizerInput(BaseModel):
         }
 
 
+class PresolveReport(BaseModel):
+    price_points_before: int
+    price_points_after: int
+    # Prices below the highest price that already sells the whole inventory
+    pruned_inventory_capped: int
+    # Price points beaten on revenue and on every ad-hoc constraint by another price of the product
+    pruned_dominated: int
+
+
 class ProductResult(BaseModel):
     product_id: str
     price: float
@@ -58,9 +76,185 @@ class ProductRevenue(BaseModel):
     revenue: float
 
 
+@unique
+class SolveStatus(StrEnum):
+    OPTIMAL = "optimal"
+    # A feasible solution was found but the deadline was reached before proving optimality
+    FEASIBLE = "feasible"
+
+
+class SolveProgress(BaseModel):
+    incumbent_value: float | None
+    best_bound: float | None
+    elapsed_seconds: float
+
+
 class PricingOptimizerOutput(BaseModel):
     product_results: list[ProductResult]
+    status: SolveStatus = SolveStatus.OPTIMAL
+    # Relative gap between the returned solution and the best bound on the optimal revenue
+    optimality_gap: float = 0.0
 
     @property
     def total_revenue(self) -> float:
         return sum(product_result.revenue for product_result in self.product_results)
+
+
+class LocationInventory(BaseModel):
+    location_id: str
+    product_id: str
+    inventory: int
+
+
+class LocationMarketSize(BaseModel):
+    location_id: str
+    product_id: str
+    period: int
+    market_size: int
+
+
+class MultiPeriodPricingInput(BaseModel):
+    product_ids: list[str]
+    location_ids: list[str]
+    n_periods: int
+    conversion_rate_curves: list[ConversionRateCurve]
+    # Inventory available at the start of the first period, carried over between periods
+    inventories: list[LocationInventory]
+    market_sizes: list[LocationMarketSize]
+    # Ad-hoc constraints are injected in every (location, period) subproblem
+    adhoc_ortools_constraints: list[str] = []
+
+    @property
+    def conversion_rate_curves_dict(self) -> dict[str, list[Prediction]]:
+        return {curve.product_id: curve.curve for curve in self.conversion_rate_curves}
+
+    @property
+    def inventories_dict(self) -> dict[tuple[str, str], int]:
+        return {
+            (inventory.location_id, inventory.product_id): inventory.inventory
+            for inventory in self.inventories
+        }
+
+    @property
+    def market_sizes_dict(self) -> dict[tuple[str, str, int], int]:
+        return {
+            (
+                market_size.location_id,
+                market_size.product_id,
+                market_size.period,
+            ): market_size.market_size
+            for market_size in self.market_sizes
+        }
+
+
+class MultiPeriodProductResult(ProductResult):
+    location_id: str
+    period: int
+
+
+class LagrangianIteration(BaseModel):
+    iteration: int
+    lower_bound: float
+    upper_bound: float
+    gap: float
+    step_size: float
+    elapsed_seconds: float
+
+
+class MultiPeriodPricingOutput(BaseModel):
+    product_results: list[MultiPeriodProductResult]
+    iterations: list[LagrangianIteration]
+
+    @property
+    def total_revenue(self) -> float:
+        return sum(product_result.revenue for product_result in self.product_results)
+
+    @property
+    def gap(self) -> float:
+        return self.iterations[-1].gap if self.iterations else float("inf")
+
+
+class ModelFeatures(BaseModel):
+    n_products: int
+    n_price_points: int
+    n_adhoc_constraints: int
+    # Constraints involving several products, None if the constraints cannot be analyzed
+    n_coupling_constraints: int | None
+
+
+class PortfolioRun(BaseModel):
+    features: ModelFeatures
+    winner: str
+    status: SolveStatus
+    total_revenue: float
+    # Time to solve of each backend, None if it was cancelled or failed
+    solve_seconds: dict[str, float | None]
+
+
+class CatalogDelta(BaseModel):
+    # Partial update of the catalog: only the products listed are changed
+    inventories: list[Inventory] = []
+    market_sizes: list[MarketSize] = []
+    # Points appended to the conversion rate curves (replacing the points at the same price)
+    curve_points: list[ConversionRateCurve] = []
+
+
+class CatalogChange(BaseModel):
+    version: int
+    # Products whose inventory, market size or curve changed
+    product_ids: list[str]
+    # Products whose curve changed: models built with them are stale
+    curve_product_ids: list[str]
+
+
+class DemandUncertainty(BaseModel):
+    product_id: str
+    # Relative standard deviations (coefficients of variation) of the lognormal scenario factors
+    # applied to the market size and to the whole conversion rate curve
+    market_size_cv: float = 0.0
+    conversion_rate_cv: float = 0.0
+
+
+class RobustPricingInput(PricingOptimizerInput):
+    # Products without an entry keep their market size and conversion rate curve in all scenarios
+    uncertainties: list[DemandUncertainty] = []
+
+
+class RobustProductResult(BaseModel):
+    product_id: str
+    price: float
+    expected_revenue: float
+    expected_sales: float
+
+
+class RobustPricingOutput(BaseModel):
+    product_results: list[RobustProductResult]
+    n_scenarios: int
+    expected_revenue: float
+    # Quantiles of the total revenue over the scenarios (e.g. 0.05 -> 5% value at risk)
+    revenue_quantiles: dict[float, float]
+    # Expected revenue, over the same scenarios, of the prices optimized for the nominal demand
+    nominal_expected_revenue: float
+    sampling_seconds: float
+    solve_seconds: float
+
+
+ProductParameterField = Literal["conversion_rate_curve", "inventory", "market_size"]
+
+
+class ProductParameters(BaseModel):
+    product_id: str
+    # Only the requested fields are set (and serialized)
+    inventory: int | None = None
+    market_size: int | None = None
+    conversion_rate_curve: list[Prediction] | None = None
+
+    @model_serializer(mode="wrap")
+    def _serialize_requested_fields(
+        self, handler: SerializerFunctionWrapHandler
+    ) -> dict[str, Any]:
+        return {key: value for key, value in handler(self).items() if value is not None}
+
+
+class ProductParametersQueryResult(BaseModel):
+    products: list[ProductParameters]
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+import posixpath
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+import openpyxl
+import pandas as pd
+
+from optimaizer.pricing_optimizer.model_store import _write_atomically
+
+logger = logging.getLogger(__name__)
+
+# Sheets of the source workbook read by the pricing optimizer loader (`load_data_from_csv`)
+PRICING_SHEETS = ("conversion_rate", "inventory", "market_size")
+# Bumped when the parsing changes, to invalidate the cached sheets
+_PARSER_VERSION = 1
+# Parts of the workbook that every sheet depends on: cell strings and number formats
+_SHARED_PARTS = ("xl/sharedStrings.xml", "xl/styles.xml")
+_NAMESPACES = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "relationships": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "package": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+
+
+def _sheet_parts(archive: zipfile.ZipFile) -> dict[str, str]:
+    # Sheet names are listed in the workbook part, their files in its relationships
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    relationships = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    targets = {
+        relationship.get("Id"): relationship.get("Target")
+        for relationship in relationships.iterfind("package:Relationship", _NAMESPACES)
+    }
+    parts = {}
+    for sheet in workbook.iterfind("main:sheets/main:sheet", _NAMESPACES):
+        target = targets[sheet.get(f"{{{_NAMESPACES['relationships']}}}id")]
+        parts[sheet.get("name")] = (
+            target.lstrip("/")
+            if target.startswith("/")
+            else posixpath.normpath(posixpath.join("xl", target))
+        )
+    return parts
+
+
+def _parse_sheet(worksheet) -> pd.DataFrame:
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, ())
+    # Only the named columns are kept, cells around the table (e.g. notes) are ignored
+    columns = {index: name for index, name in enumerate(header) if name is not None}
+    records = [
+        [row[index] if index < len(row) else None for index in columns]
+        for row in rows
+        if any(cell is not None for cell in row)
+    ]
+    return pd.DataFrame(records, columns=[str(name) for name in columns.values()])
+
+
+class WorkbookCache:
+    """
+    Cache of the sheets parsed from Excel workbooks (openpyxl is slow on large workbooks).
+
+    A workbook whose content (SHA-256) was already loaded is read from the cache without opening
+    it. Otherwise each sheet is keyed by the checksum of its part in the workbook archive (plus the
+    shared strings and styles it depends on), read from the zip directory without decompressing:
+    only the sheets whose content changed are parsed again.
+
+    Parsed sheets are stored as CSV files with their column dtypes, named after their key
+    (`sheets/<key>.csv` and `.json`), and each workbook hash maps to the keys of its sheets
+    (`workbooks/<hash>.json`).
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        (self.directory / "sheets").mkdir(parents=True, exist_ok=True)
+        (self.directory / "workbooks").mkdir(parents=True, exist_ok=True)
+        # Sheets parsed by the last call to `load`, the others came from the cache
+        self.parsed_sheets: list[str] = []
+
+    def load(
+        self, path: str | Path, sheet_names: tuple[str, ...] = PRICING_SHEETS
+    ) -> dict[str, pd.DataFrame]:
+        """
+        Load sheets of a workbook, as data frames whose first row is the header.
+
+        Args:
+            path (str | Path): Path of the workbook (.xlsx).
+            sheet_names (tuple[str, ...]): Names of the sheets to load.
+
+        Returns:
+            dict[str, pd.DataFrame]: The data frame of each sheet.
+        """
+        path = Path(path)
+        content = path.read_bytes()
+        workbook_path = (
+            self.directory / "workbooks" / f"{hashlib.sha256(content).hexdigest()}.json"
+        )
+        sheet_keys = (
+            json.loads(workbook_path.read_text()) if workbook_path.exists() else {}
+        )
+        self.parsed_sheets = []
+        if not all(
+            sheet_name in sheet_keys
+            and self._sheet_path(sheet_keys[sheet_name]).exists()
+            for sheet_name in sheet_names
+        ):
+            sheet_keys = self._update_sheets(path, sheet_names)
+            _write_atomically(workbook_path, json.dumps(sheet_keys).encode())
+
+        logger.info(
+            f"Loaded {len(sheet_names)} sheets of {path.name} "
+            f"({len(self.parsed_sheets)} parsed, the others from the cache)"
+        )
+        return {
+            sheet_name: self._read_sheet(sheet_keys[sheet_name])
+            for sheet_name in sheet_names
+        }
+
+    def _sheet_path(self, key: str) -> Path:
+        return self.directory / "sheets" / f"{key}.csv"
+
+    def _update_sheets(
+        self, path: Path, sheet_names: tuple[str, ...]
+    ) -> dict[str, str]:
+        # Keys of the sheets from the zip directory, the sheets not in the cache are parsed
+        with zipfile.ZipFile(path) as archive:
+            sheet_parts = _sheet_parts(archive)
+            missing_sheet_names = [
+                sheet_name
+                for sheet_name in sheet_names
+                if sheet_name not in sheet_parts
+            ]
+            if missing_sheet_names:
+                raise ValueError(
+                    f"Missing sheets {missing_sheet_names} in workbook {path.name}"
+                )
+            members = {info.filename: info for info in archive.infolist()}
+            shared_parts = [
+                (part, members[part].CRC, members[part].file_size)
+                for part in _SHARED_PARTS
+                if part in members
+            ]
+            sheet_keys = {}
+            for sheet_name in sheet_names:
+                member = members[sheet_parts[sheet_name]]
+                sheet_keys[sheet_name] = hashlib.sha256(
+                    json.dumps(
+                        [
+                            _PARSER_VERSION,
+                            member.CRC,
+                            member.file_size,
+                            shared_parts,
+                        ]
+                    ).encode()
+                ).hexdigest()
+
+        changed_sheet_names = [
+            sheet_name
+            for sheet_name in sheet_names
+            if not self._sheet_path(sheet_keys[sheet_name]).exists()
+        ]
+        if changed_sheet_names:
+            # NOTE: In read-only mode, only the sheets which are iterated are parsed
+            workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+            try:
+                for sheet_name in changed_sheet_names:
+                    self._write_sheet(
+                        sheet_keys[sheet_name], _parse_sheet(workbook[sheet_name])
+                    )
+            finally:
+                workbook.close()
+        self.parsed_sheets = changed_sheet_names
+        return sheet_keys
+
+    def _write_sheet(self, key: str, df: pd.DataFrame) -> None:
+        # NOTE: The dtypes are stored along the CSV so that it is read back exactly as parsed
+        #  (e.g. product IDs made of digits remain strings)
+        _write_atomically(
+            self._sheet_path(key).with_suffix(".json"),
+            json.dumps(
+                {column: str(dtype) for column, dtype in df.dtypes.items()}
+            ).encode(),
+        )
+        _write_atomically(self._sheet_path(key), df.to_csv(index=False).encode())
+
+    def _read_sheet(self, key: str) -> pd.DataFrame:
+        dtypes = json.loads(self._sheet_path(key).with_suffix(".json").read_text())
+        return pd.read_csv(
+            self._sheet_path(key),
+            dtype={
+                column: str if dtype == "object" else dtype
+                for column, dtype in dtypes.items()
+            },
+        )
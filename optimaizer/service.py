@@ -0,0 +1,483 @@
+# HTTP (ASGI) service exposing the pricing optimizer to batch jobs and other services.
+# To run the service: `uvicorn optimaizer.service:app --port 8000` (or any other ASGI server)
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing.pool import AsyncResult, Pool
+from multiprocessing.queues import SimpleQueue
+from typing import Any, Awaitable, Callable
+
+from pydantic import BaseModel, ValidationError
+
+from optimaizer.pricing_optimizer.functions import (
+    get_catalog,
+    get_default_pricing_parameters,
+)
+from optimaizer.pricing_optimizer.constraints import validate_constraints
+from optimaizer.pricing_optimizer.model_store import ModelStore
+from optimaizer.pricing_optimizer.optimizer import (
+    InfeasibleProblemError,
+    PricingOptimizer,
+)
+from optimaizer.pricing_optimizer.shared_catalog import SharedCatalog
+from optimaizer.pricing_optimizer.types import (
+    CatalogDelta,
+    ConversionRateCurve,
+    Inventory,
+    MarketSize,
+    PricingOptimizerInput,
+)
+
+logger = logging.getLogger(__name__)
+
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+
+# Catalog shared by the service, attached once per worker process when the pool starts
+_WORKER_SHARED_CATALOG: SharedCatalog | None = None
+_WORKER_MODEL_STORE: ModelStore | None = None
+# Workers report the jobs they start (job ID, process ID), to detect the jobs lost with their worker
+_WORKER_STARTED_JOBS: SimpleQueue | None = None
+# Delay between two checks of the workers of a pending request
+_JOB_CHECK_INTERVAL_SECONDS = 0.5
+# A job whose worker is gone is failed after this delay, in case its result is still on its way
+_LOST_JOB_GRACE_SECONDS = 1.0
+
+
+class WorkerLostError(RuntimeError):
+    pass
+
+
+class OptimizeRequest(BaseModel):
+    product_ids: list[str]
+    inventories: list[Inventory]
+    market_sizes: list[MarketSize]
+    adhoc_ortools_constraints: list[str] = []
+    time_limit_seconds: float | None = None
+
+
+def _warm_up_worker(
+    shared_catalog_name: str,
+    started_jobs: SimpleQueue,
+    model_store_dir: str | None = None,
+) -> None:
+    global _WORKER_SHARED_CATALOG, _WORKER_MODEL_STORE, _WORKER_STARTED_JOBS
+    _WORKER_SHARED_CATALOG = SharedCatalog.attach(shared_catalog_name)
+    _WORKER_STARTED_JOBS = started_jobs
+    if model_store_dir is not None:
+        _WORKER_MODEL_STORE = ModelStore(model_store_dir)
+    # Solving once loads the solver libraries before the first request comes in
+    optimizer = PricingOptimizer(verbose=False)
+    optimizer.build_model(
+        _WORKER_SHARED_CATALOG.optimizer_input(), shared_catalog=_WORKER_SHARED_CATALOG
+    )
+    optimizer.solve()
+
+
+def _optimize_in_worker(
+    job_id: int, request: dict[str, Any], time_limit_seconds: float
+) -> dict[str, Any]:
+    _WORKER_STARTED_JOBS.put((job_id, os.getpid()))
+    # Invalid constraints are reported before building the model, like `optimize_pricing` does
+    if request["adhoc_ortools_constraints"]:
+        errors = validate_constraints(
+            request["adhoc_ortools_constraints"],
+            {
+                product_id: [
+                    prediction.price
+                    for prediction in _WORKER_SHARED_CATALOG.curve(product_id)
+                ]
+                for product_id in request["product_ids"]
+            },
+        )
+        if errors:
+            raise ValueError("\n".join(errors))
+    # NOTE: The request was validated by the service (`OptimizeRequest`) before reaching the worker
+    optim_input = PricingOptimizerInput.model_construct(
+        product_ids=request["product_ids"],
+        inventories=[
+            Inventory.model_construct(**inventory)
+            for inventory in request["inventories"]
+        ],
+        market_sizes=[
+            MarketSize.model_construct(**market_size)
+            for market_size in request["market_sizes"]
+        ],
+        # Curves are read from the shared catalog, they are only materialized for the model store
+        conversion_rate_curves=[
+            ConversionRateCurve.model_construct(
+                product_id=product_id, curve=_WORKER_SHARED_CATALOG.curve(product_id)
+            )
+            for product_id in request["product_ids"]
+        ]
+        if _WORKER_MODEL_STORE is not None
+        else [],
+        adhoc_ortools_constraints=request["adhoc_ortools_constraints"],
+    )
+    if _WORKER_MODEL_STORE is not None:
+        optimizer = _WORKER_MODEL_STORE.load_or_build(optim_input)
+    else:
+        optimizer = PricingOptimizer(verbose=False)
+        optimizer.build_model(optim_input, shared_catalog=_WORKER_SHARED_CATALOG)
+    return optimizer.solve(time_limit_seconds=time_limit_seconds).model_dump()
+
+
+@dataclass
+class _Job:
+    future: asyncio.Future
+    async_result: AsyncResult | None = None
+    # Worker process running the job, None while the job waits in the pool queue
+    pid: int | None = None
+    # When the worker was first found gone (`time.monotonic`)
+    worker_gone_at: float | None = None
+
+
+def _process_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@dataclass
+class ServiceMetrics:
+    requests_total: int = 0
+    rejected_total: int = 0
+    timeouts_total: int = 0
+    errors_total: int = 0
+    in_flight: int = 0
+    latencies_seconds: deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def summary(self, workers: int, max_queue_size: int) -> dict[str, Any]:
+        latencies = sorted(self.latencies_seconds)
+        return {
+            "workers": workers,
+            "max_queue_size": max_queue_size,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - workers),
+            "requests_total": self.requests_total,
+            "rejected_total": self.rejected_total,
+            "timeouts_total": self.timeouts_total,
+            "errors_total": self.errors_total,
+            "p50_latency_seconds": _percentile(latencies, 0.50),
+            "p95_latency_seconds": _percentile(latencies, 0.95),
+            "p99_latency_seconds": _percentile(latencies, 0.99),
+        }
+
+
+def _percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class OptimizationService:
+    """
+    ASGI application routing optimization requests to a bounded pool of pre-warmed solver processes.
+
+    Endpoints:
+        • POST /optimize: same arguments as `optimize_pricing`, plus an optional `time_limit_seconds`
+        • GET /default-parameters: same output as `get_default_pricing_parameters`
+        • POST /catalog/delta: partial update of the catalog (`CatalogDelta`)
+        • GET /health and GET /metrics
+
+    At most `workers` requests are solved concurrently and `max_queue_size` more can wait for a
+    worker. Beyond that requests are rejected with `503` (backpressure). Invalid requests (e.g.
+    constraints) are answered with `400`, solver failures with `500`.
+
+    NOTE: A worker process which dies (e.g. out of memory, crash of the native solver) loses its
+     job without notifying the pool. Workers report the jobs they start, and the jobs of workers
+     which are gone are failed (`500`) so that they do not stay in flight forever.
+
+    With a `model_store_dir`, workers share a `ModelStore` and skip the model construction for
+    catalogs that were already optimized.
+
+    The catalog is copied once into shared memory (`SharedCatalog`), which workers attach to
+    without copying it. Workers keep the block they were started with: when a delta changes
+    curves, the stored models of these products are evicted, and a new block and new workers are
+    created for the next requests. Inventories and market sizes come with each request, their
+    deltas only update the catalog.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_queue_size: int = 32,
+        default_time_limit_seconds: float = 30.0,
+        model_store_dir: str | None = None,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue_size = max_queue_size
+        self.default_time_limit_seconds = default_time_limit_seconds
+        self.model_store_dir = model_store_dir
+        self.metrics = ServiceMetrics()
+        self._pool: Pool | None = None
+        # Jobs submitted to the workers and not done yet, by job ID
+        self._jobs: dict[int, _Job] = {}
+        self._job_ids = itertools.count()
+        self._started_jobs: SimpleQueue | None = None
+        self._shared_catalog: SharedCatalog | None = None
+        # NOTE: Starting the workers takes seconds (catalog, shared memory, processes), it runs in a
+        #  thread (`asyncio.to_thread`) so the lock must not be bound to an event loop
+        self._workers_lock = threading.Lock()
+
+    def startup(self) -> Pool:
+        with self._workers_lock:
+            if self._pool is None:
+                context = multiprocessing.get_context("spawn")
+                if self._shared_catalog is None:
+                    self._shared_catalog = SharedCatalog.create(
+                        get_catalog().snapshot()
+                    )
+                if self._started_jobs is None:
+                    self._started_jobs = context.SimpleQueue()
+                logger.info(f"Starting {self.workers} solver workers")
+                self._pool = context.Pool(
+                    processes=self.workers,
+                    initializer=_warm_up_worker,
+                    initargs=(
+                        self._shared_catalog.name,
+                        self._started_jobs,
+                        self.model_store_dir,
+                    ),
+                )
+            return self._pool
+
+    def recycle_workers(self) -> None:
+        # The current workers finish their queued requests, new ones start on the next request
+        # NOTE: Unlinking the shared block only removes its name, the current workers keep their
+        #  mapping until they exit
+        with self._workers_lock:
+            if self._shared_catalog is not None:
+                self._shared_catalog.close()
+                self._shared_catalog = None
+            if self._pool is not None:
+                pool, self._pool = self._pool, None
+                pool.close()
+                threading.Thread(target=pool.join, daemon=True).start()
+
+    def shutdown(self) -> None:
+        with self._workers_lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
+            if self._shared_catalog is not None:
+                self._shared_catalog.close()
+                self._shared_catalog = None
+
+    async def __call__(
+        self, scope: dict[str, Any], receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+
+        if scope["type"] != "http":
+            return
+
+        route = (scope["method"], scope["path"].rstrip("/"))
+        if route == ("GET", "/health"):
+            await _send_json(send, 200, {"status": "ok", "workers": self.workers})
+        elif route == ("GET", "/metrics"):
+            self._reconcile_jobs()
+            await _send_json(
+                send, 200, self.metrics.summary(self.workers, self.max_queue_size)
+            )
+        elif route == ("GET", "/default-parameters"):
+            default_parameters = await asyncio.to_thread(get_default_pricing_parameters)
+            await _send_json(send, 200, default_parameters.model_dump())
+        elif route == ("POST", "/catalog/delta"):
+            await self._apply_catalog_delta(await _read_body(receive), send)
+        elif route == ("POST", "/optimize"):
+            await self._optimize(await _read_body(receive), send)
+        else:
+            await _send_json(send, 404, {"error": f"Unknown route {route}"})
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await asyncio.to_thread(self.startup)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.to_thread(self.shutdown)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _apply_catalog_delta(self, body: bytes, send: Send) -> None:
+        try:
+            delta = CatalogDelta.model_validate_json(body)
+        except ValidationError as e:
+            await _send_json(send, 422, {"error": json.loads(e.json())})
+            return
+
+        try:
+            change = await asyncio.to_thread(get_catalog().apply_delta, delta)
+        except ValueError as e:
+            await _send_json(send, 400, {"error": str(e)})
+            return
+
+        if change.curve_product_ids:
+            if self.model_store_dir is not None:
+                model_store = ModelStore(self.model_store_dir)
+                await asyncio.to_thread(model_store.evict, change.curve_product_ids)
+            await asyncio.to_thread(self.recycle_workers)
+        await _send_json(send, 200, change.model_dump())
+
+    async def _optimize(self, body: bytes, send: Send) -> None:
+        self.metrics.requests_total += 1
+        self._reconcile_jobs()
+        if self.metrics.in_flight >= self.workers + self.max_queue_size:
+            self.metrics.rejected_total += 1
+            await _send_json(
+                send, 503, {"error": "Too many requests in queue"}, retry_after=1
+            )
+            return
+
+        try:
+            request = OptimizeRequest.model_validate_json(body)
+        except ValidationError as e:
+            await _send_json(send, 422, {"error": json.loads(e.json())})
+            return
+
+        pool = await asyncio.to_thread(self.startup)
+        time_limit_seconds = (
+            request.time_limit_seconds or self.default_time_limit_seconds
+        )
+        loop = asyncio.get_running_loop()
+        job_id = next(self._job_ids)
+        job = _Job(future=loop.create_future())
+
+        # NOTE: A request stays in flight until its job is done on the worker, even once answered
+        #  with a timeout, so that the queue bound accounts for the jobs still running
+        def resolve(result: Any) -> None:
+            loop.call_soon_threadsafe(self._job_done, job_id, result, None)
+
+        def reject(error: BaseException) -> None:
+            loop.call_soon_threadsafe(self._job_done, job_id, None, error)
+
+        self._jobs[job_id] = job
+        self.metrics.in_flight += 1
+        start_time = time.perf_counter()
+        try:
+            try:
+                job.async_result = pool.apply_async(
+                    _optimize_in_worker,
+                    (job_id, request.model_dump(), time_limit_seconds),
+                    callback=resolve,
+                    error_callback=reject,
+                )
+            except Exception:
+                del self._jobs[job_id]
+                self.metrics.in_flight -= 1
+                raise
+            # NOTE: The solver stops itself at the time limit, the extra delay covers queuing and
+            #  model building. A request still running after that is answered with a timeout.
+            deadline = loop.time() + 2 * time_limit_seconds
+            while not job.future.done():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(job.future),
+                        timeout=min(remaining, _JOB_CHECK_INTERVAL_SECONDS),
+                    )
+                except asyncio.TimeoutError:
+                    self._reconcile_jobs()
+            result = job.future.result()
+        except asyncio.TimeoutError:
+            self.metrics.timeouts_total += 1
+            await _send_json(send, 504, {"error": "Optimization timed out"})
+            return
+        except Exception as e:
+            self.metrics.errors_total += 1
+            # Invalid requests (constraints, products) and infeasible problems are the client's
+            status = 400 if isinstance(e, (ValueError, InfeasibleProblemError)) else 500
+            await _send_json(send, status, {"error": str(e)})
+            return
+
+        self.metrics.latencies_seconds.append(time.perf_counter() - start_time)
+        await _send_json(send, 200, result)
+
+    def _job_done(self, job_id: int, result: Any, error: BaseException | None) -> None:
+        job = self._jobs.pop(job_id, None)
+        if job is None:  # Already failed as lost
+            return
+        self.metrics.in_flight -= 1
+        if error is not None:
+            _set_exception(job.future, error)
+        else:
+            _set_result(job.future, result)
+
+    def _reconcile_jobs(self) -> None:
+        # Fail the jobs whose worker process is gone: the pool never calls back for them
+        if self._started_jobs is not None:
+            while not self._started_jobs.empty():
+                job_id, pid = self._started_jobs.get()
+                if job_id in self._jobs:
+                    self._jobs[job_id].pid = pid
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.pid is None or (job.async_result and job.async_result.ready()):
+                continue
+            if _process_exists(job.pid):
+                job.worker_gone_at = None
+            elif job.worker_gone_at is None:
+                job.worker_gone_at = now
+            elif now - job.worker_gone_at >= _LOST_JOB_GRACE_SECONDS:
+                logger.error(f"Worker {job.pid} of job {job_id} is gone, job failed")
+                self._job_done(
+                    job_id,
+                    None,
+                    WorkerLostError(
+                        "The solver worker of the request stopped unexpectedly"
+                    ),
+                )
+
+
+def _set_result(future: asyncio.Future, result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, error: BaseException) -> None:
+    if not future.done():
+        future.set_exception(error)
+
+
+async def _read_body(receive: Receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return body
+
+
+async def _send_json(
+    send: Send, status: int, body: Any, retry_after: int | None = None
+) -> None:
+    payload = json.dumps(body).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(payload)).encode()),
+    ]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": payload})
+
+
+app = OptimizationService(model_store_dir=os.getenv("OPTIMAIZER_MODEL_STORE_DIR"))
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from optimaizer.utils.cancellation import CancellationToken, cancellation_scope
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Turn:
+    """Agent turn running in the background, polled by the event handler of its session."""
+
+    future: Future
+    token: CancellationToken = field(default_factory=CancellationToken)
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def cancel(self) -> None:
+        self.token.cancel()
+        self.future.cancel()
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started_at
+
+
+class TurnRunner:
+    """
+    Runs the agent turns of each session in a thread pool, so that event handlers only poll them
+    and other events of the session (new chat, regenerate) can cancel the turn in flight.
+
+    A session has at most one turn in flight: starting a turn cancels the previous one, and the
+    new turn only starts once the previous one has stopped (both use the agent of the session).
+
+    NOTE: Cancellation is cooperative (`CancellationToken`): the agent stops before its next LLM
+     request, and the optimizer right after its current solve (capped by the turn deadline).
+    """
+
+    def __init__(self, max_workers: int = 8) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="turn"
+        )
+        self._turns: dict[str, Turn] = {}
+        self._lock = threading.Lock()
+
+    def start(self, session_id: str, fn: Callable[..., Any], *args: Any) -> Turn:
+        """Cancel the turn in flight of the session, if any, and run `fn(*args)` after it."""
+        with self._lock:
+            previous_turn = self._turns.get(session_id)
+            if previous_turn is not None:
+                previous_turn.cancel()
+            token = CancellationToken()
+            turn = Turn(
+                future=self._executor.submit(
+                    self._run, previous_turn, token, fn, *args
+                ),
+                token=token,
+            )
+            self._turns[session_id] = turn
+        return turn
+
+    @staticmethod
+    def _run(
+        previous_turn: Turn | None,
+        token: CancellationToken,
+        fn: Callable[..., Any],
+        *args: Any,
+    ) -> Any:
+        if previous_turn is not None and not previous_turn.future.cancelled():
+            # Errors of the previous turn were reported to its own handler
+            previous_turn.future.exception()
+        with cancellation_scope(token):
+            token.raise_if_cancelled()
+            return fn(*args)
+
+    def cancel(self, session_id: str) -> bool:
+        """Cancel the turn in flight of the session. Returns whether there was one."""
+        with self._lock:
+            turn = self._turns.pop(session_id, None)
+        if turn is None or turn.done:
+            return False
+        logger.info(f"Cancelling the turn of session {session_id}")
+        turn.cancel()
+        return True
+
+    def finish(self, session_id: str, turn: Turn) -> None:
+        """Forget a completed turn (unless a newer turn of the session replaced it)."""
+        with self._lock:
+            if self._turns.get(session_id) is turn:
+                del self._turns[session_id]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            turns, self._turns = list(self._turns.values()), {}
+        for turn in turns:
+            turn.cancel()
+        self._executor.shutdown(wait=True)
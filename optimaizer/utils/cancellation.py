@@ -0,0 +1,52 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+
+class Cancelled(Exception):
+    """Raised by the work of a cancelled token, at its next checkpoint."""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation of a unit of work (e.g. an agent turn) running in another thread.
+
+    Long-running steps check the token at their checkpoints (between LLM requests, before and
+    after a solve) and stop by raising `Cancelled`. A step in progress is not interrupted, its
+    result is discarded at the next checkpoint.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled()
+
+
+# Token of the work running in the current thread (or task), for steps deep in the call stack
+# such as the tools called by the agent
+_CURRENT_TOKEN: ContextVar[CancellationToken | None] = ContextVar(
+    "cancellation_token", default=None
+)
+
+
+def current_token() -> CancellationToken | None:
+    return _CURRENT_TOKEN.get()
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken) -> Iterator[CancellationToken]:
+    reset_token = _CURRENT_TOKEN.set(token)
+    try:
+        yield token
+    finally:
+        _CURRENT_TOKEN.reset(reset_token)
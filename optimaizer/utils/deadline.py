@@ -0,0 +1,28 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+
+class DeadlineExceeded(Exception):
+    """Raised by a step which cannot complete before the deadline of its unit of work."""
+
+
+# Deadline (`time.perf_counter`) of the work running in the current thread (or task), e.g. the
+# time budget of an agent turn, for steps deep in the call stack such as LLM requests and tools
+_CURRENT_DEADLINE: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+def remaining_seconds() -> float | None:
+    """Time left before the current deadline (negative once passed), None without deadline."""
+    deadline = _CURRENT_DEADLINE.get()
+    return None if deadline is None else deadline - time.perf_counter()
+
+
+@contextmanager
+def deadline_scope(deadline: float | None) -> Iterator[float | None]:
+    reset_token = _CURRENT_DEADLINE.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _CURRENT_DEADLINE.reset(reset_token)
@@ -0,0 +1,17 @@
+from optimaizer.benchmarks.load_test import SCRIPTED_CONVERSATION, run_load_test
+from optimaizer.llm.stub_server import StubLLMServer
+
+
+def test_load_test_against_stub_server() -> None:
+    with StubLLMServer() as server:
+        report = run_load_test(sessions=2, base_url=server.base_url)
+
+    assert report.turns == 2 * len(SCRIPTED_CONVERSATION)
+    assert report.errors == 0
+    # Each turn fetches the default parameters, optimizes, then answers the user
+    assert server.request_count == 3 * report.turns
+    assert (
+        report.p50_latency_seconds
+        <= report.p95_latency_seconds
+        <= report.p99_latency_seconds
+    )
@@ -0,0 +1,36 @@
+from pathlib import Path
+from optimaizer.chat_store import ChatStore
+
+
+def test_chat_store_keeps_transcripts_across_connections(tmp_path: Path) -> None:
+    chat_store = ChatStore(tmp_path / "chats.sqlite3")
+    chat_id = chat_store.create_chat(title="Optimize pricing for product-A")
+    message_ids = [
+        chat_store.append_message(chat_id, role, f"message {index}")
+        for index, role in enumerate(["user", "bot"] * 3)
+    ]
+    chat_store.set_rating(message_ids[1], 1)
+    chat_store.update_content(
+        message_ids[-1], "regenerated", [{"product_results": [], "status": "optimal"}]
+    )
+
+    chat_store = ChatStore(tmp_path / "chats.sqlite3")
+    assert chat_store.titles([chat_id]) == {chat_id: "Optimize pricing for product-A"}
+    assert chat_store.count_messages(chat_id) == 6
+
+    last_messages = chat_store.last_messages(chat_id, limit=4)
+    assert [message.id for message in last_messages] == message_ids[2:]
+    assert last_messages[-1].content == "regenerated"
+    assert last_messages[-1].results == [{"product_results": [], "status": "optimal"}]
+    assert last_messages[-2].results == []
+    assert chat_store.last_messages(chat_id, limit=6)[1].rating == 1
+
+
+def test_chat_store_separates_chats() -> None:
+    chat_store = ChatStore()
+    first_chat_id = chat_store.create_chat(title="first")
+    second_chat_id = chat_store.create_chat(title="second")
+    chat_store.append_message(first_chat_id, "user", "hello")
+
+    assert chat_store.last_messages(second_chat_id, limit=10) == []
+    assert chat_store.titles([]) == {}
@@ -0,0 +1,172 @@
+from optimaizer.llm.transport import ReplayTransport
+from optimaizer.main import RENDERED_RESULTS_INSTRUCTION, start_pricing_agent
+from optimaizer.pricing_optimizer.types import (
+    PricingOptimizerInput,
+    PricingOptimizerOutput,
+)
+from optimaizer.utils.cancellation import (
+    CancellationToken,
+    Cancelled,
+    cancellation_scope,
+)
+from openai.types.chat import ChatCompletion
+from pathlib import Path
+import json
+import time
+from typing import Any
+import pytest
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "pricing_conversation.json"
+
+
+def test_agent_exposes_the_tool_results_of_the_turn() -> None:
+    replay_transport = ReplayTransport(FIXTURE_PATH)
+    agent = start_pricing_agent(transport=replay_transport)
+
+    agent(replay_transport.user_prompts[0])
+
+    assert [type(result) for result in agent.tool_results] == [
+        PricingOptimizerInput,
+        PricingOptimizerOutput,
+    ]
+
+
+def test_rendered_results_instruction_is_only_given_to_rendering_front_ends() -> None:
+    instruction = RENDERED_RESULTS_INSTRUCTION.strip()
+
+    default_agent = start_pricing_agent(transport=ReplayTransport(FIXTURE_PATH))
+    assert instruction not in default_agent.conversation_history[0]["content"]
+
+    rendering_agent = start_pricing_agent(
+        transport=ReplayTransport(FIXTURE_PATH), render_results=True
+    )
+    assert instruction in rendering_agent.conversation_history[0]["content"]
+
+
+class _CancellingTransport:
+    # Cancels the turn while its first LLM request is in flight
+    def __init__(self, transport: ReplayTransport, token: CancellationToken) -> None:
+        self.transport = transport
+        self.token = token
+
+    def create_completion(self, **kwargs: Any) -> ChatCompletion:
+        self.token.cancel()
+        return self.transport.create_completion(**kwargs)
+
+
+def test_cancelled_turn_leaves_the_history_unchanged() -> None:
+    replay_transport = ReplayTransport(FIXTURE_PATH)
+    token = CancellationToken()
+    agent = start_pricing_agent(transport=_CancellingTransport(replay_transport, token))
+    history = list(agent.conversation_history)
+
+    with cancellation_scope(token), pytest.raises(Cancelled):
+        agent(replay_transport.user_prompts[0])
+
+    assert agent.conversation_history == history
+    assert agent.tool_results == []
+    # The answer of the request in flight was discarded, no tool was called
+    assert replay_transport.cursor == 1
+
+
+class _LoopingTransport:
+    # Keeps calling optimize_pricing with an invalid constraint, answers only without tools
+    def __init__(self, latency_seconds: float = 0.0) -> None:
+        self.latency_seconds = latency_seconds
+        self.requests: list[dict[str, Any]] = []
+
+    def create_completion(self, **kwargs: Any) -> ChatCompletion:
+        self.requests.append(kwargs)
+        time.sleep(self.latency_seconds)
+        if kwargs.get("tool_choice") == "none":
+            message = {"role": "assistant", "content": "Partial answer"}
+        else:
+            arguments = {
+                "product_ids": ["product-A"],
+                "inventories": [{"product_id": "product-A", "inventory": 10}],
+                "market_sizes": [{"product_id": "product-A", "market_size": 100}],
+                "adhoc_ortools_constraints": ["product_price['product-Z'] <= 3"],
+            }
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{len(self.requests)}",
+                        "type": "function",
+                        "function": {
+                            "name": "optimize_pricing",
+                            "arguments": json.dumps(arguments),
+                        },
+                    }
+                ],
+            }
+        return ChatCompletion.model_validate(
+            {
+                "id": "chatcmpl-loop",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "stub",
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                "usage": {
+                    "prompt_tokens": 10,
+                    "completion_tokens": 2,
+                    "total_tokens": 12,
+                },
+            }
+        )
+
+
+def test_tool_rounds_cap_asks_for_an_answer_without_tools() -> None:
+    transport = _LoopingTransport()
+    agent = start_pricing_agent(transport=transport)
+    agent.max_tool_rounds = 2
+
+    assert agent("Optimize product-A") == "Partial answer"
+
+    assert transport.requests[-1]["tool_choice"] == "none"
+    usage = agent.turn_usages[-1]
+    assert usage.outcome == "tool_rounds"
+    assert (usage.tool_rounds, usage.tool_errors, usage.llm_requests) == (2, 2, 3)
+    assert (usage.prompt_tokens, usage.completion_tokens) == (30, 6)
+    assert agent.conversation_history[-1].content == "Partial answer"
+
+
+def test_deadline_answers_with_the_last_tool_error() -> None:
+    agent = start_pricing_agent(transport=_LoopingTransport(latency_seconds=0.05))
+    agent.turn_deadline_seconds = 0.1
+
+    answer = agent("Optimize product-A")
+
+    assert "time budget of 0.1s was exhausted" in answer
+    assert "optimize_pricing failed with" in answer
+    assert "product-Z" in answer
+    usage = agent.turn_usages[-1]
+    assert usage.outcome == "deadline"
+    assert usage.elapsed_seconds >= 0.1
+    assert agent.conversation_history[-1] == {"role": "assistant", "content": answer}
+
+
+class _TimingOutTransport:
+    # Never answers, the request times out after the timeout it was given
+    def __init__(self) -> None:
+        self.requests: list[dict[str, Any]] = []
+
+    def create_completion(self, **kwargs: Any) -> ChatCompletion:
+        self.requests.append(kwargs)
+        time.sleep(kwargs["timeout"])
+        raise TimeoutError("Request timed out")
+
+
+def test_llm_request_times_out_at_the_deadline() -> None:
+    transport = _TimingOutTransport()
+    agent = start_pricing_agent(transport=transport)
+    agent.turn_deadline_seconds = 0.1
+
+    answer = agent("Optimize product-A")
+
+    assert "time budget of 0.1s was exhausted" in answer
+    assert 0 < transport.requests[0]["timeout"] <= 0.1
+    usage = agent.turn_usages[-1]
+    assert usage.outcome == "deadline"
+    assert 0.1 <= usage.elapsed_seconds < 0.5
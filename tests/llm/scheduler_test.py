@@ -0,0 +1,179 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from openai import OpenAI
+from optimaizer.llm.scheduler import RequestScheduler, ScheduledTransport
+from optimaizer.llm.stub_server import StubLLMServer
+from optimaizer.llm.transport import OpenAITransport
+from optimaizer.utils.cancellation import (
+    CancellationToken,
+    Cancelled,
+    cancellation_scope,
+)
+from optimaizer.utils.deadline import DeadlineExceeded, deadline_scope
+import pytest
+
+
+def _send_requests(
+    server: StubLLMServer, scheduler: RequestScheduler, sessions: int
+) -> None:
+    transport = OpenAITransport(
+        OpenAI(api_key="stub", base_url=server.base_url, max_retries=0)
+    )
+
+    def run_session(session: int) -> None:
+        scheduled_transport = ScheduledTransport(transport, scheduler, str(session))
+        for _ in range(3):
+            scheduled_transport.create_completion(
+                model="stub", messages=[{"role": "user", "content": "Hello"}]
+            )
+
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        list(executor.map(run_session, range(sessions)))
+
+
+def test_concurrency_budget_avoids_rate_limits() -> None:
+    scheduler = RequestScheduler(max_concurrent_requests=2)
+    with StubLLMServer(latency_seconds=0.02, max_concurrent_requests=2) as server:
+        _send_requests(server, scheduler, sessions=6)
+
+    assert server.request_count == 18
+    assert server.rate_limited_count == 0
+    summary = scheduler.summary()
+    assert summary["requests_total"] == 18
+    assert summary["queue_depth"] == summary["in_flight_requests"] == 0
+    assert summary["p99_wait_seconds"] > 0
+
+
+def test_rate_limited_requests_are_retried() -> None:
+    scheduler = RequestScheduler(max_concurrent_requests=6, base_backoff_seconds=0.01)
+    with StubLLMServer(
+        latency_seconds=0.02, max_concurrent_requests=2, retry_after_seconds=0.01
+    ) as server:
+        _send_requests(server, scheduler, sessions=6)
+
+    assert server.request_count == 18
+    assert server.rate_limited_count > 0
+    summary = scheduler.summary()
+    assert summary["rate_limited_total"] == summary["retries_total"]
+    assert summary["rate_limited_total"] == server.rate_limited_count
+    assert summary["errors_total"] == 0
+
+
+def test_sessions_are_served_in_turns() -> None:
+    scheduler = RequestScheduler(max_concurrent_requests=1)
+    release_first_request = threading.Event()
+    order = []
+
+    def request(session_id: str) -> None:
+        def fn() -> None:
+            if not order:
+                release_first_request.wait()
+            order.append(session_id)
+
+        scheduler.submit(session_id, tokens=1, fn=fn)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        for session_id in ["busy", "busy", "busy", "busy", "other"]:
+            executor.submit(request, session_id)
+            time.sleep(0.02)
+        release_first_request.set()
+
+    # The request of the other session is not queued behind all those of the busy session
+    assert order == ["busy", "busy", "other", "busy", "busy"]
+
+
+def test_cancelled_turn_leaves_the_queue() -> None:
+    scheduler = RequestScheduler(max_concurrent_requests=1)
+    release = threading.Event()
+    token = CancellationToken()
+
+    def waiting_request() -> None:
+        with cancellation_scope(token):
+            scheduler.submit("session", tokens=1, fn=lambda: None)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        executor.submit(scheduler.submit, "session", 1, release.wait)
+        time.sleep(0.02)
+        future = executor.submit(waiting_request)
+        time.sleep(0.02)
+        assert scheduler.summary()["queue_depth"] == 1
+        token.cancel()
+        with pytest.raises(Cancelled):
+            future.result()
+        assert scheduler.summary()["queue_depth"] == 0
+        release.set()
+
+
+def test_retry_past_the_deadline_gives_up() -> None:
+    scheduler = RequestScheduler(max_backoff_seconds=5.0)
+    # Every request is rate limited, with a Retry-After far beyond the maximum backoff
+    with StubLLMServer(max_concurrent_requests=0, retry_after_seconds=60.0) as server:
+        transport = ScheduledTransport(
+            OpenAITransport(
+                OpenAI(api_key="stub", base_url=server.base_url, max_retries=0)
+            ),
+            scheduler,
+            "session",
+        )
+        start_time = time.perf_counter()
+        with deadline_scope(start_time + 1.0), pytest.raises(DeadlineExceeded):
+            transport.create_completion(
+                model="stub", messages=[{"role": "user", "content": "Hello"}]
+            )
+
+    assert time.perf_counter() - start_time < 1.0
+    assert server.rate_limited_count == 1
+    summary = scheduler.summary()
+    assert (summary["retries_total"], summary["errors_total"]) == (0, 1)
+
+
+def test_request_queued_past_the_deadline_leaves_the_queue() -> None:
+    scheduler = RequestScheduler(max_concurrent_requests=1)
+    release = threading.Event()
+
+    def waiting_request() -> None:
+        with deadline_scope(time.perf_counter() + 0.1):
+            scheduler.submit("session", tokens=1, fn=lambda: None)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        executor.submit(scheduler.submit, "session", 1, release.wait)
+        time.sleep(0.02)
+        future = executor.submit(waiting_request)
+        with pytest.raises(DeadlineExceeded):
+            future.result()
+        assert scheduler.summary()["queue_depth"] == 0
+        release.set()
+
+
+class _TimeoutRecordingTransport:
+    def __init__(self) -> None:
+        self.timeouts: list[float | None] = []
+
+    def create_completion(self, **kwargs) -> None:
+        self.timeouts.append(kwargs.get("timeout"))
+
+
+def test_timeout_is_the_time_left_once_dequeued() -> None:
+    scheduler = RequestScheduler(max_concurrent_requests=1)
+    transport = _TimeoutRecordingTransport()
+    release = threading.Event()
+
+    def queued_request() -> None:
+        with deadline_scope(time.perf_counter() + 1.0):
+            ScheduledTransport(transport, scheduler, "session").create_completion(
+                messages=[], timeout=1.0
+            )
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        executor.submit(scheduler.submit, "other-session", 1, release.wait)
+        time.sleep(0.02)
+        future = executor.submit(queued_request)
+        time.sleep(0.3)
+        release.set()
+        future.result()
+
+    # The wait in the queue is not added on top of the timeout
+    (timeout,) = transport.timeouts
+    assert timeout <= 0.7
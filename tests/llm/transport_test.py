@@ -0,0 +1,35 @@
+from optimaizer.llm.transport import RecordingTransport, ReplayTransport
+from optimaizer.main import start_pricing_agent
+from pathlib import Path
+import pytest
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "pricing_conversation.json"
+
+
+def test_replay_runs_the_agent_loop_offline(tmp_path: Path) -> None:
+    replay_transport = ReplayTransport(FIXTURE_PATH)
+    recording_transport = RecordingTransport(
+        replay_transport, tmp_path / "rerecorded.json"
+    )
+    agent = start_pricing_agent(transport=recording_transport)
+
+    for user_prompt in replay_transport.user_prompts:
+        answer = agent(user_prompt)
+
+    assert replay_transport.cursor == len(replay_transport.exchanges)
+    assert (
+        answer
+        == replay_transport.exchanges[-1].response["choices"][0]["message"]["content"]
+    )
+    # Tool results are computed again during the replay, and match the recording
+    assert [exchange.request for exchange in recording_transport.exchanges] == [
+        exchange.request for exchange in replay_transport.exchanges
+    ]
+
+
+def test_replay_rejects_diverging_conversation() -> None:
+    agent = start_pricing_agent(transport=ReplayTransport(FIXTURE_PATH))
+    agent.conversation_history.append({"role": "user", "content": "Hello"})
+
+    with pytest.raises(RuntimeError, match="diverges from the recording"):
+        agent("Hello again")
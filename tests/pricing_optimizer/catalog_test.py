@@ -0,0 +1,126 @@
+from pathlib import Path
+from optimaizer.pricing_optimizer.catalog import Catalog
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.model_store import ModelStore
+from optimaizer.pricing_optimizer.types import (
+    CatalogChange,
+    CatalogDelta,
+    ConversionRateCurve,
+    Inventory,
+    MarketSize,
+    Prediction,
+)
+import pytest
+
+
+def test_delta_updates_only_changed_products() -> None:
+    optim_input = get_default_pricing_parameters()
+    catalog = Catalog(optim_input)
+    changes: list[CatalogChange] = []
+    catalog.subscribe(changes.append)
+
+    inventories = optim_input.inventories_dict
+    change = catalog.apply_delta(
+        CatalogDelta(
+            inventories=[
+                Inventory(product_id="product-A", inventory=inventories["product-A"]),
+                Inventory(product_id="product-B", inventory=3),
+            ],
+            market_sizes=[MarketSize(product_id="product-C", market_size=7)],
+        )
+    )
+    assert change == CatalogChange(
+        version=1, product_ids=["product-B", "product-C"], curve_product_ids=[]
+    )
+    assert changes == [change]
+    assert catalog.product_versions(["product-A", "product-B"]) == {
+        "product-A": 0,
+        "product-B": 1,
+    }
+    snapshot = catalog.snapshot()
+    assert snapshot.inventories_dict["product-B"] == 3
+    assert snapshot.market_sizes_dict["product-C"] == 7
+    assert snapshot.conversion_rate_curves == optim_input.conversion_rate_curves
+
+    # Resending unchanged rows is not a change
+    change = catalog.apply_delta(
+        CatalogDelta(inventories=[Inventory(product_id="product-B", inventory=3)])
+    )
+    assert change.version == 1 and change.product_ids == []
+    assert len(changes) == 1
+
+
+def test_delta_appends_curve_points() -> None:
+    optim_input = get_default_pricing_parameters()
+    catalog = Catalog(optim_input)
+    curve = optim_input.conversion_rate_curves_dict["product-A"]
+    new_points = [
+        Prediction(price=curve[0].price, conversion_rate=0.5),
+        Prediction(price=max(p.price for p in curve) + 1, conversion_rate=0.01),
+    ]
+
+    change = catalog.apply_delta(
+        CatalogDelta(
+            curve_points=[ConversionRateCurve(product_id="product-A", curve=new_points)]
+        )
+    )
+    assert change.curve_product_ids == ["product-A"]
+    new_curve = catalog.snapshot().conversion_rate_curves_dict["product-A"]
+    assert len(new_curve) == len(curve) + 1
+    assert new_points[0] in new_curve and new_points[1] == new_curve[-1]
+
+    with pytest.raises(ValueError, match="product-Z"):
+        catalog.apply_delta(
+            CatalogDelta(inventories=[Inventory(product_id="product-Z", inventory=1)])
+        )
+
+
+def test_curve_change_evicts_stored_models(tmp_path: Path) -> None:
+    optim_input = get_default_pricing_parameters()
+    model_store = ModelStore(tmp_path)
+    for product_ids in (["product-A", "product-B"], ["product-C"]):
+        model_store.load_or_build(
+            optim_input.model_copy(update={"product_ids": product_ids})
+        )
+    catalog = Catalog(optim_input)
+    catalog.subscribe(lambda change: model_store.evict(change.curve_product_ids))
+
+    catalog.apply_delta(
+        CatalogDelta(
+            curve_points=[
+                ConversionRateCurve(
+                    product_id="product-B",
+                    curve=[Prediction(price=1000.0, conversion_rate=0.0)],
+                )
+            ]
+        )
+    )
+    assert len(list(tmp_path.glob("*.pb"))) == 1
+
+
+def test_query_returns_requested_slice() -> None:
+    optim_input = get_default_pricing_parameters()
+    catalog = Catalog(optim_input)
+
+    (product_b,) = catalog.query(["product-B"], ["inventory"])
+    assert product_b.model_dump() == {
+        "product_id": "product-B",
+        "inventory": optim_input.inventories_dict["product-B"],
+    }
+
+    product_a, product_c = catalog.query(
+        ["product-A", "product-C"],
+        ["market_size", "conversion_rate_curve"],
+        min_price=2.0,
+        max_price=2.3,
+    )
+    assert product_a.market_size == optim_input.market_sizes_dict["product-A"]
+    assert [p.price for p in product_c.conversion_rate_curve] == [2.0, 2.1, 2.2, 2.3]
+    assert product_c.conversion_rate_curve == [
+        prediction
+        for prediction in optim_input.conversion_rate_curves_dict["product-C"]
+        if 2.0 <= prediction.price <= 2.3
+    ]
+
+    with pytest.raises(ValueError, match="product-Z"):
+        catalog.query(["product-Z"], ["inventory"])
@@ -0,0 +1,53 @@
+from optimaizer.pricing_optimizer.constraints import validate_constraints
+import pytest
+import time
+
+PRICES = {"product-A": [1.0, 2.0], "product-B": [1.5]}
+
+
+@pytest.mark.parametrize(
+    "constraint",
+    [
+        "product_price['product-A'] <= product_price['product-B']",
+        "x[('product-A', 2.0)] == 0",
+        "solver.Sum([product_sales['product-A'], product_sales['product-B']]) <= 120",
+        "sum(product_revenue.values()) >= 100",
+        "sum(x[key] for key in x if key[0] == 'product-A') == 1",
+        # Cannot be analyzed symbolically, left to the solver
+        "solver.infinity() >= product_sales['product-A']",
+    ],
+)
+def test_valid_constraints_pass(constraint: str) -> None:
+    assert validate_constraints([constraint], PRICES) == []
+
+
+@pytest.mark.parametrize(
+    "constraint, error",
+    [
+        ("product_price['product-A'] < product_price['product-B']", "use <= instead"),
+        ("product_price['product-Z'] <= 3", "unknown product 'product-Z'"),
+        ("x[('product-A', 3.0)] == 0", "candidate prices are [1.0, 2.0]"),
+        ("product_price['product-A'] * product_sales['product-A'] >= 1", "Non-linear"),
+        ("1 <= product_price['product-A'] <= 2", "Chained comparisons"),
+        ("math.floor(product_price['product-A']) <= 1", "name 'math' is not defined"),
+        ("product_price['product-A' <= 3", "invalid syntax"),
+        ("product_price['product-A']", "expected a linear (in)equality"),
+    ],
+)
+def test_invalid_constraints_are_reported(constraint: str, error: str) -> None:
+    (message,) = validate_constraints(
+        ["product_sales['product-A'] <= 60", constraint], PRICES
+    )
+    assert constraint in message
+    assert error in message
+
+
+def test_validation_of_a_large_catalog_only_builds_the_referenced_variables() -> None:
+    prices = {
+        f"product-{i}": [float(price) for price in range(50)] for i in range(20_000)
+    }
+
+    start_time = time.perf_counter()
+    assert validate_constraints([], prices) == []
+    assert validate_constraints(["x[('product-0', 1.0)] <= 0"], prices) == []
+    assert time.perf_counter() - start_time < 0.5
@@ -0,0 +1,105 @@
+from optimaizer.pricing_optimizer.catalog import Catalog
+from optimaizer.pricing_optimizer.constraints import parse_constraints
+from optimaizer.pricing_optimizer.curves import CurveInterner
+from optimaizer.pricing_optimizer.functions import load_data_from_csv
+from optimaizer.pricing_optimizer.presolve import (
+    compute_price_points,
+    compute_price_points_by_product,
+    presolve_price_points,
+)
+from optimaizer.pricing_optimizer.types import (
+    CatalogDelta,
+    ConversionRateCurve,
+    Prediction,
+)
+import pandas as pd
+
+
+def _duplicated_catalog_data() -> dict[str, pd.DataFrame]:
+    # product-A and product-B share the same curve, product-C has its own
+    curves = {
+        "product-A": [(1.0, 0.5), (2.0, 0.2)],
+        "product-B": [(1.0, 0.5), (2.0, 0.2)],
+        "product-C": [(1.0, 0.6), (2.0, 0.2)],
+    }
+    return {
+        "conversion_rate": pd.DataFrame(
+            [
+                (product_id, price, conversion_rate)
+                for product_id, curve in curves.items()
+                for price, conversion_rate in curve
+            ],
+            columns=["product", "price", "conversion_rate"],
+        ),
+        "inventory": pd.DataFrame({"product": [*curves], "inventory": [100, 100, 100]}),
+        "market_size": pd.DataFrame(
+            {"product": [*curves], "market_size": [200, 200, 200]}
+        ),
+    }
+
+
+def test_identical_curves_are_stored_once() -> None:
+    optim_input = load_data_from_csv(_duplicated_catalog_data())
+    curves = optim_input.conversion_rate_curves_dict
+    assert curves["product-A"] is curves["product-B"]
+    assert curves["product-A"] is not curves["product-C"]
+
+    inventories = optim_input.inventories_dict
+    market_sizes = optim_input.market_sizes_dict
+    price_points = compute_price_points_by_product(
+        optim_input.product_ids, curves, inventories, market_sizes
+    )
+    assert price_points["product-A"] is price_points["product-B"]
+    assert price_points == {
+        product_id: compute_price_points(
+            curves[product_id], inventories[product_id], market_sizes[product_id]
+        )
+        for product_id in optim_input.product_ids
+    }
+
+    # Shared price points are presolved like separate ones: only the constrained product keeps
+    # the price allowed by its constraint
+    presolved_price_points, report = presolve_price_points(
+        price_points,
+        inventories,
+        parse_constraints(
+            ["product_price['product-B'] >= 2"],
+            {
+                product_id: [point.price for point in points]
+                for product_id, points in price_points.items()
+            },
+        ),
+    )
+    assert [point.price for point in presolved_price_points["product-A"]] == [1.0]
+    assert [point.price for point in presolved_price_points["product-B"]] == [1.0, 2.0]
+    assert report.price_points_after == 4
+
+
+def test_delta_on_a_shared_curve_only_changes_its_product() -> None:
+    catalog = Catalog(load_data_from_csv(_duplicated_catalog_data()))
+    catalog.apply_delta(
+        CatalogDelta(
+            curve_points=[
+                ConversionRateCurve(
+                    product_id="product-A",
+                    curve=[Prediction(price=1.0, conversion_rate=0.4)],
+                )
+            ]
+        )
+    )
+
+    curves = catalog.snapshot().conversion_rate_curves_dict
+    assert curves["product-A"][0].conversion_rate == 0.4
+    assert curves["product-B"][0].conversion_rate == 0.5
+
+
+def test_curves_are_dropped_once_released_by_all_products() -> None:
+    curve_interner = CurveInterner()
+    curve = curve_interner.intern_points(((1.0, 0.5), (2.0, 0.3)))
+    assert curve_interner.intern([*curve]) is curve
+    assert len(curve_interner) == 1
+
+    curve_interner.release(curve)
+    assert len(curve_interner) == 1
+    curve_interner.release(curve)
+    assert len(curve_interner) == 0
@@ -0,0 +1,86 @@
+from optimaizer.pricing_optimizer.constraints import parse_constraints
+from optimaizer.pricing_optimizer.decomposition import (
+    DecomposedPricingOptimizer,
+    connected_components,
+)
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+import pytest
+import time
+
+
+def test_connected_components() -> None:
+    product_ids = ["a", "b", "c", "d", "e"]
+    constraints = parse_constraints(
+        [
+            "product_price['a'] <= product_price['c']",
+            "product_sales['c'] + product_sales['e'] <= 10",
+            "product_sales['d'] >= 1",
+        ],
+        {product_id: [1.0, 2.0] for product_id in product_ids},
+    )
+
+    assert connected_components(product_ids, constraints) == [
+        ["a", "c", "e"],
+        ["b"],
+        ["d"],
+    ]
+
+
+@pytest.mark.parametrize(
+    "adhoc_ortools_constraints",
+    [
+        [],
+        [
+            "product_sales['product-A'] <= 60",
+            "product_price['product-B'] >= product_price['product-C']",
+        ],
+        # Cannot be analyzed: the catalog is solved as a single component
+        ["solver.Sum([product_sales['product-A'], product_sales['product-B']]) <= 120"],
+    ],
+)
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_decomposed_optimizer_matches_monolithic_model(
+    adhoc_ortools_constraints: list[str], n_workers: int
+) -> None:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = adhoc_ortools_constraints
+    optimizer = PricingOptimizer(verbose=False)
+    optimizer.build_model(optim_input)
+    expected_output = optimizer.solve()
+
+    decomposed_optimizer = DecomposedPricingOptimizer(n_workers=n_workers)
+    decomposed_optimizer.build_model(optim_input)
+    output = decomposed_optimizer.solve()
+
+    assert [result.product_id for result in output.product_results] == (
+        optim_input.product_ids
+    )
+    assert output.total_revenue == pytest.approx(expected_output.total_revenue)
+
+
+def test_components_share_the_time_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = [
+        f"product_sales['{product_id}'] <= 60" for product_id in optim_input.product_ids
+    ]
+    time_limits = []
+    solve = PricingOptimizer.solve
+
+    def solve_until_the_time_limit(
+        optimizer: PricingOptimizer, time_limit_seconds: float | None = None
+    ):
+        time_limits.append(time_limit_seconds)
+        time.sleep(time_limit_seconds)
+        return solve(optimizer)
+
+    monkeypatch.setattr(PricingOptimizer, "solve", solve_until_the_time_limit)
+    decomposed_optimizer = DecomposedPricingOptimizer(n_workers=1)
+    decomposed_optimizer.build_model(optim_input)
+    start_time = time.perf_counter()
+    decomposed_optimizer.solve(time_limit_seconds=0.6)
+
+    # Each of the 3 components gets its share of the time left, not the whole time limit
+    assert len(time_limits) == 3
+    assert time_limits[0] == pytest.approx(0.2, abs=0.02)
+    assert time.perf_counter() - start_time < 0.8
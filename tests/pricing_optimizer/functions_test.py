@@ -1,9 +1,22 @@
 from optimaizer.pricing_optimizer.functions import (
     get_default_pricing_parameters,
+    load_data_from_csv,
     optimize_pricing,
+    query_pricing_parameters,
 )
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.types import PricingOptimizerInput
+from optimaizer.utils.cancellation import (
+    CancellationToken,
+    Cancelled,
+    cancellation_scope,
+)
+from optimaizer.utils.deadline import DeadlineExceeded, deadline_scope
 from data import DATA_PATH
+import json
+import time
 import pandas as pd
+import pytest
 
 
 def test_optimizer_results_with_default_parameters() -> None:
@@ -52,3 +65,119 @@ def test_optimizer_results_with_adhoc_ortools_constraints() -> None:
     assert float(new_solution_df.query("product_id == 'product-A'")["price"]) <= float(
         new_solution_df.query("product_id == 'product-B'")["price"]
     )
+
+
+def test_trusted_loader_matches_validated_input() -> None:
+    default_pricing_parameters = get_default_pricing_parameters()
+
+    validated_parameters = PricingOptimizerInput.model_validate(
+        default_pricing_parameters.model_dump()
+    )
+    assert default_pricing_parameters == validated_parameters
+
+
+def test_trusted_loader_rejects_invalid_data() -> None:
+    dfs = {file.stem: pd.read_csv(file) for file in DATA_PATH.glob("*.csv")}
+    dfs["inventory"]["inventory"] = dfs["inventory"]["inventory"].astype(float)
+    dfs["inventory"].loc[0, "inventory"] = 10.5
+
+    with pytest.raises(ValueError, match="Non-integer values"):
+        load_data_from_csv(dfs)
+
+
+def test_query_pricing_parameters_only_serializes_requested_fields() -> None:
+    result = query_pricing_parameters(["product-B"], ["inventory"], None, None)
+
+    assert json.loads(result.model_dump_json()) == {
+        "products": [{"product_id": "product-B", "inventory": 50}]
+    }
+
+
+def test_optimize_pricing_stops_when_the_turn_is_cancelled() -> None:
+    default_pricing_parameters = get_default_pricing_parameters()
+    token = CancellationToken()
+    token.cancel()
+
+    with cancellation_scope(token), pytest.raises(Cancelled):
+        optimize_pricing(
+            product_ids=default_pricing_parameters.product_ids,
+            inventories=default_pricing_parameters.inventories,
+            market_sizes=default_pricing_parameters.market_sizes,
+            adhoc_ortools_constraints=["product_sales['product-A'] <= 60"],
+        )
+
+
+def test_optimize_pricing_stops_after_the_solve_of_a_cancelled_turn(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    default_pricing_parameters = get_default_pricing_parameters()
+    token = CancellationToken()
+    solve_kwargs = []
+    solve = PricingOptimizer.solve
+
+    def solve_and_cancel(optimizer: PricingOptimizer, **kwargs):
+        solve_kwargs.append(kwargs)
+        token.cancel()
+        return solve(optimizer, **kwargs)
+
+    monkeypatch.setattr(PricingOptimizer, "solve", solve_and_cancel)
+
+    with cancellation_scope(token), pytest.raises(Cancelled):
+        optimize_pricing(
+            product_ids=default_pricing_parameters.product_ids,
+            inventories=default_pricing_parameters.inventories,
+            market_sizes=default_pricing_parameters.market_sizes,
+            adhoc_ortools_constraints=["product_sales['product-A'] <= 60"],
+        )
+
+    # A single solve, without time slices
+    assert solve_kwargs == [{}]
+
+
+def test_optimize_pricing_solves_within_the_time_left_before_the_deadline(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    default_pricing_parameters = get_default_pricing_parameters()
+    time_limits = []
+    solve = PricingOptimizer.solve
+
+    def solve_with_time_limit(optimizer: PricingOptimizer, **kwargs):
+        time_limits.append(kwargs.get("time_limit_seconds"))
+        return solve(optimizer, **kwargs)
+
+    monkeypatch.setattr(PricingOptimizer, "solve", solve_with_time_limit)
+    kwargs = dict(
+        product_ids=default_pricing_parameters.product_ids,
+        inventories=default_pricing_parameters.inventories,
+        market_sizes=default_pricing_parameters.market_sizes,
+        adhoc_ortools_constraints=[],
+    )
+
+    with deadline_scope(time.perf_counter() + 60):
+        optimize_pricing(**kwargs)
+    with deadline_scope(time.perf_counter()), pytest.raises(DeadlineExceeded):
+        optimize_pricing(**kwargs)
+
+    assert len(time_limits) == 1
+    assert 0 < time_limits[0] <= 60
+
+
+def test_optimize_pricing_reports_invalid_constraints_before_building_the_model() -> (
+    None
+):
+    default_pricing_parameters = get_default_pricing_parameters()
+
+    with pytest.raises(ValueError) as e:
+        optimize_pricing(
+            product_ids=["product-A", "product-B"],
+            inventories=default_pricing_parameters.inventories,
+            market_sizes=default_pricing_parameters.market_sizes,
+            adhoc_ortools_constraints=[
+                "product_price['product-A'] < product_price['product-B']",
+                "product_price['product-C'] <= 2",
+            ],
+        )
+
+    # All the errors are reported at once
+    assert "Strict inequalities" in str(e.value)
+    assert "unknown product 'product-C'" in str(e.value)
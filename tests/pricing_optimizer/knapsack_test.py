@@ -0,0 +1,54 @@
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+import pytest
+
+
+@pytest.mark.parametrize(
+    "adhoc_ortools_constraints",
+    [
+        [],
+        ["sum(product_sales.values()) <= 150"],
+        ["product_sales['product-A'] + product_sales['product-B'] <= 120"],
+        ["sum(product_revenue.values()) <= 300"],
+        ["sum(product_revenue.values()) >= 330", "product_price['product-C'] <= 1.2"],
+        [
+            "2 * product_sales['product-A'] - product_revenue['product-C'] <= 100",
+            "x[('product-B', 1.0)] == 1",
+        ],
+    ],
+)
+def test_knapsack_matches_mip(adhoc_ortools_constraints: list[str]) -> None:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = adhoc_ortools_constraints
+
+    solutions = {}
+    for knapsack in (False, True):
+        optimizer = PricingOptimizer(verbose=False, knapsack=knapsack)
+        optimizer.build_model(optim_input)
+        solutions[knapsack] = optimizer.solve()
+
+    assert optimizer.knapsack_solution is not None
+    assert solutions[True].total_revenue == pytest.approx(
+        solutions[False].total_revenue
+    )
+
+
+@pytest.mark.parametrize(
+    "adhoc_ortools_constraints",
+    [
+        [
+            "product_sales['product-A'] + product_sales['product-B'] <= 120",
+            "product_sales['product-B'] + product_sales['product-C'] <= 60",
+        ],
+        ["product_price['product-A'] <= product_price['product-B']"],
+        ["sum(product_sales.values()) == 150"],
+    ],
+)
+def test_knapsack_falls_back_to_mip(adhoc_ortools_constraints: list[str]) -> None:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = adhoc_ortools_constraints
+    optimizer = PricingOptimizer(verbose=False)
+    optimizer.build_model(optim_input)
+
+    assert optimizer.knapsack_solution is None
+    assert optimizer.x
@@ -0,0 +1,54 @@
+from pathlib import Path
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.model_store import ModelStore
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.types import Inventory, PricingOptimizerInput
+import pytest
+
+
+@pytest.fixture
+def optim_input() -> PricingOptimizerInput:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = [
+        "product_sales['product-A'] + product_sales['product-B'] <= 120",
+        "product_price['product-A'] <= product_price['product-B']",
+    ]
+    return optim_input
+
+
+def test_stored_model_is_patched_with_new_inventories(
+    tmp_path: Path, optim_input: PricingOptimizerInput
+) -> None:
+    model_store = ModelStore(tmp_path)
+    model_store.load_or_build(optim_input)
+
+    optim_input.inventories = [
+        inventory
+        if inventory.product_id != "product-C"
+        else Inventory(product_id="product-C", inventory=10)
+        for inventory in optim_input.inventories
+    ]
+    loaded_optimizer = model_store.load(optim_input)
+    built_optimizer = PricingOptimizer(verbose=False, presolve=False, knapsack=False)
+    built_optimizer.build_model(optim_input)
+
+    assert loaded_optimizer is not None
+    assert loaded_optimizer.x.keys() == built_optimizer.x.keys()
+    assert loaded_optimizer.solve() == built_optimizer.solve()
+
+
+def test_stored_model_is_rebuilt_when_constrained_products_change(
+    tmp_path: Path, optim_input: PricingOptimizerInput
+) -> None:
+    model_store = ModelStore(tmp_path)
+    model_store.load_or_build(optim_input)
+    assert model_store.load(optim_input) is not None
+
+    optim_input.inventories = [
+        Inventory(product_id=inventory.product_id, inventory=inventory.inventory + 1)
+        for inventory in optim_input.inventories
+    ]
+    assert model_store.load(optim_input) is None
+
+    optim_input.adhoc_ortools_constraints = []
+    assert model_store.load(optim_input) is None
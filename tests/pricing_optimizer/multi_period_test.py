@@ -0,0 +1,86 @@
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.multi_period import MultiPeriodPricingOptimizer
+from optimaizer.pricing_optimizer.types import (
+    LocationInventory,
+    LocationMarketSize,
+    MultiPeriodPricingInput,
+)
+from data import DATA_PATH
+import pandas as pd
+import pytest
+
+
+def _multi_period_input(
+    location_ids: list[str], n_periods: int, adhoc_ortools_constraints: list[str]
+) -> MultiPeriodPricingInput:
+    default_pricing_parameters = get_default_pricing_parameters()
+    return MultiPeriodPricingInput(
+        product_ids=default_pricing_parameters.product_ids,
+        location_ids=location_ids,
+        n_periods=n_periods,
+        conversion_rate_curves=default_pricing_parameters.conversion_rate_curves,
+        inventories=[
+            LocationInventory(
+                location_id=location_id,
+                product_id=inventory.product_id,
+                inventory=inventory.inventory,
+            )
+            for location_id in location_ids
+            for inventory in default_pricing_parameters.inventories
+        ],
+        market_sizes=[
+            LocationMarketSize(
+                location_id=location_id,
+                product_id=market_size.product_id,
+                period=period,
+                market_size=market_size.market_size // n_periods,
+            )
+            for location_id in location_ids
+            for period in range(n_periods)
+            for market_size in default_pricing_parameters.market_sizes
+        ],
+        adhoc_ortools_constraints=adhoc_ortools_constraints,
+    )
+
+
+def test_single_period_matches_single_period_optimizer() -> None:
+    optimizer = MultiPeriodPricingOptimizer(n_workers=1)
+    optimizer.build_model(_multi_period_input(["store-1"], 1, []))
+    solution = optimizer.solve()
+
+    expected_solution_df = pd.read_csv(DATA_PATH / "solution.csv")
+    assert solution.gap == pytest.approx(0.0)
+    assert solution.total_revenue == pytest.approx(
+        expected_solution_df["revenue"].sum()
+    )
+
+
+@pytest.mark.parametrize(
+    "adhoc_ortools_constraints",
+    [[], ["product_price['product-A'] <= product_price['product-B']"]],
+)
+def test_inventory_carries_over_between_periods(
+    adhoc_ortools_constraints: list[str],
+) -> None:
+    optim_input = _multi_period_input(
+        ["store-1", "store-2"], 4, adhoc_ortools_constraints
+    )
+    optimizer = MultiPeriodPricingOptimizer(max_iterations=30, n_workers=2)
+    optimizer.build_model(optim_input)
+    solution = optimizer.solve()
+
+    solution_df = pd.DataFrame([s.model_dump() for s in solution.product_results])
+    total_sales = solution_df.groupby(["location_id", "product_id"])["sales"].sum()
+    for (location_id, product_id), inventory in optim_input.inventories_dict.items():
+        assert total_sales[location_id, product_id] <= inventory
+
+    assert all(i.lower_bound <= i.upper_bound + 1e-6 for i in solution.iterations)
+    assert solution.total_revenue == pytest.approx(solution.iterations[-1].lower_bound)
+    if adhoc_ortools_constraints:
+        prices = solution_df.set_index(["location_id", "period", "product_id"])["price"]
+        for location_id in optim_input.location_ids:
+            for period in range(optim_input.n_periods):
+                assert (
+                    prices[location_id, period, "product-A"]
+                    <= prices[location_id, period, "product-B"]
+                )
@@ -0,0 +1,94 @@
+from optimaizer.benchmarks.piecewise_linear import dense_pricing_parameters
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.types import SolveProgress, SolveStatus
+from ortools.linear_solver import pywraplp
+import pytest
+import time
+
+
+def test_solve_reports_progress() -> None:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = [
+        "product_price['product-A'] <= product_price['product-B']"
+    ]
+    optimizer = PricingOptimizer(verbose=False)
+    optimizer.build_model(optim_input)
+
+    progress: list[SolveProgress] = []
+    solution = optimizer.solve(time_limit_seconds=10, progress_callback=progress.append)
+
+    assert solution.status == SolveStatus.OPTIMAL
+    assert solution.optimality_gap == 0.0
+    assert progress[-1].incumbent_value == pytest.approx(solution.total_revenue)
+    assert progress[-1].best_bound >= progress[-1].incumbent_value - 1e-6
+
+
+def test_progress_of_a_solver_without_hints_does_not_slow_down_the_solve() -> None:
+    # CBC ignores hints: time slices would restart the search from scratch
+    optim_input = dense_pricing_parameters(60, 200)
+    total_inventory = sum(inventory.inventory for inventory in optim_input.inventories)
+    optim_input.adhoc_ortools_constraints.append(
+        "sum(product_sales[product_id] for product_id in list(product_sales)[::2]) "
+        f"<= {int(0.2 * total_inventory)}"
+    )
+    solve_seconds, solutions, progress = [], [], []
+    for progress_callback in [None, progress.append]:
+        optimizer = PricingOptimizer(verbose=False, knapsack=False)
+        optimizer.build_model(optim_input)
+        start_time = time.perf_counter()
+        solutions.append(
+            optimizer.solve(
+                progress_callback=progress_callback, progress_interval_seconds=0.05
+            )
+        )
+        solve_seconds.append(time.perf_counter() - start_time)
+
+    assert not optimizer.supports_hints
+    assert len(progress) == 1
+    assert solutions[1].total_revenue == pytest.approx(solutions[0].total_revenue)
+    assert solve_seconds[1] < 1.5 * solve_seconds[0] + 0.1
+
+
+class _SlicedSolver:
+    # Finds the optimum in the first time slice, and only proves it optimal in the second one
+    def __init__(self) -> None:
+        self.statuses = [pywraplp.Solver.FEASIBLE, pywraplp.Solver.OPTIMAL]
+        self.bounds = [12.0, 10.0]
+
+    def SolverVersion(self) -> str:
+        return "SCIP 9.0.0 [LP solver: Glop 9.10]"
+
+    def SetTimeLimit(self, milliseconds: int) -> None:
+        pass
+
+    def SetHint(self, variables: list, values: list[float]) -> None:
+        pass
+
+    def Solve(self) -> int:
+        self.status, self.bound = self.statuses.pop(0), self.bounds.pop(0)
+        return self.status
+
+    def Objective(self) -> "_SlicedSolver":
+        return self
+
+    def Value(self) -> float:
+        return 10.0
+
+    def BestBound(self) -> float:
+        return self.bound
+
+    def variables(self) -> list:
+        return []
+
+
+def test_incumbent_proven_optimal_by_a_later_slice_is_optimal() -> None:
+    optimizer = PricingOptimizer(verbose=False)
+    optimizer.solver = _SlicedSolver()
+
+    solution = optimizer.solve(
+        time_limit_seconds=10, progress_callback=lambda progress: None
+    )
+
+    assert solution.status == SolveStatus.OPTIMAL
+    assert solution.optimality_gap == 0.0
@@ -0,0 +1,71 @@
+from optimaizer.benchmarks.piecewise_linear import dense_pricing_parameters
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.piecewise_linear import (
+    PiecewiseLinearPricingOptimizer,
+)
+import pytest
+
+
+def test_model_size_does_not_depend_on_curve_density() -> None:
+    model_sizes = []
+    for n_price_points in (50, 400):
+        optimizer = PiecewiseLinearPricingOptimizer(n_segments=8, verbose=False)
+        optimizer.build_model(dense_pricing_parameters(5, n_price_points))
+        model_sizes.append(
+            (optimizer.solver.NumVariables(), optimizer.solver.NumConstraints())
+        )
+
+    assert model_sizes[0] == model_sizes[1]
+
+
+def test_breakpoints_on_every_price_match_the_discrete_model() -> None:
+    optim_input = get_default_pricing_parameters()
+
+    discrete_optimizer = PricingOptimizer(verbose=False)
+    discrete_optimizer.build_model(optim_input)
+    piecewise_linear_optimizer = PiecewiseLinearPricingOptimizer(
+        n_segments=100, verbose=False, refinements=0
+    )
+    piecewise_linear_optimizer.build_model(optim_input)
+
+    assert piecewise_linear_optimizer.solve().total_revenue == pytest.approx(
+        discrete_optimizer.solve().total_revenue
+    )
+
+
+def test_refinement_selects_prices_between_the_curve_points() -> None:
+    optim_input = get_default_pricing_parameters()
+    curve_prices = {
+        product_id: {prediction.price for prediction in curve}
+        for product_id, curve in optim_input.conversion_rate_curves_dict.items()
+    }
+
+    discrete_optimizer = PricingOptimizer(verbose=False)
+    discrete_optimizer.build_model(optim_input)
+    optimizer = PiecewiseLinearPricingOptimizer(n_segments=4, verbose=False)
+    optimizer.build_model(optim_input)
+    output = optimizer.solve()
+
+    assert output.total_revenue > discrete_optimizer.solve().total_revenue
+    assert any(
+        result.price not in curve_prices[result.product_id]
+        for result in output.product_results
+    )
+    # The model stays small: coarse breakpoints plus a finer grid around the selected price
+    for breakpoints in optimizer.product_breakpoints.values():
+        assert len(breakpoints) <= 3 * 4 + 1
+
+
+def test_adhoc_constraints_apply_to_the_continuous_price() -> None:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = ["product_price['product-A'] <= 2.25"]
+    optimizer = PiecewiseLinearPricingOptimizer(n_segments=4, verbose=False)
+    optimizer.build_model(optim_input)
+    output = optimizer.solve()
+
+    product_a = next(
+        result for result in output.product_results if result.product_id == "product-A"
+    )
+    assert product_a.price <= 2.25
+    assert product_a.revenue == pytest.approx(product_a.price * product_a.sales)
@@ -0,0 +1,38 @@
+from pathlib import Path
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.portfolio import PortfolioPricingOptimizer
+import pytest
+
+
+def test_portfolio_returns_optimal_solution_and_records_winner(
+    tmp_path: Path,
+) -> None:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = [
+        "product_sales['product-A'] + product_sales['product-B'] <= 120",
+        "product_sales['product-B'] + product_sales['product-C'] <= 60",
+    ]
+    optimizer = PricingOptimizer(verbose=False)
+    optimizer.build_model(optim_input)
+    expected_output = optimizer.solve()
+
+    history_path = tmp_path / "portfolio.jsonl"
+    portfolio = PortfolioPricingOptimizer(
+        solver_ids=("CBC", "SCIP"), history_path=history_path
+    )
+    output = portfolio.solve(optim_input, time_limit_seconds=30)
+
+    assert output.total_revenue == pytest.approx(expected_output.total_revenue)
+    history = PortfolioPricingOptimizer.read_history(history_path)
+    assert [run.winner for run in history] == [portfolio.last_run.winner]
+    assert history[0].winner in {"CBC", "SCIP"}
+    assert history[0].features.n_coupling_constraints == 2
+
+
+def test_portfolio_raises_when_all_backends_fail() -> None:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = ["product_sales['product-A'] >= 1000"]
+
+    with pytest.raises(RuntimeError, match="Infeasible"):
+        PortfolioPricingOptimizer(solver_ids=("CBC", "SCIP")).solve(optim_input)
@@ -0,0 +1,44 @@
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+import pytest
+
+
+@pytest.mark.parametrize(
+    "adhoc_ortools_constraints",
+    [
+        [],
+        ["product_price['product-A'] <= product_price['product-B']"],
+        ["product_sales['product-A'] + product_sales['product-B'] <= 120"],
+        ["product_sales['product-A'] >= 95", "product_price['product-C'] <= 1.2"],
+        ["x[('product-A', 1.0)] == 1"],
+        ["sum(product_sales.values()) <= 150"],
+    ],
+)
+def test_presolve_keeps_optimal_revenue(adhoc_ortools_constraints: list[str]) -> None:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = adhoc_ortools_constraints
+
+    solutions = {}
+    for presolve in (False, True):
+        optimizer = PricingOptimizer(verbose=False, presolve=presolve)
+        optimizer.build_model(optim_input)
+        solutions[presolve] = optimizer.solve()
+
+    assert solutions[True].total_revenue == pytest.approx(
+        solutions[False].total_revenue
+    )
+    assert optimizer.presolve_report.price_points_after < (
+        optimizer.presolve_report.price_points_before
+    )
+
+
+def test_presolve_reduces_unconstrained_products_to_best_price() -> None:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = [
+        "product_price['product-A'] <= product_price['product-B']"
+    ]
+    optimizer = PricingOptimizer(verbose=False)
+    optimizer.build_model(optim_input)
+
+    assert [key for key in optimizer.x if key[0] == "product-C"] == [("product-C", 1.3)]
+    assert optimizer.presolve_report.pruned_inventory_capped > 0
@@ -0,0 +1,60 @@
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.robust import RobustPricingOptimizer
+from optimaizer.pricing_optimizer.types import DemandUncertainty, RobustPricingInput
+import pytest
+
+
+def test_robust_without_uncertainty_matches_deterministic_optimizer() -> None:
+    optim_input = get_default_pricing_parameters()
+    optimizer = PricingOptimizer(verbose=False)
+    optimizer.build_model(optim_input)
+    expected_output = optimizer.solve()
+
+    robust_optimizer = RobustPricingOptimizer(n_scenarios=50)
+    robust_optimizer.build_model(RobustPricingInput(**optim_input.model_dump()))
+    output = robust_optimizer.solve()
+
+    assert output.expected_revenue == pytest.approx(expected_output.total_revenue)
+    assert list(output.revenue_quantiles.values()) == pytest.approx(
+        [expected_output.total_revenue] * 3
+    )
+    assert {result.product_id: result.price for result in output.product_results} == {
+        result.product_id: result.price for result in expected_output.product_results
+    }
+
+
+def test_robust_prices_beat_nominal_prices_on_the_scenarios() -> None:
+    optim_input = get_default_pricing_parameters()
+    robust_input = RobustPricingInput(
+        **optim_input.model_dump(),
+        uncertainties=[
+            DemandUncertainty(
+                product_id=product_id, market_size_cv=0.3, conversion_rate_cv=0.1
+            )
+            for product_id in optim_input.product_ids
+        ],
+    )
+    robust_input.adhoc_ortools_constraints = [
+        "product_sales['product-A'] + product_sales['product-B'] <= 100"
+    ]
+    robust_optimizer = RobustPricingOptimizer(n_scenarios=2000)
+    robust_optimizer.build_model(robust_input)
+    output = robust_optimizer.solve()
+
+    assert output.n_scenarios == 2000
+    assert output.expected_revenue >= output.nominal_expected_revenue - 1e-6
+    quantiles = [output.revenue_quantiles[q] for q in (0.05, 0.5, 0.95)]
+    assert quantiles == sorted(quantiles) and quantiles[0] < quantiles[-1]
+    sales = {
+        result.product_id: result.expected_sales for result in output.product_results
+    }
+    assert sales["product-A"] + sales["product-B"] <= 100 + 1e-6
+    assert output.expected_revenue == pytest.approx(
+        sum(result.expected_revenue for result in output.product_results)
+    )
+
+    revenues = robust_optimizer.score(
+        [{result.product_id: result.price for result in output.product_results}]
+    )
+    assert revenues.shape == (1, 2000)
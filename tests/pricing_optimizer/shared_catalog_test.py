@@ -0,0 +1,58 @@
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from optimaizer.pricing_optimizer.optimizer import PricingOptimizer
+from optimaizer.pricing_optimizer.presolve import compute_price_points
+from optimaizer.pricing_optimizer.shared_catalog import SharedCatalog
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import pytest
+
+
+def _solve_attached(name: str, adhoc_ortools_constraints: list[str]) -> dict:
+    with SharedCatalog.attach(name) as shared_catalog:
+        optim_input = shared_catalog.optimizer_input()
+        optim_input.adhoc_ortools_constraints = adhoc_ortools_constraints
+        optimizer = PricingOptimizer(verbose=False)
+        optimizer.build_model(optim_input, shared_catalog=shared_catalog)
+        return optimizer.solve().model_dump()
+
+
+def test_price_points_match_the_curves() -> None:
+    optim_input = get_default_pricing_parameters()
+    curves = optim_input.conversion_rate_curves_dict
+    inventories = optim_input.inventories_dict
+    market_sizes = optim_input.market_sizes_dict
+    # Subset in another order than the catalog, with changed inventories
+    product_ids = optim_input.product_ids[::-2]
+    inventories[product_ids[0]] = 1
+
+    with SharedCatalog.create(optim_input) as shared_catalog:
+        assert shared_catalog.curve(product_ids[0]) == curves[product_ids[0]]
+        assert shared_catalog.price_points(product_ids, inventories, market_sizes) == {
+            product_id: compute_price_points(
+                curves[product_id], inventories[product_id], market_sizes[product_id]
+            )
+            for product_id in product_ids
+        }
+
+        with pytest.raises(ValueError, match="Unknown products"):
+            shared_catalog.price_points(["product-Z"], inventories, market_sizes)
+
+
+def test_attached_worker_solves_like_the_catalog() -> None:
+    optim_input = get_default_pricing_parameters()
+    optim_input.adhoc_ortools_constraints = ["product_sales['product-A'] <= 60"]
+    optimizer = PricingOptimizer(verbose=False)
+    optimizer.build_model(optim_input)
+    expected_output = optimizer.solve()
+
+    with SharedCatalog.create(optim_input) as shared_catalog:
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            output = executor.submit(
+                _solve_attached,
+                shared_catalog.name,
+                optim_input.adhoc_ortools_constraints,
+            ).result()
+
+    assert output == expected_output.model_dump()
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from optimaizer.pricing_optimizer.functions import (
+    load_data_from_csv,
+    load_data_from_workbook,
+)
+from optimaizer.pricing_optimizer.workbook import WorkbookCache
+from data import DATA_PATH
+import openpyxl
+import pandas as pd
+
+
+def _write_workbook(path: Path, dfs: dict[str, pd.DataFrame]) -> None:
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for name, df in dfs.items():
+        worksheet = workbook.create_sheet(name)
+        worksheet.append(list(df.columns))
+        for row in df.itertuples(index=False):
+            worksheet.append(list(row))
+    workbook.save(path)
+
+
+def test_workbook_is_loaded_like_the_csv_files(tmp_path: Path) -> None:
+    dfs = {file.stem: pd.read_csv(file) for file in DATA_PATH.glob("*.csv")}
+    _write_workbook(tmp_path / "data.xlsx", dfs)
+
+    optim_input = load_data_from_workbook(tmp_path / "data.xlsx", tmp_path / "cache")
+    assert optim_input == load_data_from_csv(dfs)
+
+
+def test_only_changed_sheets_are_parsed_again(tmp_path: Path) -> None:
+    dfs = {file.stem: pd.read_csv(file) for file in DATA_PATH.glob("*.csv")}
+    _write_workbook(tmp_path / "data.xlsx", dfs)
+    workbook_cache = WorkbookCache(tmp_path / "cache")
+
+    workbook_cache.load(tmp_path / "data.xlsx")
+    assert workbook_cache.parsed_sheets == [
+        "conversion_rate",
+        "inventory",
+        "market_size",
+    ]
+    workbook_cache.load(tmp_path / "data.xlsx")
+    assert workbook_cache.parsed_sheets == []
+
+    dfs["inventory"].loc[0, "inventory"] = 80
+    dfs["solution"].loc[0, "sales"] = 79
+    _write_workbook(tmp_path / "data.xlsx", dfs)
+    sheets = workbook_cache.load(tmp_path / "data.xlsx")
+    assert workbook_cache.parsed_sheets == ["inventory"]
+    for name in ("conversion_rate", "inventory", "market_size"):
+        pd.testing.assert_frame_equal(sheets[name], dfs[name])
@@ -0,0 +1,201 @@
+from optimaizer.service import OptimizationService
+from optimaizer.pricing_optimizer.functions import get_default_pricing_parameters
+from data import DATA_PATH
+from typing import Any
+import asyncio
+import json
+import time
+import pandas as pd
+import pytest
+
+
+async def _request(
+    app: OptimizationService, method: str, path: str, body: Any = None
+) -> tuple[int, Any]:
+    messages = [
+        {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+    ]
+    sent = []
+
+    async def receive() -> dict[str, Any]:
+        return messages.pop(0)
+
+    async def send(message: dict[str, Any]) -> None:
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path}, receive, send)
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+@pytest.fixture(scope="module")
+def service() -> OptimizationService:
+    service = OptimizationService(workers=1, max_queue_size=0)
+    service.startup()
+    yield service
+    service.shutdown()
+
+
+def test_optimize_endpoint(service: OptimizationService) -> None:
+    default_pricing_parameters = get_default_pricing_parameters()
+    status, solution = asyncio.run(
+        _request(
+            service,
+            "POST",
+            "/optimize",
+            {
+                "product_ids": default_pricing_parameters.product_ids,
+                "inventories": [
+                    i.model_dump() for i in default_pricing_parameters.inventories
+                ],
+                "market_sizes": [
+                    m.model_dump() for m in default_pricing_parameters.market_sizes
+                ],
+            },
+        )
+    )
+
+    assert status == 200
+    solution_df = pd.DataFrame(solution["product_results"])
+    expected_solution_df = pd.read_csv(DATA_PATH / "solution.csv")
+    pd.testing.assert_frame_equal(solution_df, expected_solution_df)
+
+    status, metrics = asyncio.run(_request(service, "GET", "/metrics"))
+    assert status == 200
+    assert metrics["requests_total"] == 1
+    assert metrics["in_flight"] == 0
+
+
+def test_optimize_endpoint_errors(service: OptimizationService) -> None:
+    status, _ = asyncio.run(
+        _request(service, "POST", "/optimize", {"product_ids": "product-A"})
+    )
+    assert status == 422
+
+    status, error = asyncio.run(
+        _request(
+            service,
+            "POST",
+            "/optimize",
+            {
+                "product_ids": ["product-A"],
+                "inventories": [{"product_id": "product-A", "inventory": 10}],
+                "market_sizes": [{"product_id": "product-A", "market_size": 10}],
+                "adhoc_ortools_constraints": ["product_price['product-Z'] <= 1"],
+            },
+        )
+    )
+    assert status == 400
+    assert "product-Z" in error["error"]
+
+
+def test_backpressure(service: OptimizationService) -> None:
+    # One request is already being solved and the queue is full
+    service.metrics.in_flight = service.workers
+    try:
+        status, _ = asyncio.run(_request(service, "POST", "/optimize", {}))
+    finally:
+        service.metrics.in_flight = 0
+    assert status == 503
+
+
+def test_timed_out_request_stays_in_flight_until_its_job_is_done(
+    service: OptimizationService,
+) -> None:
+    default_pricing_parameters = get_default_pricing_parameters()
+
+    async def run() -> None:
+        # The worker is busy, the request times out while its job waits in the pool
+        service.startup().apply_async(time.sleep, (0.5,))
+        status, _ = await _request(
+            service,
+            "POST",
+            "/optimize",
+            {
+                "product_ids": default_pricing_parameters.product_ids,
+                "inventories": [
+                    i.model_dump() for i in default_pricing_parameters.inventories
+                ],
+                "market_sizes": [
+                    m.model_dump() for m in default_pricing_parameters.market_sizes
+                ],
+                "time_limit_seconds": 0.001,
+            },
+        )
+        assert status == 504
+        # The job is still queued on the worker: the queue bound must account for it
+        assert service.metrics.in_flight == 1
+        for _ in range(500):
+            if service.metrics.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert service.metrics.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_request_whose_worker_dies_fails_and_leaves_the_queue(
+    service: OptimizationService,
+) -> None:
+    start_time = time.perf_counter()
+    status, error = asyncio.run(
+        _request(
+            service,
+            "POST",
+            "/optimize",
+            {
+                "product_ids": ["product-A"],
+                "inventories": [{"product_id": "product-A", "inventory": 10}],
+                "market_sizes": [{"product_id": "product-A", "market_size": 10}],
+                # Kills the worker, like a crash of the native solver would
+                "adhoc_ortools_constraints": ["__import__('os')._exit(1) <= 0"],
+                "time_limit_seconds": 30,
+            },
+        )
+    )
+
+    assert status == 500
+    assert "stopped unexpectedly" in error["error"]
+    assert time.perf_counter() - start_time < 10
+    assert service.metrics.in_flight == 0
+
+
+def test_catalog_delta_endpoint(service: OptimizationService) -> None:
+    inventory = get_default_pricing_parameters().inventories_dict["product-A"]
+    status, change = asyncio.run(
+        _request(
+            service,
+            "POST",
+            "/catalog/delta",
+            {"inventories": [{"product_id": "product-A", "inventory": inventory + 5}]},
+        )
+    )
+    try:
+        assert status == 200
+        assert change["product_ids"] == ["product-A"]
+        assert change["curve_product_ids"] == []
+        status, default_parameters = asyncio.run(
+            _request(service, "GET", "/default-parameters")
+        )
+        assert {"product_id": "product-A", "inventory": inventory + 5} in (
+            default_parameters["inventories"]
+        )
+    finally:
+        asyncio.run(
+            _request(
+                service,
+                "POST",
+                "/catalog/delta",
+                {"inventories": [{"product_id": "product-A", "inventory": inventory}]},
+            )
+        )
+
+    status, error = asyncio.run(
+        _request(
+            service,
+            "POST",
+            "/catalog/delta",
+            {"market_sizes": [{"product_id": "product-Z", "market_size": 1}]},
+        )
+    )
+    assert status == 400
+    assert "product-Z" in error["error"]
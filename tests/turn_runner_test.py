@@ -0,0 +1,47 @@
+from optimaizer.turn_runner import TurnRunner
+from optimaizer.utils.cancellation import Cancelled, current_token
+import threading
+import pytest
+
+
+def _wait_for_cancellation(started: threading.Event) -> str:
+    started.set()
+    token = current_token()
+    while True:
+        token.raise_if_cancelled()
+        threading.Event().wait(0.01)
+
+
+def test_new_turn_cancels_and_waits_for_the_turn_in_flight() -> None:
+    turn_runner = TurnRunner(max_workers=2)
+    started = threading.Event()
+    first_turn = turn_runner.start("session", _wait_for_cancellation, started)
+    assert started.wait(5)
+
+    events = []
+    second_turn = turn_runner.start(
+        "session", lambda: events.append(first_turn.done) or "answer"
+    )
+    other_session_turn = turn_runner.start("other-session", lambda: "other answer")
+
+    with pytest.raises(Cancelled):
+        first_turn.future.result(timeout=5)
+    assert second_turn.future.result(timeout=5) == "answer"
+    # The second turn only started once the first one had stopped
+    assert events == [True]
+    assert other_session_turn.future.result(timeout=5) == "other answer"
+
+    assert not turn_runner.cancel("session")
+    turn_runner.shutdown()
+
+
+def test_cancel_stops_the_turn_of_the_session() -> None:
+    turn_runner = TurnRunner(max_workers=1)
+    started = threading.Event()
+    turn = turn_runner.start("session", _wait_for_cancellation, started)
+    assert started.wait(5)
+
+    assert turn_runner.cancel("session")
+    with pytest.raises(Cancelled):
+        turn.future.result(timeout=5)
+    turn_runner.shutdown()